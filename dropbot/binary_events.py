@@ -0,0 +1,169 @@
+'''
+Binary capacitance event records.
+
+If the ``binary_events`` state field is set, the DropBot sends
+``capacitance-updated``, ``capacitance-exceeded`` and ``capacitance-steady``
+events as fixed-size binary records (see ``CapacitanceRecord`` in
+``Node.h``), i.e., ``STREAM`` packets with the packet identifier
+:data:`BINARY_EVENTS_STREAM_ID`, rather than as JSON.
+
+Records from any number of packets are decoded into a single NumPy record
+array (see :func:`decode_records`), without constructing a ``dict`` per
+event.  :class:`BinaryEventDispatcher` sends each decoded batch using the
+``capacitance-records`` signal and, for compatibility with existing
+receivers, (optionally) as JSON-equivalent event messages.
+
+.. versionadded:: 1.74.0
+
+Example
+-------
+
+    >>> recorder = CapacitanceRecorder()
+    >>> proxy.signals.signal('capacitance-records')\\
+    ...     .connect(recorder.extend, weak=False)
+    >>> proxy.enable_binary_events(messages=False)
+'''
+from __future__ import absolute_import, division, print_function
+from collections import OrderedDict
+
+import numpy as np
+
+__all__ = ['BINARY_EVENTS_STREAM_ID', 'EVENT_TYPES', 'RECORD_DTYPE',
+           'BinaryEventDispatcher', 'decode_records', 'encode_records',
+           'records_to_messages']
+
+#: Stream packet identifier of binary event records.
+BINARY_EVENTS_STREAM_ID = 0xFFFF
+
+#: Event name of each record type.
+EVENT_TYPES = OrderedDict([(1, 'capacitance-updated'),
+                           (2, 'capacitance-exceeded'),
+                           (3, 'capacitance-steady')])
+
+#: Record layout (little-endian, 16 bytes).  Field names match the keys of
+#: the respective JSON event messages.
+RECORD_DTYPE = np.dtype({'names': ['type', 'n_samples', 'time_us',
+                                   'new_value', 'V_a'],
+                         'formats': ['u1', '<u2', '<u4', '<f4', '<f4'],
+                         'offsets': [0, 2, 4, 8, 12], 'itemsize': 16})
+
+_EVENT_CODES = dict((name, type_) for type_, name in EVENT_TYPES.items())
+
+
+def decode_records(payloads):
+    '''
+    Parameters
+    ----------
+    payloads : bytes or list[bytes]
+        Payload of one or more binary event record packets.
+
+    Returns
+    -------
+    numpy.ndarray
+        Records (see :data:`RECORD_DTYPE`), in order.  A single payload is
+        decoded without copying.
+
+    Raises
+    ------
+    ValueError
+        If a payload is not a whole number of records.
+    '''
+    if not isinstance(payloads, (bytes, bytearray, memoryview)):
+        payloads = b''.join(payloads)
+    if len(payloads) % RECORD_DTYPE.itemsize:
+        raise ValueError('Payload length (%d bytes) is not a multiple of the '
+                         'record size (%d bytes).' %
+                         (len(payloads), RECORD_DTYPE.itemsize))
+    return np.frombuffer(payloads, dtype=RECORD_DTYPE)
+
+
+def encode_records(messages):
+    '''
+    Inverse of :func:`decode_records` (e.g., to emulate the firmware).
+
+    Parameters
+    ----------
+    messages : list[dict]
+        ``capacitance-updated``, ``capacitance-exceeded`` or
+        ``capacitance-steady`` event messages.
+
+    Returns
+    -------
+    bytes
+        Packed records.
+    '''
+    records = np.zeros(len(messages), dtype=RECORD_DTYPE)
+    for i, message in enumerate(messages):
+        records[i] = (_EVENT_CODES[message['event']],
+                      message.get('n_samples', 0), message['time_us'],
+                      message['new_value'], message.get('V_a', np.nan))
+    return records.tobytes()
+
+
+def records_to_messages(records):
+    '''
+    Parameters
+    ----------
+    records : numpy.ndarray
+        Records (see :data:`RECORD_DTYPE`).
+
+    Returns
+    -------
+    list[dict]
+        Event message for each record, with the same keys as the respective
+        JSON event messages (except for fields not included in records, e.g.,
+        ``target`` of ``capacitance-exceeded`` messages).
+    '''
+    columns = [records[name].tolist()
+               for name in ('type', 'new_value', 'time_us', 'n_samples',
+                            'V_a')]
+    return [{'event': EVENT_TYPES.get(type_, 'unknown'), 'new_value': value,
+             'time_us': time_us, 'n_samples': n_samples, 'V_a': V_a}
+            for type_, value, time_us, n_samples, V_a in zip(*columns)]
+
+
+class BinaryEventDispatcher(object):
+    '''
+    Decode binary event record packets and send the records as signals.
+
+    Parameters
+    ----------
+    signals : blinker.Namespace
+        Signals namespace, e.g., ``proxy.signals``.
+    messages : bool, optional
+        If ``True``, also send each record as an event message (see
+        :func:`records_to_messages`) using the signal named after the
+        respective event (e.g., ``capacitance-updated``).
+
+    Attributes
+    ----------
+    decoded : int
+        Number of records decoded.
+    '''
+    def __init__(self, signals, messages=True):
+        self.signals = signals
+        self.messages = messages
+        self.decoded = 0
+
+    def dispatch(self, payloads):
+        '''
+        Parameters
+        ----------
+        payloads : bytes or list[bytes]
+            Payload of one or more binary event record packets.
+
+        Returns
+        -------
+        numpy.ndarray
+            Decoded records, also sent as a single batch using the
+            ``capacitance-records`` signal.
+        '''
+        records = decode_records(payloads)
+        if not records.size:
+            return records
+        self.decoded += records.size
+        self.signals.signal('capacitance-records').send(records)
+        if self.messages:
+            for message in records_to_messages(records):
+                self.signals.signal(message['event']).send(message)
+        return records
@@ -0,0 +1,182 @@
+'''
+Ring buffer of periodic channel capacitance scans.
+
+If the ``channel_scan_interval_ms`` state field is non-zero (see
+:meth:`dropbot.proxy.ProxyMixin.start_channel_scan`), the DropBot
+periodically measures the capacitance of each channel in the channel scan
+mask and sends a ``channels-scanned`` event, e.g.::
+
+    {"event": "channels-scanned", "channels": [0, 1, ...],
+     "capacitances": [1.2e-12, 3.4e-12, ...], "n_samples": 50,
+     "time_us": 123456789, "duration_us": 54321}
+
+:class:`ChannelScanBuffer` stores the most recent scans in a preallocated
+2-D (scan × channel) array, one column per channel.
+
+.. versionadded:: 1.74.0
+
+Example
+-------
+
+    >>> scans = ChannelScanBuffer(proxy.number_of_channels)
+    >>> proxy.signals.signal('channels-scanned').connect(scans, weak=False)
+    >>> proxy.start_channel_scan(200)
+    >>> ...
+    >>> df = scans.to_frame()  # Most recent scans, one row per scan.
+'''
+from __future__ import absolute_import, division, print_function
+from collections import OrderedDict
+import threading
+
+import numpy as np
+import pandas as pd
+
+__all__ = ['ChannelScanBuffer']
+
+
+class ChannelScanBuffer(object):
+    '''
+    Fixed-capacity ring buffer of ``channels-scanned`` event capacitances.
+
+    Each scan is stored as a row of capacitances indexed by channel number;
+    channels not included in a scan are stored as ``NaN``.
+
+    Rows are written twice, i.e., at ``i`` and ``i + capacity`` of arrays
+    with ``2 * capacity`` rows, such that the most recent ``n`` scans (up
+    to the capacity) are always a contiguous slice.  Arrays returned by
+    :meth:`arrays` and :meth:`to_frame` are therefore views of the buffer,
+    in chronological order, without copying.
+
+    .. note::
+        Views are only valid until another :attr:`capacity` scans are
+        appended (copy any views to keep).
+
+    Instances may be connected directly as signal receivers.
+
+    Parameters
+    ----------
+    channel_count : int
+        Number of channels, e.g., ``proxy.number_of_channels``.
+    capacity : int, optional
+        Maximum number of scans kept.
+
+    Attributes
+    ----------
+    total : int
+        Number of scans appended (including scans no longer kept).
+    '''
+    def __init__(self, channel_count, capacity=1024):
+        self.channel_count = int(channel_count)
+        self.capacity = int(capacity)
+        self.total = 0
+        self._lock = threading.Lock()
+        self._capacitances = np.full((2 * self.capacity, self.channel_count),
+                                     np.nan)
+        self._columns = OrderedDict([('time_us', np.zeros(2 * self.capacity,
+                                                          dtype='uint32')),
+                                     ('duration_us',
+                                      np.zeros(2 * self.capacity,
+                                               dtype='uint32')),
+                                     ('host_time', np.full(2 * self.capacity,
+                                                           np.nan))])
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def __call__(self, message):
+        self.append(message)
+
+    def append(self, message):
+        '''
+        Record ``channels-scanned`` message.
+
+        Raises
+        ------
+        IndexError
+            If a scanned channel is outside of :attr:`channel_count`.
+        '''
+        channels = np.asarray(message['channels'], dtype=int)
+        row = np.full(self.channel_count, np.nan)
+        row[channels] = message['capacitances']
+        with self._lock:
+            i = self.total % self.capacity
+            for j in (i, i + self.capacity):
+                self._capacitances[j] = row
+                self._columns['time_us'][j] = message['time_us']
+                self._columns['duration_us'][j] = \
+                    message.get('duration_us', 0)
+                self._columns['host_time'][j] = \
+                    message.get('host_time', np.nan)
+            self.total += 1
+
+    def clear(self):
+        '''
+        Discard all scans.
+        '''
+        with self._lock:
+            self.total = 0
+
+    def _slice(self, n):
+        size = len(self)
+        n = size if n is None else min(n, size)
+        # Most recent scan is mirrored at the row before `stop`.
+        stop = self.total % self.capacity + self.capacity
+        return slice(stop - n, stop)
+
+    def arrays(self, n=None):
+        '''
+        Parameters
+        ----------
+        n : int, optional
+            Number of most recent scans (default: all scans kept).
+
+        Returns
+        -------
+        collections.OrderedDict
+            View of ``time_us``, ``duration_us`` and ``host_time`` arrays
+            (one entry per scan) and of the ``capacitances`` array (one row
+            per scan, one column per channel), oldest scan first.
+        '''
+        with self._lock:
+            rows = self._slice(n)
+            arrays = OrderedDict((name, column[rows])
+                                 for name, column in self._columns.items())
+            arrays['capacitances'] = self._capacitances[rows]
+        return arrays
+
+    def latest(self):
+        '''
+        Returns
+        -------
+        numpy.ndarray
+            View of most recent scan capacitances, indexed by channel.
+
+        Raises
+        ------
+        IndexError
+            If no scans have been appended.
+        '''
+        if not self.total:
+            raise IndexError('No scans recorded.')
+        return self.arrays(1)['capacitances'][0]
+
+    def to_frame(self, n=None):
+        '''
+        Parameters
+        ----------
+        n : int, optional
+            Number of most recent scans (default: all scans kept).
+
+        Returns
+        -------
+        pandas.DataFrame
+            Capacitances, one row per scan (indexed by ``time_us``) and one
+            column per channel.  Where supported by :mod:`pandas`, the frame
+            is a view of the buffer.
+        '''
+        arrays = self.arrays(n)
+        return pd.DataFrame(arrays['capacitances'],
+                            index=pd.Index(arrays['time_us'], name='time_us'),
+                            columns=pd.RangeIndex(self.channel_count,
+                                                  name='channel'),
+                            copy=False)
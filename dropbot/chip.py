@@ -1,7 +1,7 @@
 # coding: utf-8
 from __future__ import absolute_import, unicode_literals, print_function
 from collections import OrderedDict
-import itertools as it
+import timeit
 import warnings
 
 import matplotlib as mpl
@@ -13,16 +13,68 @@ import pandas as pd
 import pint
 import svg_model
 
+from .neighbours import (DIRECTIONS, NO_NEIGHBOUR, neighbours_to_series,
+                         resize_neighbours)
 
-__all__ = ['chip_info', 'draw', 'draw_w_segments', 'get_all_intersections',
-           'get_channel_neighbours', 'get_intersections', 'get_segments']
+
+__all__ = ['benchmark_intersections', 'chip_info', 'draw', 'draw_w_segments',
+           'get_all_intersections', 'get_channel_neighbours',
+           'get_intersections', 'get_neighbours_array', 'get_segments',
+           'synthetic_grid_shapes']
 
 ureg = pint.UnitRegistry()
 
 DEFAULT_DISTANCE_THRESHOLD = 0.1 * ureg.mm
 
 
-def get_segments(svg_source, distance_threshold=DEFAULT_DISTANCE_THRESHOLD):
+def _get_shapes_frame(svg_source):
+    if not isinstance(svg_source, pd.DataFrame):
+        return svg_model.svg_shapes_to_df(svg_source)
+    return svg_source
+
+
+def _distance_threshold_px(distance_threshold):
+    # Calculate distance in pixels assuming 96 pixels per inch (PPI).
+    return float((distance_threshold * 96 * ureg.pixels_per_inch)
+                 .to('pixels').magnitude)
+
+
+def _compute_tables(df_shapes, names, distance_threshold=None):
+    '''
+    Compute chip tables cached by :class:`dropbot.chip_cache.ChipCache`.
+
+    Returns
+    -------
+    dict
+        Requested tables (``pandas.DataFrame``), keyed by name.
+
+
+    .. versionadded:: 1.74.0
+    '''
+    tables = {}
+    for name in names:
+        if name == 'shapes':
+            tables[name] = df_shapes
+        elif name == 'electrode_shapes':
+            tables[name] = svg_model.data_frame.get_shape_infos(df_shapes,
+                                                                'id')
+        elif name == 'channels':
+            tables[name] = (df_shapes.drop_duplicates(['id', 'data-channels'])
+                            .set_index('id')['data-channels'].map(int)
+                            .rename('channel').to_frame())
+        elif name == 'segments':
+            tables[name] = get_segments(df_shapes, distance_threshold)
+        elif name == 'neighbours':
+            neighbours = _get_neighbours_array(df_shapes, distance_threshold)
+            tables[name] = pd.DataFrame(neighbours, columns=list(DIRECTIONS))
+            tables[name].index.name = 'channel'
+        else:
+            raise KeyError('Unknown table: `%s`' % name)
+    return tables
+
+
+def get_segments(svg_source, distance_threshold=DEFAULT_DISTANCE_THRESHOLD,
+                 cache=None):
     '''
     Parameters
     ----------
@@ -33,28 +85,37 @@ def get_segments(svg_source, distance_threshold=DEFAULT_DISTANCE_THRESHOLD):
         returned by :func:`svg_model.svg_shapes_to_df`.
     distance_threshold : pint.quantity.Quantity
         Maximum gap between electrodes to still be considered neighbours.
-    '''
-    if not isinstance(svg_source, pd.DataFrame):
-        df_shapes = svg_model.svg_shapes_to_df(svg_source)
-    else:
-        df_shapes = svg_source
+    cache : dropbot.chip_cache.ChipCache, optional
+        Read (or store) segments from (to) on-disk chip cache.
 
-    # Calculate distance in pixels assuming 96 pixels per inch (PPI).
-    distance_threshold_px = (distance_threshold * 96 *
-                             ureg.pixels_per_inch).to('pixels')
-
-    df_segments = (df_shapes.groupby('id').apply(lambda x: x.iloc[:-1])
-                   .reset_index(drop=True)
-                   .join(df_shapes.groupby('id').apply(lambda x: x.iloc[1:])
-                         .reset_index(drop=True),
-                         rsuffix='2'))[['id', 'vertex_i', 'vertex_i2',
-                                        'x', 'y', 'x2', 'y2']]
+        .. versionadded:: 1.74.0
+    '''
+    if cache is not None:
+        return cache.get_segments(svg_source, distance_threshold)
+    df_shapes = _get_shapes_frame(svg_source)
+
+    distance_threshold_px = _distance_threshold_px(distance_threshold)
+
+    # Each pair of consecutive vertices of an electrode is a segment.
+    #
+    # XXX Electrodes are ordered by `id` (stable sort preserves vertex order
+    # within each electrode).
+    df_vertices = df_shapes.sort_values('id', kind='mergesort')
+    ids = df_vertices['id'].values
+    start = np.flatnonzero(ids[:-1] == ids[1:])
+    df_start = (df_vertices[['id', 'vertex_i', 'x', 'y']].iloc[start]
+                .reset_index(drop=True))
+    df_end = (df_vertices[['vertex_i', 'x', 'y']].iloc[start + 1]
+              .reset_index(drop=True))
+    df_segments = df_start.join(df_end, rsuffix='2')[['id', 'vertex_i',
+                                                      'vertex_i2', 'x', 'y',
+                                                      'x2', 'y2']]
     v = (df_segments[['x2', 'y2']].values - df_segments[['x', 'y']]).values
     mid = .5 * v + df_segments[['x', 'y']].values
     x_mid = mid[:, 0]
     y_mid = mid[:, 1]
     length = np.sqrt((v ** 2).sum(axis=1))
-    v_scaled = distance_threshold_px.magnitude * v / length[:, None]
+    v_scaled = distance_threshold_px * v / length[:, None]
     x_normal = -v_scaled[:, 1]
     y_normal = v_scaled[:, 0]
 
@@ -74,7 +135,7 @@ def get_intersections(df_segments, p, r):
     s = df_segments[['x2', 'y2']].values - q
 
     r_x_s = np.cross(r, s)
-    r_x_s[r_x_s == 0] = np.NaN
+    r_x_s[r_x_s == 0] = np.nan
     t = np.cross((q - p), s) / r_x_s
     u = np.cross((q - p), r) / r_x_s
 
@@ -91,6 +152,141 @@ def get_intersections(df_segments, p, r):
                                   index=df_i.index)).drop(['t', 'u'], axis=1)
 
 
+def _expand_grid_cells(lower, counts, width):
+    '''
+    Returns
+    -------
+    item, cell : numpy.ndarray
+        Index of each item (e.g., segment) and each grid cell covered by the
+        item (one entry per item/cell pair).
+    '''
+    n = counts[:, 0] * counts[:, 1]
+    item = np.repeat(np.arange(n.shape[0]), n)
+    k = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+    counts_x = counts[item, 0]
+    cell = ((lower[item, 0] + k % counts_x) +
+            (lower[item, 1] + k // counts_x) * width)
+    return item, cell
+
+
+def _candidate_pairs(ray_bounds, segment_bounds, cell_size):
+    '''
+    Find pairs of rays and segments with overlapping bounding boxes using a
+    uniform grid index.
+
+    Parameters
+    ----------
+    ray_bounds, segment_bounds : numpy.ndarray
+        Bounding box of each ray/segment as ``(x_min, y_min, x_max, y_max)``
+        rows.
+    cell_size : float
+        Grid cell width and height.
+
+    Returns
+    -------
+    rays, segments : numpy.ndarray
+        Ray and segment index of each pair, sorted by ray, then segment.
+
+
+    .. versionadded:: 1.74.0
+    '''
+    origin = np.minimum(ray_bounds[:, :2].min(axis=0),
+                        segment_bounds[:, :2].min(axis=0))
+
+    def _cells(bounds):
+        lower = np.floor((bounds[:, :2] - origin) / cell_size).astype('int64')
+        upper = np.floor((bounds[:, 2:] - origin) / cell_size).astype('int64')
+        return lower, upper - lower + 1
+
+    ray_lower, ray_counts = _cells(ray_bounds)
+    segment_lower, segment_counts = _cells(segment_bounds)
+    width = max((ray_lower + ray_counts)[:, 0].max(),
+                (segment_lower + segment_counts)[:, 0].max())
+
+    ray_item, ray_cell = _expand_grid_cells(ray_lower, ray_counts, width)
+    segment_item, segment_cell = _expand_grid_cells(segment_lower,
+                                                    segment_counts, width)
+    order = np.argsort(segment_cell, kind='mergesort')
+    segment_item = segment_item[order]
+    segment_cell = segment_cell[order]
+
+    # Pair each ray cell with each segment in the same cell.
+    start = np.searchsorted(segment_cell, ray_cell, side='left')
+    counts = np.searchsorted(segment_cell, ray_cell, side='right') - start
+    rays = np.repeat(ray_item, counts)
+    k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    segments = segment_item[np.repeat(start, counts) + k]
+
+    # A ray and segment may share more than one cell.
+    segment_count = segment_bounds.shape[0]
+    pairs = np.unique(rays * segment_count + segments)
+    return pairs // segment_count, pairs % segment_count
+
+
+def _segment_intersections(df_segments):
+    '''
+    Find segments of other electrodes intersected by the ray cast normal to
+    each segment (see :func:`get_segments`).
+
+    Parameters
+    ----------
+    df_segments : pandas.DataFrame
+        Electrode segments, as returned by :func:`get_segments`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        See :func:`get_all_intersections`.
+
+
+    .. versionadded:: 1.74.0
+    '''
+    q = df_segments[['x', 'y']].values
+    s = df_segments[['x2', 'y2']].values - q
+    p = df_segments[['x_mid', 'y_mid']].values
+    r = df_segments[['x_normal', 'y_normal']].values
+
+    ray_bounds = np.column_stack([np.minimum(p, p + r), np.maximum(p, p + r)])
+    segment_bounds = np.column_stack([np.minimum(q, q + s),
+                                      np.maximum(q, q + s)])
+    cell_size = max(np.median(df_segments['length'].values),
+                    np.abs(r).max())
+    rays, segments = _candidate_pairs(ray_bounds, segment_bounds, cell_size)
+
+    # Do not include self electrode in consideration for neighbours.
+    ids = df_segments.index.get_level_values('id').values
+    other = ids[rays] != ids[segments]
+    rays = rays[other]
+    segments = segments[other]
+
+    # See: https://stackoverflow.com/a/565282/345236
+    r_i = r[rays]
+    s_i = s[segments]
+    qp = q[segments] - p[rays]
+    r_x_s = r_i[:, 0] * s_i[:, 1] - r_i[:, 1] * s_i[:, 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (qp[:, 0] * s_i[:, 1] - qp[:, 1] * s_i[:, 0]) / r_x_s
+        u = (qp[:, 0] * r_i[:, 1] - qp[:, 1] * r_i[:, 0]) / r_x_s
+        intersects = ((r_x_s != 0) & (t >= 0) & (t <= 1) & (u >= 0) &
+                      (u <= 1))
+    rays = rays[intersects]
+    segments = segments[intersects]
+    intersect_points = p[rays] + t[intersects][:, None] * r_i[intersects]
+
+    ray_index = df_segments.index[rays]
+    segment_index = df_segments.index[segments]
+    index = pd.MultiIndex.from_arrays([ray_index.get_level_values(0),
+                                       ray_index.get_level_values(1),
+                                       segment_index.get_level_values(0),
+                                       segment_index.get_level_values(1)],
+                                      names=['id', 'vertex_i', 'id_neighbour',
+                                             'vertex_i_neighbour'])
+    df_result = df_segments.iloc[segments].set_index(index)
+    df_result['x_intersect'] = intersect_points[:, 0]
+    df_result['y_intersect'] = intersect_points[:, 1]
+    return df_result
+
+
 def get_all_intersections(df_shapes,
                           distance_threshold=DEFAULT_DISTANCE_THRESHOLD):
     '''
@@ -103,7 +299,21 @@ def get_all_intersections(df_shapes,
         returned by :func:`svg_model.svg_shapes_to_df`.
     distance_threshold : pint.quantity.Quantity
         Maximum gap between electrodes to still be considered neighbours.
+
+
+    .. versionchanged:: 1.74.0
+        Only test rays against segments in the same cells of a uniform grid
+        index, using batched NumPy ray/segment intersection (rather than
+        testing each ray against every segment).
     '''
+    df_segments = get_segments(df_shapes,
+                               distance_threshold=distance_threshold)
+    return _segment_intersections(df_segments)
+
+
+def _get_all_intersections_loop(df_shapes,
+                                distance_threshold=DEFAULT_DISTANCE_THRESHOLD):
+    # Reference implementation (used prior to version 1.74.0).
     df_segments = get_segments(df_shapes,
                                distance_threshold=distance_threshold)
 
@@ -126,6 +336,102 @@ def get_all_intersections(df_shapes,
     return df_result
 
 
+def synthetic_grid_shapes(electrode_count=100, pitch=10., gap=.2,
+                          jitter=0., seed=None):
+    '''
+    Generate electrode shapes for a grid of square electrodes.
+
+    Parameters
+    ----------
+    electrode_count : int, optional
+        Number of electrodes.  Electrodes are laid out in rows of
+        ``ceil(sqrt(electrode_count))`` electrodes.
+    pitch : float, optional
+        Distance between electrode centers (in pixels).
+    gap : float, optional
+        Gap between adjacent electrodes (in pixels).
+    jitter : float, optional
+        Maximum random offset added to each vertex coordinate (in pixels).
+    seed : int, optional
+        Random number generator seed.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Electrode vertices in the format returned by
+        :func:`svg_model.svg_shapes_to_df` (i.e., ``id``, ``vertex_i``,
+        ``x``, ``y`` and ``data-channels`` columns), where electrode ``i`` is
+        connected to channel ``i``.
+
+
+    .. versionadded:: 1.74.0
+    '''
+    random = np.random.RandomState(seed)
+    columns = int(np.ceil(np.sqrt(electrode_count)))
+    i = np.arange(electrode_count)
+    # Closed square outline (first vertex is repeated), ordered such that
+    # segment normals (see :func:`get_segments`) point outwards.
+    corners = (pitch - gap) * np.array([[0, 0], [0, 1], [1, 1], [1, 0],
+                                        [0, 0]])
+    origins = pitch * np.column_stack([i % columns, i // columns])
+    xy = (origins[:, None, :] + corners[None, :, :]).reshape(-1, 2)
+    xy += random.uniform(-jitter, jitter, size=xy.shape)
+    electrodes = np.repeat(i, corners.shape[0])
+    return pd.DataFrame(OrderedDict([('id', ['electrode%03d' % e
+                                             for e in electrodes]),
+                                     ('vertex_i',
+                                      np.tile(np.arange(corners.shape[0]),
+                                              electrode_count)),
+                                     ('x', xy[:, 0]), ('y', xy[:, 1]),
+                                     ('data-channels',
+                                      electrodes.astype(str))]))
+
+
+def benchmark_intersections(electrode_counts=(100, 500, 1000, 5000),
+                            number=1, max_reference_count=1000):
+    '''
+    Compare the time to find all electrode segment intersections using
+    :func:`get_all_intersections` and the (previous) segment-by-segment loop
+    on synthetic electrode grids (see :func:`synthetic_grid_shapes`).
+
+    Parameters
+    ----------
+    electrode_counts : list[int], optional
+        Number of electrodes in each synthetic grid.
+    number : int, optional
+        Number of times to find intersections in each grid.
+    max_reference_count : int, optional
+        Maximum number of electrodes to time the segment-by-segment loop
+        for, since it scales quadratically.  Larger grids are reported as
+        ``NaN``.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Seconds per call for each implementation (columns), indexed by
+        number of electrodes.
+
+
+    .. versionadded:: 1.74.0
+    '''
+    def _time(function, df_shapes):
+        return timeit.timeit(lambda: function(df_shapes),
+                             number=number) / number
+
+    results = OrderedDict()
+    for electrode_count in electrode_counts:
+        df_shapes = synthetic_grid_shapes(electrode_count, jitter=.05,
+                                          seed=0)
+        loop = (_time(_get_all_intersections_loop, df_shapes)
+                if electrode_count <= max_reference_count else np.nan)
+        results[electrode_count] = [loop, _time(get_all_intersections,
+                                                df_shapes)]
+    df_results = pd.DataFrame(list(results.values()), index=list(results),
+                              columns=['loop', 'grid'])
+    df_results.index.name = 'electrodes'
+    return df_results
+
+
 def draw(svg_source, ax=None, labels=True):
     '''
     Draw the specified device, along with rays casted normal to the electrode
@@ -246,10 +552,9 @@ def draw_w_segments(svg_source, ax=None,
     df_shapes = result['df_shapes']
     ax = result['axis']
 
-    df_intersections = \
-        get_all_intersections(df_shapes, distance_threshold=distance_threshold)
     df_segments = get_segments(df_shapes,
                                distance_threshold=distance_threshold)
+    df_intersections = _segment_intersections(df_segments)
 
     for idx_i, segment_i in (df_intersections.reset_index([2, 3])
                              .join(df_segments, lsuffix='_neighbour')
@@ -263,32 +568,10 @@ def draw_w_segments(svg_source, ax=None,
     return result
 
 
-def get_channel_neighbours(svg_source,
-                           distance_threshold=DEFAULT_DISTANCE_THRESHOLD):
-    '''
-    Parameters
-    ----------
-    svg_source : str or file-like or pandas.DataFrame
-        File path, URI, or file-like object for SVG device file.
-
-        If specified as ``pandas.DataFrame``, assume argument is in format
-        returned by :func:`svg_model.svg_shapes_to_df`.
-    distance_threshold : pint.quantity.Quantity
-        Maximum gap between electrodes to still be considered neighbours.
-
-    Returns
-    -------
-    pandas.Series
-
-    '''
-    if not isinstance(svg_source, pd.DataFrame):
-        df_shapes = svg_model.svg_shapes_to_df(svg_source)
-    else:
-        df_shapes = svg_source
+def _get_neighbours_array(df_shapes, distance_threshold):
     df_segments = get_segments(df_shapes,
                                distance_threshold=distance_threshold)
-    df_intersections = \
-        get_all_intersections(df_shapes, distance_threshold=distance_threshold)
+    df_intersections = _segment_intersections(df_segments)
 
     df_neighbours = (df_intersections.reset_index([2, 3])
                      .join(df_segments, lsuffix='_neighbour'))
@@ -317,23 +600,104 @@ def get_channel_neighbours(svg_source,
 
     electrode_channels = (df_shapes.drop_duplicates(['id', 'data-channels'])
                           .set_index('id')['data-channels'].map(int))
-    electrode_channels.name = 'channel'
-    df_neighbours.insert(0, 'channel',
-                         electrode_channels.loc[df_neighbours['id']].values)
-    df_neighbours.insert(0, 'channel_neighbour',
-                         electrode_channels.loc[df_neighbours['id_neighbour']]
-                         .values)
-    df_neighbours.set_index(['channel', 'direction'], inplace=True)
-    df_neighbours.sort_index(inplace=True)
-
-    directions = ['up', 'down', 'left', 'right']
-    channel_neighbours = (df_neighbours['channel_neighbour']
-                          .loc[[i for c in range(120)
-                                for i in zip(it.cycle([c]), directions)]])
-    return channel_neighbours
-
-
-def chip_info(svg_source):
+    channels = electrode_channels.loc[df_neighbours['id']].values
+    channel_neighbours = (electrode_channels
+                          .loc[df_neighbours['id_neighbour']].values)
+    directions = pd.Categorical(df_neighbours['direction'],
+                                categories=DIRECTIONS).codes
+    valid = directions >= 0
+
+    neighbours = np.full((electrode_channels.max() + 1, len(DIRECTIONS)),
+                         NO_NEIGHBOUR, dtype=int)
+    neighbours[channels[valid], directions[valid]] = channel_neighbours[valid]
+    return neighbours
+
+
+def get_neighbours_array(svg_source,
+                         distance_threshold=DEFAULT_DISTANCE_THRESHOLD,
+                         channel_count=None, cache=None):
+    '''
+    Parameters
+    ----------
+    svg_source : str or file-like or pandas.DataFrame
+        File path, URI, or file-like object for SVG device file.
+
+        If specified as ``pandas.DataFrame``, assume argument is in format
+        returned by :func:`svg_model.svg_shapes_to_df`.
+    distance_threshold : pint.quantity.Quantity
+        Maximum gap between electrodes to still be considered neighbours.
+    channel_count : int, optional
+        Number of channels, e.g., ``proxy.number_of_channels`` (default:
+        highest channel connected to an electrode plus one).
+    cache : dropbot.chip_cache.ChipCache, optional
+        Read (or store) neighbours from (to) on-disk chip cache.
+
+    Returns
+    -------
+    numpy.ndarray
+        Neighbour table of shape ``(channel_count, 4)``, containing the
+        ``up``, ``down``, ``left`` and ``right`` neighbour of each channel,
+        or :data:`dropbot.neighbours.NO_NEIGHBOUR` where no neighbour exists.
+
+        See :func:`dropbot.neighbours.pack_neighbours` to convert to the
+        format expected by the ``assign_neighbours`` DropBot command.
+
+
+    .. versionadded:: 1.74.0
+    '''
+    if cache is not None:
+        neighbours = cache.get_neighbours_array(svg_source,
+                                                distance_threshold)
+    else:
+        neighbours = _get_neighbours_array(_get_shapes_frame(svg_source),
+                                           distance_threshold)
+    if channel_count is not None:
+        neighbours = resize_neighbours(neighbours, channel_count)
+    return neighbours
+
+
+def get_channel_neighbours(svg_source,
+                           distance_threshold=DEFAULT_DISTANCE_THRESHOLD,
+                           cache=None, channel_count=None):
+    '''
+    Parameters
+    ----------
+    svg_source : str or file-like or pandas.DataFrame
+        File path, URI, or file-like object for SVG device file.
+
+        If specified as ``pandas.DataFrame``, assume argument is in format
+        returned by :func:`svg_model.svg_shapes_to_df`.
+    distance_threshold : pint.quantity.Quantity
+        Maximum gap between electrodes to still be considered neighbours.
+    cache : dropbot.chip_cache.ChipCache, optional
+        Read (or store) neighbours from (to) on-disk chip cache.
+
+        .. versionadded:: 1.74.0
+    channel_count : int, optional
+        Number of channels, e.g., ``proxy.number_of_channels`` (default:
+        highest channel connected to an electrode plus one).
+
+        .. versionadded:: 1.74.0
+
+    Returns
+    -------
+    pandas.Series
+        Neighbour of each channel, indexed by ``channel`` and ``direction``
+        (``NaN`` where no neighbour exists).
+
+
+    .. versionchanged:: 1.74.0
+        Include all channels of the chip (see :data:`channel_count`), rather
+        than the first 120 channels.  See :func:`get_neighbours_array` for a
+        dense array version of the neighbour table.
+    '''
+    neighbours = get_neighbours_array(svg_source, distance_threshold,
+                                      channel_count=channel_count,
+                                      cache=cache)
+    return neighbours_to_series(neighbours)
+
+
+def chip_info(svg_source, cache=None):
     '''
     Parameters
     ----------
@@ -342,6 +706,10 @@ def chip_info(svg_source):
 
         If specified as ``pandas.DataFrame``, assume argument is in format
         returned by :func:`svg_model.svg_shapes_to_df`.
+    cache : dropbot.chip_cache.ChipCache, optional
+        Read (or store) chip info from (to) on-disk chip cache.
+
+        .. versionadded:: 1.74.0
 
     Returns
     -------
@@ -358,10 +726,9 @@ def chip_info(svg_source):
 
     .. versionadded:: 1.65
     '''
-    if not isinstance(svg_source, pd.DataFrame):
-        df_shapes = svg_model.svg_shapes_to_df(svg_source)
-    else:
-        df_shapes = svg_source
+    if cache is not None:
+        return cache.chip_info(svg_source)
+    df_shapes = _get_shapes_frame(svg_source)
 
     electrode_shapes = svg_model.data_frame.get_shape_infos(df_shapes, 'id')
     electrode_channels = (df_shapes.drop_duplicates(['id', 'data-channels'])
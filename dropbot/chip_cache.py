@@ -0,0 +1,312 @@
+'''
+Persistent on-disk cache of chip geometry parsed from SVG device files.
+
+Each SVG file is parsed at most once.  Derived tables (electrode shapes,
+channel maps, segments and channel neighbours) are stored in a cache entry
+directory named after the SHA-1 hash of the SVG file contents, one ``.npy``
+file per table.  Subsequent loads of the same chip are memory-mapped reads of
+these files.
+
+Segment and neighbour tables depend on the ``distance_threshold`` parameter;
+they are recomputed (and replaced) whenever a different threshold is
+requested.
+
+The least recently used entries are evicted once the cache holds more than
+:attr:`ChipCache.max_entries` chips.
+
+.. versionadded:: 1.74.0
+
+Example
+-------
+
+    >>> cache = ChipCache()
+    >>> info = cache.chip_info(svg_path)
+    >>> neighbours = cache.get_channel_neighbours(svg_path)
+
+Alternatively, pass the cache to the :mod:`dropbot.chip` functions:
+
+    >>> info = chip_info(svg_path, cache=cache)
+'''
+from __future__ import absolute_import, division, print_function
+from collections import OrderedDict
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+import six
+
+from .neighbours import DIRECTIONS, neighbours_to_series
+
+__all__ = ['DEFAULT_CACHE_DIR', 'ChipCache']
+
+#: Default cache directory (may be set using ``DROPBOT_CHIP_CACHE_DIR``
+#: environment variable).
+DEFAULT_CACHE_DIR = os.environ.get('DROPBOT_CHIP_CACHE_DIR',
+                                   os.path.join(os.path.expanduser('~'),
+                                                '.cache', 'dropbot', 'chips'))
+
+#: Tables that depend on the distance threshold.
+THRESHOLD_TABLES = ('segments', 'neighbours')
+
+# XXX `os.rename` does not replace existing files on Windows (Python 2 does
+# not provide `os.replace`).
+_replace = getattr(os, 'replace', os.rename)
+
+
+def _frame_to_array(df):
+    '''
+    Returns
+    -------
+    numpy.ndarray
+        Structured array with one field per column (including index levels).
+        Text columns are stored as fixed-width unicode fields (missing values
+        are stored as empty strings).
+    '''
+    if any(name is not None for name in df.index.names):
+        df = df.reset_index()
+    fields = []
+    for name, column in df.items():
+        if pd.api.types.is_string_dtype(column):
+            values = np.array(column.fillna('').map(six.text_type).tolist(),
+                              dtype=six.text_type)
+        else:
+            values = column.values
+        fields.append((str(name), values))
+    array = np.empty(df.shape[0], dtype=[(name, values.dtype)
+                                         for name, values in fields])
+    for name, values in fields:
+        array[name] = values
+    return array
+
+
+def _array_to_frame(array, index):
+    df = pd.DataFrame(OrderedDict((name, array[name])
+                                  for name in array.dtype.names))
+    return df.set_index(index) if index else df
+
+
+class ChipCache(object):
+    '''
+    On-disk cache of chip geometry, keyed by SVG file content hash.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        Cache directory (default: :data:`DEFAULT_CACHE_DIR`).
+    max_entries : int, optional
+        Maximum number of chips to keep in the cache.
+
+    Notes
+    -----
+    Only SVG sources given as a local file path or file-like object may be
+    cached.  Other sources (e.g., a ``pandas.DataFrame``) are processed
+    directly, without caching.
+    '''
+    def __init__(self, cache_dir=None, max_entries=16):
+        self.cache_dir = DEFAULT_CACHE_DIR if cache_dir is None else cache_dir
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+
+    def _read_source(self, svg_source):
+        '''
+        Returns
+        -------
+        str, bytes
+            Content hash and contents of SVG source, or ``None, None`` if the
+            source cannot be cached.
+        '''
+        if isinstance(svg_source, six.string_types) and \
+                os.path.isfile(svg_source):
+            with open(svg_source, 'rb') as input_:
+                data = input_.read()
+        elif hasattr(svg_source, 'read') and hasattr(svg_source, 'seek'):
+            data = svg_source.read()
+            svg_source.seek(0)
+            if isinstance(data, six.text_type):
+                data = data.encode('utf8')
+        else:
+            return None, None
+        return hashlib.sha1(data).hexdigest(), data
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _read_meta(self, key):
+        try:
+            with open(os.path.join(self._entry_dir(key), 'meta.json')) as \
+                    input_:
+                return json.load(input_)
+        except (IOError, OSError, ValueError):
+            return {'tables': {}, 'distance_threshold_px': None}
+
+    def _write_meta(self, key, meta):
+        self._write_file(key, 'meta.json', json.dumps(meta).encode('utf8'))
+
+    def _write_file(self, key, name, data):
+        # Write to temporary file and rename to replace existing file
+        # atomically.
+        entry_dir = self._entry_dir(key)
+        fd, temp_path = tempfile.mkstemp(dir=entry_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as output:
+                output.write(data)
+            _replace(temp_path, os.path.join(entry_dir, name))
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _load_table(self, key, name, meta):
+        if name not in meta['tables']:
+            return None
+        try:
+            array = np.load(os.path.join(self._entry_dir(key), name + '.npy'),
+                            mmap_mode='r')
+        except (IOError, OSError, ValueError):
+            return None
+        return _array_to_frame(array, meta['tables'][name])
+
+    def _save_table(self, key, name, df, meta):
+        output = io.BytesIO()
+        np.save(output, _frame_to_array(df))
+        self._write_file(key, name + '.npy', output.getvalue())
+        meta['tables'][name] = [level for level in df.index.names
+                                if level is not None]
+
+    def _touch(self, key):
+        entry_dir = self._entry_dir(key)
+        if not os.path.isdir(entry_dir):
+            os.makedirs(entry_dir)
+            self._evict(keep=key)
+        else:
+            os.utime(entry_dir, None)
+
+    def _evict(self, keep=None):
+        '''
+        Remove least recently used entries in excess of
+        :attr:`max_entries`.
+        '''
+        entries = [os.path.join(self.cache_dir, name)
+                   for name in os.listdir(self.cache_dir)
+                   if name != keep and
+                   os.path.isdir(os.path.join(self.cache_dir, name))]
+        entries.sort(key=os.path.getmtime)
+        excess = len(entries) + 1 - self.max_entries
+        for entry_dir in entries[:max(excess, 0)]:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+
+    def clear(self):
+        '''
+        Remove all cache entries.
+        '''
+        with self._lock:
+            if os.path.isdir(self.cache_dir):
+                for name in os.listdir(self.cache_dir):
+                    shutil.rmtree(os.path.join(self.cache_dir, name),
+                                  ignore_errors=True)
+
+    def _tables(self, svg_source, names, distance_threshold=None):
+        '''
+        Returns
+        -------
+        dict
+            Requested tables (``pandas.DataFrame``), keyed by name.
+        '''
+        from . import chip
+
+        key, data = self._read_source(svg_source)
+        if key is None:
+            df_shapes = chip._get_shapes_frame(svg_source)
+            return chip._compute_tables(df_shapes, names, distance_threshold)
+
+        with self._lock:
+            self._touch(key)
+            meta = self._read_meta(key)
+            if distance_threshold is not None:
+                threshold_px = chip._distance_threshold_px(distance_threshold)
+                if meta['distance_threshold_px'] != threshold_px:
+                    # Distance threshold changed; invalidate dependent tables.
+                    for name in THRESHOLD_TABLES:
+                        meta['tables'].pop(name, None)
+                    meta['distance_threshold_px'] = threshold_px
+
+            tables = dict((name, self._load_table(key, name, meta))
+                          for name in names)
+            missing = [name for name, df in tables.items() if df is None]
+            if missing:
+                df_shapes = tables.get('shapes')
+                if df_shapes is None:
+                    df_shapes = self._load_table(key, 'shapes', meta)
+                if df_shapes is None:
+                    df_shapes = chip._get_shapes_frame(io.BytesIO(data))
+                    self._save_table(key, 'shapes', df_shapes, meta)
+                computed = chip._compute_tables(df_shapes, missing,
+                                                distance_threshold)
+                for name, df in computed.items():
+                    self._save_table(key, name, df, meta)
+                    # Return memory-mapped table for consistency with cached
+                    # loads.
+                    tables[name] = self._load_table(key, name, meta)
+                self._write_meta(key, meta)
+            elif distance_threshold is not None:
+                self._write_meta(key, meta)
+            return tables
+
+    def shapes(self, svg_source):
+        '''
+        Returns
+        -------
+        pandas.DataFrame
+            Electrode vertices, as returned by
+            :func:`svg_model.svg_shapes_to_df`.
+        '''
+        return self._tables(svg_source, ['shapes'])['shapes']
+
+    def chip_info(self, svg_source):
+        '''
+        See :func:`dropbot.chip.chip_info`.
+        '''
+        tables = self._tables(svg_source, ['electrode_shapes', 'channels'])
+        channels = tables['channels']
+        electrode_channels = channels['channel']
+        channel_electrodes = pd.Series(electrode_channels.index,
+                                       index=electrode_channels.values)
+        return {'electrode_shapes': tables['electrode_shapes'],
+                'electrode_channels': electrode_channels,
+                'channel_electrodes': channel_electrodes}
+
+    def get_segments(self, svg_source, distance_threshold=None):
+        '''
+        See :func:`dropbot.chip.get_segments`.
+        '''
+        from .chip import DEFAULT_DISTANCE_THRESHOLD
+
+        if distance_threshold is None:
+            distance_threshold = DEFAULT_DISTANCE_THRESHOLD
+        return self._tables(svg_source, ['segments'],
+                            distance_threshold)['segments']
+
+    def get_neighbours_array(self, svg_source, distance_threshold=None):
+        '''
+        See :func:`dropbot.chip.get_neighbours_array`.
+        '''
+        from .chip import DEFAULT_DISTANCE_THRESHOLD
+
+        if distance_threshold is None:
+            distance_threshold = DEFAULT_DISTANCE_THRESHOLD
+        df_neighbours = self._tables(svg_source, ['neighbours'],
+                                     distance_threshold)['neighbours']
+        return df_neighbours[list(DIRECTIONS)].values
+
+    def get_channel_neighbours(self, svg_source, distance_threshold=None):
+        '''
+        See :func:`dropbot.chip.get_channel_neighbours`.
+        '''
+        return neighbours_to_series(self.get_neighbours_array(
+            svg_source, distance_threshold))
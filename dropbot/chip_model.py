@@ -0,0 +1,247 @@
+'''
+Precompiled chip lookup tables.
+
+:func:`dropbot.chip.chip_info` describes a chip using ``pandas`` tables keyed
+by electrode ID and channel number.  :class:`ChipModel` compiles these tables
+once into dense NumPy arrays indexed by channel number and electrode index,
+so per-step lookups (e.g., actuated electrode area in
+:func:`dropbot.threshold.execute_actuation`) are single vectorized gathers.
+
+.. versionadded:: 1.74.0
+
+Example
+-------
+
+    >>> chip_model = ChipModel.from_svg(svg_path)
+    >>> area = chip_model.actuated_area([1, 2, 3])
+'''
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import pandas as pd
+
+__all__ = ['ChipModel']
+
+
+class ChipModel(object):
+    '''
+    Dense lookup tables for a chip.
+
+    Each electrode is assigned an index, i.e., its position in
+    :attr:`electrode_ids`.  Unless otherwise noted, arrays are indexed by
+    electrode index or by channel number.
+
+    Parameters
+    ----------
+    electrode_ids : list-like
+        Electrode IDs (e.g., ``"electrode001"``).
+    electrode_channels : list-like
+        Channel connected to each electrode (or -1 if not connected).
+    electrode_areas : list-like
+        Area of each electrode.
+    channel_count : int, optional
+        Number of channels (default: highest connected channel plus one).
+    neighbours : numpy.ndarray, optional
+        Channel neighbour table of shape ``(channel_count, 4)`` (see
+        :mod:`dropbot.neighbours`).
+
+    Attributes
+    ----------
+    electrode_ids : pandas.Index
+        Electrode ID of each electrode index.
+    electrode_channels : numpy.ndarray
+        Channel connected to each electrode (-1 if not connected).
+    electrode_areas : numpy.ndarray
+        Area of each electrode.
+    channel_areas : numpy.ndarray
+        Total area of electrodes connected to each channel.
+    channel_electrodes : numpy.ndarray
+        Index of (first) electrode connected to each channel (-1 if no
+        electrode is connected).
+    '''
+    def __init__(self, electrode_ids, electrode_channels, electrode_areas,
+                 channel_count=None, neighbours=None):
+        self.electrode_ids = pd.Index(electrode_ids, name='id')
+        self._electrode_ids = np.asarray(self.electrode_ids, dtype=object)
+        self.electrode_channels = np.asarray(electrode_channels, dtype=int)
+        self.electrode_areas = np.asarray(electrode_areas, dtype=float)
+        if channel_count is None:
+            channel_count = (self.electrode_channels.max() + 1
+                             if self.electrode_channels.size else 0)
+        self.channel_count = int(channel_count)
+        self.neighbours = neighbours
+
+        connected = np.flatnonzero(self.electrode_channels >= 0)
+        connected_channels = self.electrode_channels[connected]
+        if (connected_channels >= self.channel_count).any():
+            raise ValueError('Electrodes connected to channels outside of %d '
+                             'channels.' % self.channel_count)
+        connected_areas = self.electrode_areas[connected]
+        self.channel_areas = np.bincount(connected_channels,
+                                         weights=connected_areas,
+                                         minlength=self.channel_count)
+
+        # Electrodes of channel `i` are
+        # `_electrodes[_offsets[i]:_offsets[i + 1]]` (i.e., CSR-style).
+        self._electrodes = connected[np.argsort(connected_channels,
+                                                kind='mergesort')]
+        counts = np.bincount(connected_channels,
+                             minlength=self.channel_count)
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.channel_electrodes = np.full(self.channel_count, -1, dtype=int)
+        self.channel_electrodes[counts > 0] = \
+            self._electrodes[self._offsets[:-1][counts > 0]]
+
+    @classmethod
+    def from_chip_info(cls, chip_info_, channel_count=None, neighbours=None):
+        '''
+        Parameters
+        ----------
+        chip_info_ : dict
+            Chip information, as returned by :func:`dropbot.chip.chip_info`.
+        channel_count : int, optional
+            Number of channels (default: highest connected channel plus one).
+        neighbours : numpy.ndarray, optional
+            Channel neighbour table (see :mod:`dropbot.neighbours`).
+
+        Returns
+        -------
+        ChipModel
+        '''
+        electrode_shapes = chip_info_['electrode_shapes']
+        electrode_channels = (chip_info_['electrode_channels']
+                              .reindex(electrode_shapes.index).fillna(-1))
+        return cls(electrode_shapes.index, electrode_channels.values,
+                   electrode_shapes['area'].values,
+                   channel_count=channel_count, neighbours=neighbours)
+
+    @classmethod
+    def from_svg(cls, svg_source, channel_count=None, cache=None, **kwargs):
+        '''
+        Parameters
+        ----------
+        svg_source : str or file-like or pandas.DataFrame
+            See :func:`dropbot.chip.chip_info`.
+        channel_count : int, optional
+            Number of channels, e.g., ``proxy.number_of_channels`` (default:
+            highest connected channel plus one).
+        cache : dropbot.chip_cache.ChipCache, optional
+            Read (or store) chip information from (to) on-disk chip cache.
+        **kwargs
+            Keyword arguments passed to
+            :func:`dropbot.chip.get_neighbours_array` (e.g.,
+            ``distance_threshold``).
+
+        Returns
+        -------
+        ChipModel
+            Chip model, including channel neighbours.
+        '''
+        from . import chip
+
+        chip_info_ = chip.chip_info(svg_source, cache=cache)
+        neighbours = chip.get_neighbours_array(svg_source,
+                                               channel_count=channel_count,
+                                               cache=cache, **kwargs)
+        return cls.from_chip_info(chip_info_,
+                                  channel_count=neighbours.shape[0],
+                                  neighbours=neighbours)
+
+    def to_channels(self, channels):
+        '''
+        Parameters
+        ----------
+        channels : list-like
+            Channel numbers or electrode IDs (e.g., ``"electrode001"``).
+
+        Returns
+        -------
+        numpy.ndarray
+            Channel numbers.
+
+        Raises
+        ------
+        KeyError
+            If an electrode ID is unknown or not connected to a channel.
+        '''
+        values = np.asarray(channels)
+        if not values.size or values.dtype.kind in 'iu':
+            return values.astype(int)
+        # Assume electrode IDs were specified.
+        indices = self.electrode_ids.get_indexer(values)
+        if (indices < 0).any():
+            raise KeyError('Unknown electrodes: %s' %
+                           ', '.join(values[indices < 0]))
+        channels = self.electrode_channels[indices]
+        if (channels < 0).any():
+            raise KeyError('Electrodes not connected to a channel: %s' %
+                           ', '.join(values[channels < 0]))
+        return channels
+
+    def electrode_indices(self, channels):
+        '''
+        Parameters
+        ----------
+        channels : list-like
+            Channel numbers.
+
+        Returns
+        -------
+        numpy.ndarray
+            Indices of all electrodes connected to the specified channels.
+        '''
+        channels = np.asarray(channels, dtype=int)
+        starts = self._offsets[channels]
+        counts = self._offsets[channels + 1] - starts
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts,
+                                                counts)
+        return self._electrodes[np.repeat(starts, counts) + k]
+
+    def electrode_ids_of(self, channels):
+        '''
+        Parameters
+        ----------
+        channels : list-like
+            Channel numbers.
+
+        Returns
+        -------
+        numpy.ndarray
+            IDs of all electrodes connected to the specified channels.
+        '''
+        return self._electrode_ids[self.electrode_indices(channels)]
+
+    def actuated_area(self, channels):
+        '''
+        Parameters
+        ----------
+        channels : list-like
+            Channel numbers.
+
+        Returns
+        -------
+        float
+            Total area of electrodes connected to the specified channels.
+        '''
+        return self.channel_areas[np.asarray(channels, dtype=int)].sum()
+
+    def target_capacitance(self, channels, specific_capacitance,
+                           volume_threshold=1.):
+        '''
+        Parameters
+        ----------
+        channels : list-like
+            Channel numbers.
+        specific_capacitance : float
+            Specific capacitance, i.e., capacitance per unit area.
+        volume_threshold : float, optional
+            Fraction of actuated area to be covered by liquid.
+
+        Returns
+        -------
+        float
+            Capacitance of liquid covering :data:`volume_threshold` of the
+            actuated electrode area.
+        '''
+        return (volume_threshold * self.actuated_area(channels) *
+                specific_capacitance)
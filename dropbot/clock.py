@@ -0,0 +1,172 @@
+'''
+Mapping of the DropBot 32-bit microsecond counter (i.e., the ``time_us``
+field of ``capacitance-updated`` and ``capacitance-exceeded`` events) to
+host time.
+
+The counter wraps around every ``2 ** 32`` microseconds (i.e., about 71.6
+minutes).  :class:`DeviceClock` unwraps counter values and fits the offset
+and drift of the device clock relative to the host clock from periodic
+``(host time, device counter)`` samples.
+
+.. versionadded:: 1.74.0
+'''
+from __future__ import absolute_import, division, print_function
+import collections
+import threading
+
+import numpy as np
+
+__all__ = ['COUNTER_PERIOD_US', 'DeviceClock', 'unwrap_time_us']
+
+#: Period of the device microsecond counter.
+COUNTER_PERIOD_US = 1 << 32
+
+
+def unwrap_time_us(time_us):
+    '''
+    Unwrap sequence of (ordered) device microsecond counter values.
+
+    Consecutive values are assumed to be less than ``2 ** 32`` microseconds
+    apart.
+
+    Parameters
+    ----------
+    time_us : array-like
+        Device microsecond counter values.
+
+    Returns
+    -------
+    numpy.ndarray
+        Microseconds relative to first value (``int64``).
+    '''
+    time_us = np.asarray(time_us, dtype='int64')
+    if not time_us.size:
+        return time_us
+    elapsed_us = np.diff(time_us) % COUNTER_PERIOD_US
+    return np.concatenate([[0], np.cumsum(elapsed_us)])
+
+
+class DeviceClock(object):
+    '''
+    Model of device microsecond counter relative to host time.
+
+    Host time is modelled as a linear function of the unwrapped device
+    counter, i.e., ``host_time = host_0 + rate * (time_us - time_us_0)``,
+    fit (by least squares) to the most recent samples added using
+    :meth:`add_sample`.  Converting a counter value is therefore only a
+    multiply-add.
+
+    Counter values must be unwrapped (see :meth:`unwrap`) in (roughly)
+    increasing order, i.e., at least once per counter period.  Values up to
+    half a period older than the most recent value are also accepted.
+
+    Parameters
+    ----------
+    max_samples : int, optional
+        Maximum number of samples used to fit the model.
+
+    Attributes
+    ----------
+    rate : float
+        Host seconds per device second, i.e., ``1 + drift``.
+    '''
+    def __init__(self, max_samples=32):
+        self._lock = threading.Lock()
+        self._samples = collections.deque(maxlen=max_samples)
+        self.reset()
+
+    def reset(self):
+        '''
+        Discard samples and counter history, e.g., after the device has
+        restarted.
+        '''
+        with self._lock:
+            self._samples.clear()
+            self._last_us = None
+            self._epoch_us = 0
+            self._host_0 = None
+            self._time_us_0 = 0
+            self.rate = 1.
+
+    @property
+    def drift(self):
+        '''
+        Device clock drift relative to host clock (e.g., ``1e-5`` if device
+        clock runs 10 ppm slow).
+        '''
+        return self.rate - 1
+
+    @property
+    def sample_count(self):
+        return len(self._samples)
+
+    def _unwrap(self, time_us):
+        time_us = int(time_us)
+        if self._last_us is None:
+            self._last_us = time_us
+        delta_us = (time_us - self._last_us) % COUNTER_PERIOD_US
+        if delta_us >= COUNTER_PERIOD_US // 2:
+            # Value precedes most recent value.
+            return self._epoch_us + self._last_us + delta_us - \
+                COUNTER_PERIOD_US
+        if time_us < self._last_us:
+            self._epoch_us += COUNTER_PERIOD_US
+        self._last_us = time_us
+        return self._epoch_us + time_us
+
+    def unwrap(self, time_us):
+        '''
+        Parameters
+        ----------
+        time_us : int
+            Device microsecond counter value.
+
+        Returns
+        -------
+        int
+            Unwrapped counter value, i.e., microseconds since the first
+            unwrapped value after :meth:`reset` (plus the first value).
+        '''
+        with self._lock:
+            return self._unwrap(time_us)
+
+    def add_sample(self, host_time, time_us):
+        '''
+        Add sample and update model fit.
+
+        Parameters
+        ----------
+        host_time : float
+            Host time in seconds (e.g., :func:`time.time`) at which
+            :data:`time_us` was read.
+        time_us : int
+            Device microsecond counter value.
+        '''
+        with self._lock:
+            self._samples.append((host_time, self._unwrap(time_us)))
+            host, device_us = np.array(self._samples).T
+            self._time_us_0 = int(device_us[-1])
+            device_s = (device_us - self._time_us_0) * 1e-6
+            if len(self._samples) > 1 and np.ptp(device_s) > 0:
+                self.rate, self._host_0 = np.polyfit(device_s, host, 1)
+            else:
+                self._host_0 = host[-1] - self.rate * device_s[-1]
+
+    def host_time(self, time_us):
+        '''
+        Parameters
+        ----------
+        time_us : int
+            Device microsecond counter value.
+
+        Returns
+        -------
+        float
+            Host time in seconds corresponding to :data:`time_us`, or
+            ``None`` if no samples have been added.
+        '''
+        with self._lock:
+            if self._host_0 is None:
+                return None
+            elapsed_s = (self._unwrap(time_us) - self._time_us_0) * 1e-6
+            return self._host_0 + self.rate * elapsed_s
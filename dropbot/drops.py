@@ -0,0 +1,257 @@
+'''
+Decoding of packed drops arrays, as returned by the ``drops``,
+``get_all_drops`` and ``get_channels_drops`` DropBot commands.
+
+Drops are packed as::
+
+    [drop 0 channel count][drop 0: channel 0, channel 1, ...][drop 1 channel count][drop 1: channel 0, channel 1, ...]
+
+:func:`decode_drops` decodes this format into a CSR-style (i.e., compressed
+sparse row) ``(offsets, channels)`` pair, where the channels of drop ``i``
+are ``channels[offsets[i]:offsets[i + 1]]`` (see also :class:`Drops`).
+:func:`unpack_drops` decodes it into a list of channel arrays.
+
+.. versionadded:: 1.74.0
+'''
+from __future__ import absolute_import, division, print_function
+from collections import OrderedDict
+import timeit
+
+import numpy as np
+import pandas as pd
+
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
+
+def decode_drops(packed_drops):
+    '''
+    Decode packed drops array into CSR-style ``(offsets, channels)`` pair.
+
+    Parameters
+    ----------
+    packed_drops : numpy.ndarray
+        Packed drops array.
+
+    Returns
+    -------
+    offsets : numpy.ndarray
+        Start offset of each drop in :data:`channels`, followed by the total
+        number of channels, i.e., ``len(offsets) == drop_count + 1``.
+    channels : numpy.ndarray
+        Channels of all drops, concatenated.
+    '''
+    packed_drops = np.asarray(packed_drops)
+    headers = _headers(packed_drops)
+    size = packed_drops.shape[0]
+    offsets = np.zeros(headers.shape[0] + 1, dtype=int)
+    np.cumsum(packed_drops[headers], out=offsets[1:])
+    if offsets[-1] + headers.shape[0] > size:
+        # Last drop is truncated.
+        offsets[-1] = size - headers.shape[0]
+
+    is_channel = np.ones(size, dtype=bool)
+    is_channel[headers] = False
+    return offsets, packed_drops[is_channel]
+
+
+def _headers(packed_drops):
+    # Each channel count gives the position of the next channel count, so
+    # locating the channel counts requires one (scalar) step per drop.
+    counts = packed_drops.tolist()
+    size = len(counts)
+    headers = []
+    i = 0
+    while i < size:
+        headers.append(i)
+        i += counts[i] + 1
+    return np.array(headers, dtype=int)
+
+
+class Drops(Sequence):
+    '''
+    Sequence of drops, where each drop is an array of channels.
+
+    Drops are stored in CSR form (see :func:`decode_drops`) and each drop
+    array is a view into :attr:`channels`, created on access.
+
+    Parameters
+    ----------
+    offsets : numpy.ndarray
+        Start offset of each drop in :data:`channels`, followed by the total
+        number of channels.
+    channels : numpy.ndarray
+        Channels of all drops, concatenated.
+    '''
+    def __init__(self, offsets, channels):
+        self.offsets = offsets
+        self.channels = channels
+        # Slicing with Python integers is much faster than with NumPy
+        # scalars.
+        self._offsets = offsets.tolist()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('Drop index out of range.')
+        return self.channels[self._offsets[i]:self._offsets[i + 1]]
+
+    def __iter__(self):
+        offsets = self._offsets
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            yield self.channels[start:end]
+
+    def __repr__(self):
+        return 'Drops(%r)' % [d.tolist() for d in self]
+
+    @property
+    def sizes(self):
+        '''
+        Number of channels covered by each drop.
+        '''
+        return np.diff(self.offsets)
+
+    def tolist(self):
+        '''
+        Returns
+        -------
+        list<list>
+            Channels of each drop.
+        '''
+        return [d.tolist() for d in self]
+
+
+#: Largest packed drops array unpacked drop by drop (see
+#: :func:`unpack_drops`).
+UNPACK_LOOP_MAX_SIZE = 256
+
+
+def unpack_drops(packed_drops):
+    '''
+    Unpack packed drops array.
+
+    Small arrays (e.g., for a 120-channel DropBot) are unpacked drop by
+    drop, which is fastest for few drops.  Larger arrays are decoded using
+    :func:`decode_drops`, and split into drops without a Python loop over
+    channels.
+
+    Returns
+    -------
+    list<numpy.ndarray>
+        Channels of each drop.
+    '''
+    packed_drops = np.asarray(packed_drops)
+    if packed_drops.shape[0] <= UNPACK_LOOP_MAX_SIZE:
+        counts = packed_drops.tolist()
+        drops = []
+        i = 0
+        while i < len(counts):
+            drops.append(packed_drops[i + 1:i + 1 + counts[i]])
+            i += counts[i] + 1
+        return drops
+    offsets, channels = decode_drops(packed_drops)
+    # Slicing with Python integers is much faster than with NumPy scalars.
+    offsets = offsets.tolist()
+    return [channels[start:end]
+            for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def _unpack_drops_loop(packed_drops):
+    # Reference implementation (used prior to version 1.74.0).
+    drops = []
+    i = 0
+    while i < packed_drops.shape[0]:
+        drop_j_size = packed_drops[i]
+        start_j = i + 1
+        end_j = start_j + drop_j_size
+        drops.append(packed_drops[start_j:end_j])
+        i = end_j
+    return drops
+
+
+def synthetic_packed_drops(channel_count=120, drop_count=10, max_size=4,
+                           seed=None):
+    '''
+    Generate packed drops array for randomly placed drops.
+
+    Parameters
+    ----------
+    channel_count : int, optional
+        Number of channels.  Channels are ``uint8`` if less than 256;
+        otherwise, ``uint16``.
+    drop_count : int, optional
+        Number of drops.
+    max_size : int, optional
+        Maximum number of channels per drop.
+    seed : int, optional
+        Random number generator seed.
+
+    Returns
+    -------
+    numpy.ndarray
+        Packed drops array.
+    '''
+    random = np.random.RandomState(seed)
+    sizes = random.randint(1, max_size + 1, size=drop_count)
+    channels = random.permutation(channel_count)[:sizes.sum()]
+    sizes = sizes[:np.searchsorted(np.cumsum(sizes), channels.shape[0],
+                                   side='right')]
+    dtype = 'uint8' if channel_count <= 256 else 'uint16'
+    packed = np.empty(sizes.sum() + sizes.shape[0], dtype=dtype)
+    headers = np.cumsum(np.append(0, sizes[:-1] + 1))
+    is_channel = np.ones(packed.shape[0], dtype=bool)
+    is_channel[headers] = False
+    packed[headers] = sizes
+    packed[is_channel] = channels[:sizes.sum()]
+    return packed
+
+
+def benchmark_unpack_drops(layouts=None, number=1000):
+    '''
+    Compare the time to unpack a packed drops array using :func:`unpack_drops`
+    and the (previous) drop-by-drop loop.
+
+    Parameters
+    ----------
+    layouts : dict, optional
+        Keyword arguments for :func:`synthetic_packed_drops`, keyed by layout
+        name.  By default, a 120-channel DropBot layout with 10 drops, and
+        larger synthetic layouts are used.
+    number : int, optional
+        Number of times to unpack each packed drops array.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Seconds per unpack for each implementation (columns), indexed by
+        layout name.
+    '''
+    if layouts is None:
+        layouts = OrderedDict([('120 channels', dict(channel_count=120,
+                                                     drop_count=10)),
+                               ('120 channels, 1 drop',
+                                dict(channel_count=120, drop_count=1)),
+                               ('1024 channels', dict(channel_count=1024,
+                                                      drop_count=100)),
+                               ('16384 channels', dict(channel_count=16384,
+                                                       drop_count=2000))])
+
+    def _time(function, packed):
+        return timeit.timeit(lambda: function(packed), number=number) / number
+
+    results = OrderedDict()
+    for name, kwargs in layouts.items():
+        packed = synthetic_packed_drops(seed=0, **kwargs)
+        results[name] = [_time(_unpack_drops_loop, packed),
+                         _time(decode_drops, packed),
+                         _time(unpack_drops, packed)]
+    return pd.DataFrame(list(results.values()), index=list(results),
+                        columns=['loop', 'csr', 'unpack_drops'])
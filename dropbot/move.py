@@ -32,6 +32,7 @@ Example
 '''
 from __future__ import (absolute_import, print_function, unicode_literals,
                         division)
+import bisect
 import functools as ft
 import itertools as it
 import logging
@@ -39,12 +40,23 @@ import logging
 import dropbot as db
 import dropbot.proxy
 import networkx as nx
+import numpy as np
 import pandas as pd
 import trollius as asyncio
 
-__all__ = ['MoveTimeout', 'actuate', 'actuate_channels', 'gather_liquid',
-           'load', 'move_liquid', 'move_results_to_frame', 'test_steady_state',
-           'wait_on_capacitance', 'window']
+from .clock import unwrap_time_us
+from .routing import RoutePlanner, plan_routes
+from .subscription import subscribe
+
+__all__ = ['MoveTimeout', 'SteadyStateDetector', 'actuate',
+           'actuate_channels', 'gather_liquid', 'load', 'move_drops',
+           'move_liquid', 'move_results_to_frame', 'route_program',
+           'run_program', 'test_steady_state', 'wait_on_capacitance',
+           'wait_on_channel_capacitances', 'wait_on_steady_state', 'window']
+
+#: Longest steady state window (in seconds) supported by the DropBot
+#: ``capacitance-steady`` event (see :func:`wait_on_steady_state`).
+MAX_STEADY_STATE_WINDOW = 3.175
 
 
 class MoveTimeout(asyncio.TimeoutError):
@@ -82,7 +94,7 @@ def window(seq, n):
 
 
 @asyncio.coroutine
-def wait_on_capacitance(proxy, callback):
+def wait_on_capacitance(proxy, callback, recorder=None):
     '''Return once callback returns `True`.
 
     Parameters
@@ -90,11 +102,17 @@ def wait_on_capacitance(proxy, callback):
     callback
         Callback function accepting a list of ``capacitance-updated`` messages
         as only argument.
+    recorder : dropbot.recorder.CapacitanceRecorder, optional
+        If specified, record messages using :data:`recorder` instead of
+        accumulating message dictionaries.
+
+        .. versionadded:: 1.74.0
 
     Returns
     -------
-    list
-        List of DropBot ``capacitance-updated`` messages containing the
+    list or dropbot.recorder.RecordedMessages
+        List of DropBot ``capacitance-updated`` messages (or view of recorded
+        messages if :data:`recorder` is specified) containing the
         following keys::
 
          - ``event``: ``"capacitance-updated"``
@@ -102,25 +120,38 @@ def wait_on_capacitance(proxy, callback):
          - ``time_us``: DropBot microsecond 32-bit counter
          - ``n_samples``: number of samples used for RMS measurement
          - ``V_a``: measured actuation voltage during capacitance reading
+
+
+    .. versionchanged:: 1.74.0
+        Disconnect from ``capacitance-updated`` signal upon returning (or
+        cancellation, e.g., on timeout).
     '''
     move_done = asyncio.Event()
     loop = asyncio.get_event_loop()
 
-    messages = []
+    if recorder is None:
+        messages = []
+        record = messages.append
+    else:
+        messages = recorder.messages()
+        record = recorder.append
 
     def _on_capacitance(message):
         # message.keys == ['event', 'new_value', 'time_us', 'n_samples', 'V_a']
         # Added by `co_target_capacitance()`: 'actuation_uuid1', 'actuated_channels'
         try:
-            messages.append(message)
+            record(message)
             if callback(messages):
                 loop.call_soon_threadsafe(move_done.set)
         except Exception:
             logging.debug('capacitance event error.', exc_info=True)
             return
 
-    proxy.signals.signal('capacitance-updated').connect(_on_capacitance)
-    yield asyncio.From(move_done.wait())
+    with subscribe(proxy.signals.signal('capacitance-updated'),
+                   _on_capacitance):
+        yield asyncio.From(move_done.wait())
+    if recorder is not None:
+        messages.close()
     raise asyncio.Return(messages)
 
 
@@ -151,37 +182,194 @@ def actuate_channels(self, channels, allow_disabled=True):
         If list actuated channels does not match the requested channels
         (missing disabled channels are ignored if ``allowed_disabled`` is
         `True`).
-    '''
-    loop = asyncio.get_event_loop()
-
-    channels_updated = asyncio.Event()
 
-    def _on_channels_updated(message):
-        channels_updated.actuated = message.get('actuated')
-        loop.call_soon_threadsafe(channels_updated.set)
 
+    .. versionchanged:: 1.74.0
+        Disconnect from ``channels-updated`` signal upon returning (or
+        cancellation, e.g., on timeout).
+    '''
     # Enable `channels-updated` DropBot signal.
     self.enable_event(db.proxy.EVENT_CHANNELS_UPDATED)
 
     # Request to be notified when the set of actuated channels changes.
-    signal = self.signals.signal('channels-updated')
-    signal.connect(_on_channels_updated)
+    with subscribe(self.signals.signal('channels-updated')) as updates:
+        # Request actuation of the specified channels.
+        self.set_state_of_channels(pd.Series(1, index=channels), append=False)
 
-    # Request actuation of the specified channels.
-    self.set_state_of_channels(pd.Series(1, index=channels), append=False)
-
-    yield asyncio.From(channels_updated.wait())
-    if not allow_disabled and (set(channels_updated.actuated) !=
-                               set(channels)):
+        message = yield asyncio.From(updates.get())
+    actuated = message.get('actuated')
+    if not allow_disabled and (set(actuated) != set(channels)):
         raise RuntimeError('Actuated channels `%s` do not match '
-                           'expected channels `%s`' %
-                           (channels_updated.actuated, channels))
-    elif set(channels_updated.actuated) - set(channels):
+                           'expected channels `%s`' % (actuated, channels))
+    elif set(actuated) - set(channels):
         # Disabled channels are allowed.
         raise RuntimeError('Actuated channels `%s` are not included in'
-                           ' expected channels `%s`' %
-                           (channels_updated.actuated, channels))
-    raise asyncio.Return(channels_updated.actuated)
+                           ' expected channels `%s`' % (actuated, channels))
+    raise asyncio.Return(actuated)
+
+
+class SteadyStateDetector(object):
+    '''Incremental check for capacitance steady state.
+
+    Drop-in replacement for :func:`test_steady_state` as a callback for
+    :func:`wait_on_capacitance` and :func:`actuate`.  Each call only processes
+    the ``capacitance-updated`` messages appended since the previous call.
+
+    The most recent :data:`max_samples` capacitance values are kept in a
+    fixed-size ring buffer, along with running sums of the values within
+    :data:`min_duration` of the most recent message.  Mean and variance are
+    therefore updated in constant time per message.  The median is computed
+    from a sorted copy of the window (at most :data:`max_samples` values),
+    and only once the other criteria are met.
+
+    Parameters
+    ----------
+    std_error : float, optional
+        Ratio of the standard deviation to the median under which steady
+        state is considered to be reached _(default: 0.02, i.e., 2% of the
+        median)_.
+    min_duration : float, optional
+        Minimum time (in seconds) since first capacitance update before
+        considering steady state as reached (default: 0.3).
+    threshold : float, optional
+        Minimum median capacitance in Farads before considering steady state
+        as reached.
+    max_samples : int, optional
+        Maximum number of most recent messages considered (default: 100).
+
+    Example
+    -------
+
+        >>> messages = yield asyncio.From(actuate(proxy, channels,
+        ...                                       SteadyStateDetector()))
+
+
+    .. versionadded:: 1.74.0
+    '''
+    def __init__(self, std_error=.02, min_duration=.3, threshold=10e-12,
+                 max_samples=100):
+        self.std_error = std_error
+        self.min_duration = min_duration
+        self.threshold = threshold
+        self.max_samples = max_samples
+        self._values = np.empty(max_samples)
+        self._times_us = np.empty(max_samples, dtype=np.int64)
+        self.reset()
+
+    def reset(self):
+        '''
+        Discard all processed messages.
+        '''
+        self._messages = None
+        self._processed = 0
+        # Total number of values pushed to ring buffer.
+        self._count = 0
+        # Ring buffer position of oldest value in time window.
+        self._window_start = 0
+        # Sorted values in time window (for median).
+        self._sorted = []
+        # Running sums over the time window, relative to `self._offset` to
+        # limit loss of precision.
+        self._offset = 0.
+        self._sum = 0.
+        self._sum_sq = 0.
+        self._result = False
+
+    def __call__(self, messages):
+        '''
+        Parameters
+        ----------
+        messages : list
+            List of DropBot ``capacitance-updated`` messages (see
+            :func:`test_steady_state`).  Processing starts over if a
+            different list is passed.
+
+        Returns
+        -------
+        bool
+            ``True`` if steady state has been reached.
+        '''
+        if messages is not self._messages or len(messages) < self._processed:
+            self.reset()
+            self._messages = messages
+        for message in messages[self._processed:]:
+            self.update(message)
+        self._processed = len(messages)
+        return self._result
+
+    def _elapsed_s(self, start, end):
+        # 32-bit microsecond counter may wrap around between messages.
+        return ((int(self._times_us[end % self.max_samples]) -
+                 int(self._times_us[start % self.max_samples])) %
+                (1 << 32)) * 1e-6
+
+    def update(self, message):
+        '''
+        Process a single ``capacitance-updated`` message.
+
+        Returns
+        -------
+        bool
+            ``True`` if steady state has been reached.
+        '''
+        value = message['new_value']
+        if self._count == 0:
+            self._offset = value
+        i = self._count % self.max_samples
+        if self._count >= self.max_samples:
+            # Overwrite oldest value in ring buffer.
+            if self._window_start <= self._count - self.max_samples:
+                self._pop_window()
+        self._values[i] = value
+        self._times_us[i] = message['time_us']
+        self._count += 1
+        bisect.insort(self._sorted, value)
+        x = value - self._offset
+        self._sum += x
+        self._sum_sq += x * x
+
+        latest = self._count - 1
+        # Remove values older than `min_duration` from time window.
+        while (self._window_start < latest and
+               self._elapsed_s(self._window_start, latest) >
+               self.min_duration):
+            self._pop_window()
+        if self._count % self.max_samples == 0:
+            self._resum()
+
+        self._result = self._check()
+        return self._result
+
+    def _pop_window(self):
+        value = self._values[self._window_start % self.max_samples]
+        del self._sorted[bisect.bisect_left(self._sorted, value)]
+        x = value - self._offset
+        self._sum -= x
+        self._sum_sq -= x * x
+        self._window_start += 1
+
+    def _resum(self):
+        # Recompute running sums to prevent accumulation of rounding errors.
+        self._offset = self._sorted[len(self._sorted) // 2]
+        x = np.array(self._sorted) - self._offset
+        self._sum = x.sum()
+        self._sum_sq = (x * x).sum()
+
+    def _check(self):
+        oldest = max(0, self._count - self.max_samples)
+        latest = self._count - 1
+        if self._elapsed_s(oldest, latest) < self.min_duration:
+            return False
+        n = len(self._sorted)
+        if n < 2:
+            return False
+        mean = self._sum / n
+        variance = max(0., (self._sum_sq - n * mean * mean) / (n - 1))
+        median = self._sorted[n // 2] if n % 2 else \
+            .5 * (self._sorted[n // 2 - 1] + self._sorted[n // 2])
+        if median < self.threshold:
+            return False
+        return np.sqrt(variance) / median < self.std_error
 
 
 def test_steady_state(messages, std_error=.02, min_duration=.3,
@@ -211,21 +399,121 @@ def test_steady_state(messages, std_error=.02, min_duration=.3,
     threshold : float, optional
         Minimum median capacitance in Farads (from most recent 100 samples)
         before considering steady state as reached.
+
+
+    .. versionchanged:: 1.74.0
+        Use :class:`SteadyStateDetector` (rather than constructing a
+        :class:`pandas.DataFrame`).  Prefer passing a
+        :class:`SteadyStateDetector` instance as callback, which only
+        processes new messages on each call.
     '''
-    df = pd.DataFrame(messages[-100:])
-    df['time'] = df.time_us * 1e-6
-    df['time'] -= df.time.iloc[0]
-    df.set_index('time', inplace=True)
-    if (df.index.values[-1] - df.index.values[0]) < min_duration:
-        return False
-    start = df.index.values[-1] - min_duration
-    d = df.new_value.loc[start:].describe()
-    result = (d['std'] / d['50%']) < std_error
-    return result and (d['50%'] >= threshold)
+    return SteadyStateDetector(std_error=std_error, min_duration=min_duration,
+                               threshold=threshold)(messages[-100:])
+
+
+def _device_steady_state(proxy, callback):
+    '''
+    Returns
+    -------
+    dict or None
+        Keyword arguments for :func:`wait_on_steady_state` equivalent to
+        :data:`callback`, or ``None`` if :data:`callback` is not a
+        :class:`SteadyStateDetector` or the DropBot does not support
+        ``capacitance-steady`` events.
+    '''
+    state_class = getattr(proxy, 'state_class', None)
+    if not isinstance(callback, SteadyStateDetector) or state_class is None \
+            or 'steady_state_rel_std' not in \
+            state_class.DESCRIPTOR.fields_by_name \
+            or callback.min_duration > MAX_STEADY_STATE_WINDOW:
+        return None
+    return {'std_error': callback.std_error,
+            'min_duration': callback.min_duration,
+            'threshold': callback.threshold}
 
 
 @asyncio.coroutine
-def actuate(proxy, channels, callback):
+def wait_on_steady_state(proxy, std_error=.02, min_duration=.3,
+                         threshold=10e-12, recorder=None):
+    '''Return once DropBot reports capacitance has reached steady state.
+
+    Steady state is checked by the DropBot (see the ``steady_state_rel_std``,
+    ``steady_state_window_ms`` and ``steady_state_threshold`` state fields),
+    so ``capacitance-updated`` messages are not required, i.e.,
+    ``capacitance_update_interval_ms`` may be set to 0.
+
+    Parameters
+    ----------
+    std_error : float, optional
+        Ratio of the standard deviation to the mean under which steady state
+        is considered to be reached _(default: 0.02, i.e., 2% of the mean)_.
+    min_duration : float, optional
+        Duration (in seconds) of capacitance readings considered (default:
+        0.3).  Must be at most :data:`MAX_STEADY_STATE_WINDOW`.
+    threshold : float, optional
+        Minimum mean capacitance in Farads before considering steady state as
+        reached.
+    recorder : dropbot.recorder.CapacitanceRecorder, optional
+        If specified, record messages using :data:`recorder` instead of
+        accumulating message dictionaries.
+
+    Returns
+    -------
+    list or dropbot.recorder.RecordedMessages
+        DropBot ``capacitance-updated`` messages received while waiting (if
+        any), followed by the ``capacitance-steady`` message, containing the
+        following keys::
+
+         - ``event``: ``"capacitance-updated"`` or ``"capacitance-steady"``
+         - ``new_value``: capacitance value in Farads
+         - ``time_us``: DropBot microsecond 32-bit counter
+         - ``n_samples``: number of samples used for RMS measurement
+         - ``V_a``: measured actuation voltage during capacitance reading
+
+        ``capacitance-steady`` messages also contain the relative standard
+        deviation (``rel_std``) and duration (``window_ms``) of the steady
+        state window.
+
+
+    .. versionadded:: 1.74.0
+    '''
+    loop = asyncio.get_event_loop()
+    steady = asyncio.Event()
+
+    if recorder is None:
+        messages = []
+        record = messages.append
+    else:
+        messages = recorder.messages()
+        record = recorder.append
+
+    def _on_steady(message):
+        record(message)
+        loop.call_soon_threadsafe(steady.set)
+
+    with subscribe(proxy.signals.signal('capacitance-updated'), record), \
+            subscribe(proxy.signals.signal('capacitance-steady'),
+                      _on_steady):
+        # Only readings measured after setting `steady_state_rel_std` are
+        # considered by the DropBot.
+        proxy.update_state(steady_state_window_ms=int(round(min_duration *
+                                                            1e3)),
+                           steady_state_threshold=threshold,
+                           steady_state_rel_std=std_error)
+        try:
+            yield asyncio.From(steady.wait())
+        except asyncio.CancelledError:
+            # Disable `capacitance-steady` event (e.g., on timeout).
+            proxy.update_state(steady_state_rel_std=0)
+            raise
+    if recorder is not None:
+        messages.close()
+    raise asyncio.Return(messages)
+
+
+@asyncio.coroutine
+def actuate(proxy, channels, callback, recorder=None,
+            device_steady_state=True):
     '''Actuate channels and wait for callback to return `True`.
 
     Parameters
@@ -235,22 +523,50 @@ def actuate(proxy, channels, callback):
     callback
         Callback function accepting a list of ``capacitance-updated`` messages
         as only argument.
+    recorder : dropbot.recorder.CapacitanceRecorder, optional
+        If specified, record messages using :data:`recorder`, as a new step
+        with the actuated channels as ``channels`` step information.
+
+        .. versionadded:: 1.74.0
+    device_steady_state : bool, optional
+        If ``True`` and :data:`callback` is a :class:`SteadyStateDetector`,
+        wait for the DropBot to report steady state using the equivalent
+        criteria (see :func:`wait_on_steady_state`), rather than checking
+        each ``capacitance-updated`` message on the host.  Ignored if the
+        DropBot does not support ``capacitance-steady`` events.
+
+        .. versionadded:: 1.74.0
     '''
+    steady_state = (_device_steady_state(proxy, callback)
+                    if device_steady_state else None)
     # Actuate channels.
-    yield asyncio.From(actuate_channels(proxy, channels))
+    actuated = yield asyncio.From(actuate_channels(proxy, channels))
+    if recorder is not None:
+        recorder.new_step(channels=actuated)
+    if steady_state is not None:
+        result = yield asyncio.From(wait_on_steady_state(proxy,
+                                                         recorder=recorder,
+                                                         **steady_state))
+        raise asyncio.Return(result)
     # Wait for callback.
-    result = yield asyncio.From(wait_on_capacitance(proxy, callback))
+    result = yield asyncio.From(wait_on_capacitance(proxy, callback,
+                                                    recorder=recorder))
     raise asyncio.Return(result)
 
 
 @asyncio.coroutine
-def move_liquid(proxy, route, min_duration=.3, trail_length=1, wrapper=None):
+def move_liquid(proxy, route, min_duration=.3, trail_length=1, wrapper=None,
+                recorder=None, planner=None):
     '''Move liquid along specified route (i.e., list of channels).
 
     Parameters
     ----------
     route : list[int]
         Ordered sequence of channels to move along.
+
+        If :data:`planner` is specified, sequence of channels to visit (e.g.,
+        ``[source, target]``), where the route between consecutive channels
+        is planned using :data:`planner`.
     min_duration : float, optional
         Minimum time to apply each actuation.
     trail_length : int, optional
@@ -262,6 +578,16 @@ def move_liquid(proxy, route, min_duration=.3, trail_length=1, wrapper=None):
 
         Useful, for example, to apply an actuation timeout using
         `asyncio.wait_for()`.
+    recorder : dropbot.recorder.CapacitanceRecorder, optional
+        If specified, record ``capacitance-updated`` messages using
+        :data:`recorder` (one step per actuation).
+
+        .. versionadded:: 1.74.0
+    planner : dropbot.routing.RoutePlanner, optional
+        Route planner used to plan the route between channels in
+        :data:`route`.
+
+        .. versionadded:: 1.74.0
 
     Returns
     -------
@@ -271,7 +597,8 @@ def move_liquid(proxy, route, min_duration=.3, trail_length=1, wrapper=None):
 
          - ``channels``: actuated channels
          - ``messages``: ``capacitance-updated`` messages received during the
-           actuation
+           actuation (:class:`dropbot.recorder.RecordedMessages` if
+           :data:`recorder` is specified)
 
 
     .. versionchanged:: 1.72.0
@@ -281,6 +608,9 @@ def move_liquid(proxy, route, min_duration=.3, trail_length=1, wrapper=None):
         def wrapper(task):
             return task
 
+    if planner is not None:
+        route = planner.route_through(route)
+
     messages_ = []
 
     duration = min_duration
@@ -290,8 +620,9 @@ def move_liquid(proxy, route, min_duration=.3, trail_length=1, wrapper=None):
                   end='')
             messages = yield asyncio\
                 .From(wrapper(actuate(proxy, route_i,
-                                      ft.partial(test_steady_state,
-                                                 min_duration=duration))))
+                                      SteadyStateDetector(min_duration=
+                                                          duration),
+                                      recorder=recorder)))
             messages_.append({'channels': tuple(route_i),
                               'messages': messages})
             head_channels_i = list(route_i[-trail_length:])
@@ -299,8 +630,9 @@ def move_liquid(proxy, route, min_duration=.3, trail_length=1, wrapper=None):
                   end='')
             messages = yield asyncio\
                 .From(wrapper(actuate(proxy, head_channels_i,
-                                      ft.partial(test_steady_state,
-                                                 min_duration=duration))))
+                                      SteadyStateDetector(min_duration=
+                                                          duration),
+                                      recorder=recorder)))
             messages_.append({'channels': tuple(head_channels_i),
                               'messages': messages})
     except (asyncio.CancelledError, asyncio.TimeoutError):
@@ -309,6 +641,273 @@ def move_liquid(proxy, route, min_duration=.3, trail_length=1, wrapper=None):
     raise asyncio.Return(messages_)
 
 
+
+@asyncio.coroutine
+def wait_on_channel_capacitances(proxy, channel_groups, callbacks,
+                                 update_interval=.025):
+    '''Return once the callback for each group of channels returns `True`.
+
+    The capacitance of every channel in any group is measured using a single
+    ``channel_capacitances()`` request per update.  The capacitance of each
+    group is the sum of the capacitances of its channels.
+
+    Parameters
+    ----------
+    channel_groups : list[list[int]]
+        Groups of channels (e.g., channels actuated for each drop).
+    callbacks : list
+        Callback function for each group, accepting a list of messages for
+        the group as only argument (see :func:`wait_on_capacitance`).
+    update_interval : float, optional
+        Capacitance update interval in seconds (default: 0.025).
+
+    Returns
+    -------
+    list[list[dict]]
+        Messages for each group, up to the update where the respective
+        callback returned `True`.  Each message contains the following keys::
+
+         - ``event``: ``"capacitance-updated"``
+         - ``new_value``: capacitance of group in Farads
+         - ``time_us``: host microsecond 32-bit counter
+         - ``channels``: channels in group
+
+
+    .. versionadded:: 1.74.0
+    '''
+    channels = sorted(set(it.chain(*channel_groups)))
+    index = dict((channel, i) for i, channel in enumerate(channels))
+    group_indices = [[index[channel] for channel in group]
+                     for group in channel_groups]
+    messages = [[] for group in channel_groups]
+    pending = list(range(len(channel_groups)))
+    loop = asyncio.get_event_loop()
+
+    while pending:
+        capacitances = np.asarray(proxy.channel_capacitances(channels))
+        # Wrap host time like the DropBot microsecond counter (see
+        # `SteadyStateDetector`).
+        time_us = int(loop.time() * 1e6) % (1 << 32)
+        for i in list(pending):
+            messages[i].append({'event': 'capacitance-updated',
+                                'new_value':
+                                float(capacitances[group_indices[i]].sum()),
+                                'time_us': time_us,
+                                'channels': list(channel_groups[i])})
+            if callbacks[i](messages[i]):
+                pending.remove(i)
+        if pending:
+            yield asyncio.From(asyncio.sleep(update_interval))
+    raise asyncio.Return(messages)
+
+
+@asyncio.coroutine
+def _actuate_drops(proxy, channels, channel_groups, min_duration,
+                   update_interval):
+    yield asyncio.From(actuate_channels(proxy, channels))
+    detectors = [SteadyStateDetector(min_duration=min_duration)
+                 for group in channel_groups]
+    messages = yield asyncio\
+        .From(wait_on_channel_capacitances(proxy, channel_groups, detectors,
+                                           update_interval=update_interval))
+    raise asyncio.Return(messages)
+
+
+@asyncio.coroutine
+def move_drops(proxy, schedule, min_duration=.3, update_interval=.025,
+               wrapper=None):
+    '''Move several drops at once according to a schedule.
+
+    Each time step is applied as two actuations, each setting the channels
+    of all drops at once:
+
+     1. The current and next channel of each drop.
+     2. The next channel of each drop.
+
+    Each actuation is applied until the capacitance of each moving drop
+    (i.e., the total capacitance of the channels actuated for the drop)
+    reaches steady state (see :class:`SteadyStateDetector`).
+
+    Parameters
+    ----------
+    schedule : array-like
+        Channel of each drop at each time step, i.e., array of shape ``(T +
+        1, number of drops)`` as returned by
+        :func:`dropbot.routing.plan_routes`.
+    min_duration : float, optional
+        Minimum time to apply each actuation.
+    update_interval : float, optional
+        Capacitance update interval in seconds (default: 0.025).
+    wrapper : callable, optional
+        Function to wrap around each actuation.
+
+        Useful, for example, to apply an actuation timeout using
+        `asyncio.wait_for()`.
+
+    Returns
+    -------
+    list[dict]
+        One entry per actuation, containing the following keys::
+
+         - ``channels``: actuated channels
+         - ``drop_channels``: channels actuated for each moving drop
+         - ``messages``: capacitance messages of each moving drop (see
+           :func:`wait_on_channel_capacitances`)
+
+    Raises
+    ------
+    MoveTimeout
+        If an actuation times out.  The ``route`` attribute is set to the
+        schedule and ``route_i`` to the actuated channels.
+
+
+    .. versionadded:: 1.74.0
+    '''
+    if wrapper is None:
+        def wrapper(task):
+            return task
+
+    schedule = np.asarray(schedule, dtype=int)
+    results = []
+    for previous, next_ in zip(schedule[:-1], schedule[1:]):
+        moving = np.flatnonzero(previous != next_)
+        if not moving.size:
+            continue
+        for drop_channels in ([sorted(set([a, b]))
+                               for a, b in zip(previous.tolist(),
+                                               next_.tolist())],
+                              [[b] for b in next_.tolist()]):
+            channels = sorted(set(it.chain(*drop_channels)))
+            moving_channels = [drop_channels[i] for i in moving]
+            try:
+                messages = yield asyncio\
+                    .From(wrapper(_actuate_drops(proxy, channels,
+                                                 moving_channels,
+                                                 min_duration,
+                                                 update_interval)))
+            except (asyncio.CancelledError, asyncio.TimeoutError):
+                raise MoveTimeout(schedule, tuple(channels))
+            results.append({'channels': tuple(channels),
+                            'drop_channels': moving_channels,
+                            'messages': messages})
+    raise asyncio.Return(results)
+
+
+
+def route_program(route, min_duration=.3, trail_length=1,
+                  steady_state_rel_std=.02, timeout=5.):
+    '''Actuation program steps to move liquid along route.
+
+    Steps match the actuations applied by :func:`move_liquid`, i.e., for each
+    move, actuate :data:`trail_length` + 1 channels, then the
+    :data:`trail_length` channels at the head of the route.
+
+    Parameters
+    ----------
+    route : list[int]
+        Ordered sequence of channels to move along.
+    min_duration : float, optional
+        Minimum time to apply each actuation.
+    trail_length : int, optional
+        Number of electrodes to actuate at the same time along route.
+    steady_state_rel_std : float, optional
+        Maximum relative standard deviation of capacitance readings within
+        :data:`min_duration` before completing each step.
+    timeout : float, optional
+        Maximum duration of each step in seconds.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Actuation program steps (see :func:`run_program`).
+
+
+    .. versionadded:: 1.74.0
+    '''
+    channels = []
+    for route_i in window(route, trail_length + 1):
+        channels.append(list(route_i))
+        channels.append(list(route_i[-trail_length:]))
+    steps = pd.DataFrame({'channels': channels})
+    steps['min_duration'] = min_duration
+    steps['steady_state_rel_std'] = steady_state_rel_std
+    steps['timeout'] = timeout
+    return steps
+
+
+@asyncio.coroutine
+def run_program(proxy, steps):
+    '''Run actuation program on the DropBot and wait for all steps.
+
+    Unlike :func:`move_liquid`, the DropBot actuates the channels of each
+    step and evaluates its completion criteria without a request from the
+    host, so transitions between steps do not include USB latency or host
+    scheduling jitter.
+
+    Parameters
+    ----------
+    proxy : dropbot.SerialProxy
+        DropBot serial handle.
+    steps : pandas.DataFrame or list[dict]
+        Actuation program steps (see
+        :meth:`dropbot.proxy.ProxyMixin.run_actuation_program` and
+        :func:`route_program`).
+
+    Returns
+    -------
+    list[dict]
+        ``actuation-step-completed`` message of each step, containing the
+        following keys::
+
+         - ``event``: ``"actuation-step-completed"``
+         - ``step``: index of step
+         - ``new_value``: capacitance value in Farads at step completion
+         - ``time_us``: DropBot microsecond 32-bit counter
+         - ``duration_ms``: step duration in milliseconds
+         - ``V_a``: actuation voltage
+
+    Raises
+    ------
+    MoveTimeout
+        If a step times out.  The ``route`` attribute is set to the channels
+        of each step and ``route_i`` to the channels of the timed out step.
+
+    Example
+    -------
+
+        >>> steps = route_program([110, 109, 115], min_duration=.3)
+        >>> messages = yield asyncio.From(run_program(proxy, steps))
+
+
+    .. versionadded:: 1.74.0
+    '''
+    steps = pd.DataFrame(steps)
+    loop = asyncio.get_event_loop()
+    events = asyncio.Queue(loop=loop)
+
+    def _on_step(message):
+        loop.call_soon_threadsafe(events.put_nowait, message)
+
+    messages = []
+    with subscribe(proxy.signals.signal('actuation-step-completed'),
+                   _on_step), \
+            subscribe(proxy.signals.signal('actuation-step-timeout'),
+                      _on_step):
+        step_count = proxy.run_actuation_program(steps)
+        try:
+            while len(messages) < step_count:
+                message = yield asyncio.From(events.get())
+                if message['event'] == 'actuation-step-timeout':
+                    route = [list(channels) for channels in steps.channels]
+                    raise MoveTimeout(route, tuple(route[message['step']]))
+                messages.append(message)
+        except asyncio.CancelledError:
+            # Do not leave program running, e.g., on `wait_for()` timeout.
+            proxy.stop_actuation_program()
+            raise
+    raise asyncio.Return(messages)
+
+
 def move_results_to_frame(move_results):
     '''Convert results from `move_liquid()` to a data frame.
 
@@ -371,6 +970,12 @@ def move_results_to_frame(move_results):
         axis = df.reset_index(level=0).groupby('channels').new_value\
             .plot(style='x', legend=False, figsize=(width, 10))[0]
         axis.set_ylim(0)
+
+
+    .. versionchanged:: 1.74.0
+        Unwrap device microsecond counter, which wraps around every ~71
+        minutes.  Accept :class:`dropbot.recorder.RecordedMessages` (see
+        :func:`move_liquid`).
     '''
     # Combine `capacitance-updated` messages collected during each move into a
     # single data frame.
@@ -378,11 +983,16 @@ def move_results_to_frame(move_results):
     frames = []
     for i, message_i in enumerate(move_results):
         keys.append('%3d - %s' % (i, message_i['channels']))
-        frames.append(pd.DataFrame(message_i['messages']))
+        messages_i = message_i['messages']
+        if hasattr(messages_i, 'to_frame'):
+            # Messages recorded using `dropbot.recorder.CapacitanceRecorder`.
+            frames.append(messages_i.to_frame())
+        else:
+            frames.append(pd.DataFrame(messages_i))
     df = pd.concat(frames, keys=keys)
     df.index.levels[0].name = 'channels'
-    df['time (s)'] = df['time_us'] * 1e-6
-    df['time (s)'] -= df['time (s)'].iloc[0]
+    # Device microsecond counter wraps around every ~71 minutes.
+    df['time (s)'] = unwrap_time_us(df['time_us'].values) * 1e-6
     df.set_index('time (s)', append=True, inplace=True)
     df.reset_index(level=1, drop=True, inplace=True)
     return df
@@ -421,33 +1031,39 @@ def load(proxy, channels, threshold=50e-12, load_duration=.25,
     # Load starting reservoir.
     logging.debug('Wait for channel `%s` to be loaded', channels[:1])
     yield asyncio.From(actuate(proxy, channels[:-1],
-                               ft.partial(test_steady_state,
-                                          min_duration=load_duration,
-                                          threshold=1.1 * threshold)))
+                               SteadyStateDetector(min_duration=load_duration,
+                                                   threshold=1.1 * threshold)))
 
     detach_channels = channels[1:]
     logging.debug('Wait for liquid to detach from edge electrode `%s` to '
                   '`%s`...', channels[:1], detach_channels)
     messages = yield asyncio\
         .From(actuate(proxy, detach_channels,
-                      ft.partial(test_steady_state,
-                                 min_duration=detach_duration,
-                                 threshold=threshold)))
+                      SteadyStateDetector(min_duration=detach_duration,
+                                          threshold=threshold)))
     raise asyncio.Return(messages)
 
 
 @asyncio.coroutine
 def gather_liquid(proxy, G, sources, target,
                   wrapper=ft.partial(asyncio.wait_for, timeout=4),
-                  update_interval=.025):
-    '''Sequentially move liquid from each specified source to shared target.
+                  update_interval=.025, recorder=None, concurrent=False):
+    '''Move liquid from each specified source to shared target.
+
+    By default, liquid is moved from one source at a time.  If
+    :data:`concurrent` is `True`, liquid is moved from all sources at once
+    (see :func:`dropbot.routing.plan_routes` and :func:`move_drops`).
 
     Parameters
     ----------
     proxy : dropbot.SerialProxy
         DropBot serial handle.
-    G : networkx.Graph
-        Channel/electrode connection graph.
+    G : networkx.Graph or dropbot.routing.RoutePlanner
+        Channel/electrode connection graph, or route planner (e.g., built once
+        per chip and reused for each call).
+
+        .. versionchanged:: 1.74.0
+            Accept :class:`dropbot.routing.RoutePlanner`.
     sources : list[int]
         List of source channel numbers.
     target : int
@@ -459,14 +1075,41 @@ def gather_liquid(proxy, G, sources, target,
         `asyncio.wait_for()`.
     update_interval : float, optional
         Capacitance update interval in seconds (default: 0.025).
+    recorder : dropbot.recorder.CapacitanceRecorder, optional
+        If specified, record ``capacitance-updated`` messages using
+        :data:`recorder` (one step per actuation).
+
+        .. versionadded:: 1.74.0
+    concurrent : bool, optional
+        If `True`, move liquid from all sources at once, keeping drops apart
+        until they merge at the target.  Sources closest to the target have
+        priority.  Not supported with :data:`recorder`.
+
+        .. versionadded:: 1.74.0
 
 
     .. versionadded:: 1.72.0
     '''
+    if concurrent:
+        if recorder is not None:
+            raise ValueError('`recorder` is not supported for concurrent '
+                             'moves.')
+        planner = (G if isinstance(G, RoutePlanner)
+                   else RoutePlanner.from_graph(G))
+        sources = sorted(sources, key=lambda source:
+                         planner.distance[source, target])
+        schedule = plan_routes(planner, sources, [target] * len(sources))
+        yield asyncio.From(move_drops(proxy, schedule, wrapper=wrapper,
+                                      update_interval=update_interval))
+        return
     with db.dropbot_state(proxy,
                           capacitance_update_interval_ms=int(update_interval *
                                                              1e3)):
         for source_i in sources:
+            if isinstance(G, RoutePlanner):
+                route_i = G.route(source_i, target)
+            else:
+                route_i = nx.shortest_path(G, source_i, target)
             yield asyncio\
-                .From(move_liquid(proxy, nx.shortest_path(G, source_i, target),
-                                wrapper=wrapper))
+                .From(move_liquid(proxy, route_i, wrapper=wrapper,
+                                  recorder=recorder))
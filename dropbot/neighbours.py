@@ -0,0 +1,162 @@
+'''
+Channel neighbour tables, as used by the ``assign_neighbours`` and
+``neighbours`` DropBot commands.
+
+A neighbour table is a dense ``(channel count, 4)`` integer array, where row
+``i`` holds the ``up``, ``down``, ``left`` and ``right`` neighbour of channel
+``i`` (see :data:`DIRECTIONS`), or :data:`NO_NEIGHBOUR` where channel ``i``
+has no neighbour in the corresponding direction.
+
+The firmware stores the table as a flat ``uint8`` array (i.e., the table in
+row-major order), where missing neighbours are marked with
+:data:`PACKED_NO_NEIGHBOUR`.
+
+.. versionadded:: 1.74.0
+'''
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import pandas as pd
+
+__all__ = ['DIRECTIONS', 'NO_NEIGHBOUR', 'PACKED_NO_NEIGHBOUR',
+           'neighbours_to_series', 'pack_neighbours', 'resize_neighbours',
+           'series_to_neighbours', 'unpack_neighbours']
+
+#: Neighbour directions, in order of the firmware neighbours table.
+DIRECTIONS = ('up', 'down', 'left', 'right')
+#: Neighbour table value where a channel has no neighbour.
+NO_NEIGHBOUR = -1
+#: Firmware (packed) neighbour table value where a channel has no neighbour.
+PACKED_NO_NEIGHBOUR = 255
+
+
+def pack_neighbours(neighbours):
+    '''
+    Parameters
+    ----------
+    neighbours : array-like
+        Neighbour table of shape ``(N, 4)``.
+
+    Returns
+    -------
+    numpy.ndarray
+        Packed ``uint8`` neighbours table, e.g., to pass to the
+        ``assign_neighbours`` DropBot command.
+    '''
+    neighbours = np.asarray(neighbours)
+    if neighbours.ndim != 2 or neighbours.shape[1] != len(DIRECTIONS):
+        raise ValueError('Expected neighbour table of shape `(N, %d)`.' %
+                         len(DIRECTIONS))
+    elif neighbours.shape[0] > PACKED_NO_NEIGHBOUR:
+        raise ValueError('Packed neighbour table supports at most %d '
+                         'channels.' % PACKED_NO_NEIGHBOUR)
+    return np.where(neighbours < 0, PACKED_NO_NEIGHBOUR,
+                    neighbours).astype('uint8').ravel()
+
+
+def unpack_neighbours(packed_neighbours):
+    '''
+    Parameters
+    ----------
+    packed_neighbours : array-like
+        Packed ``uint8`` neighbours table, e.g., as returned by the
+        ``neighbours`` DropBot command.
+
+    Returns
+    -------
+    numpy.ndarray
+        Neighbour table of shape ``(N, 4)``.
+    '''
+    packed = np.asarray(packed_neighbours, dtype='uint8').reshape(-1, 4)
+    return np.where(packed == PACKED_NO_NEIGHBOUR, NO_NEIGHBOUR,
+                    packed.astype(int))
+
+
+def resize_neighbours(neighbours, channel_count):
+    '''
+    Parameters
+    ----------
+    neighbours : array-like
+        Neighbour table of shape ``(N, 4)``.
+    channel_count : int
+        Number of channels (e.g., ``proxy.number_of_channels``).
+
+    Returns
+    -------
+    numpy.ndarray
+        Neighbour table of shape ``(channel_count, 4)``.  Additional channels
+        have no neighbours.
+
+    Raises
+    ------
+    ValueError
+        If a channel (or neighbour) outside of ``channel_count`` channels has
+        any neighbours.
+    '''
+    neighbours = np.asarray(neighbours)
+    if neighbours.shape[0] > channel_count:
+        if (neighbours[channel_count:] != NO_NEIGHBOUR).any():
+            raise ValueError('Channels outside of %d channels have '
+                             'neighbours.' % channel_count)
+        neighbours = neighbours[:channel_count]
+    if (neighbours >= channel_count).any():
+        raise ValueError('Neighbours outside of %d channels.' % channel_count)
+    resized = np.full((channel_count, neighbours.shape[1]), NO_NEIGHBOUR,
+                      dtype=int)
+    resized[:neighbours.shape[0]] = neighbours
+    return resized
+
+
+def neighbours_to_series(neighbours):
+    '''
+    Parameters
+    ----------
+    neighbours : array-like
+        Neighbour table of shape ``(N, 4)``.
+
+    Returns
+    -------
+    pandas.Series
+        Neighbour of each channel, indexed by ``channel`` and ``direction``
+        (``NaN`` where no neighbour exists).
+    '''
+    neighbours = np.asarray(neighbours)
+    index = pd.MultiIndex.from_product([np.arange(neighbours.shape[0]),
+                                        list(DIRECTIONS)],
+                                       names=['channel', 'direction'])
+    return pd.Series(np.where(neighbours < 0, np.nan,
+                              neighbours).ravel(), index=index,
+                     name='channel_neighbour')
+
+
+def series_to_neighbours(channel_neighbours, channel_count=None):
+    '''
+    Parameters
+    ----------
+    channel_neighbours : pandas.Series
+        Neighbour of each channel, indexed by ``channel`` and ``direction``
+        (see :func:`neighbours_to_series`).  Missing entries (and ``NaN``
+        values) are treated as no neighbour.
+    channel_count : int, optional
+        Number of channels (default: highest channel in
+        :data:`channel_neighbours` index plus one).
+
+    Returns
+    -------
+    numpy.ndarray
+        Neighbour table of shape ``(channel_count, 4)``.
+    '''
+    channels = np.asarray(channel_neighbours.index.get_level_values(0),
+                          dtype=int)
+    directions = pd.Categorical(channel_neighbours.index.get_level_values(1),
+                                categories=DIRECTIONS).codes
+    if (directions < 0).any():
+        raise ValueError('Directions must be one of: %s' %
+                         ', '.join(DIRECTIONS))
+    if channel_count is None:
+        channel_count = channels.max() + 1 if channels.size else 0
+    neighbours = np.full((channel_count, len(DIRECTIONS)), NO_NEIGHBOUR,
+                         dtype=int)
+    neighbours[channels, directions] = (channel_neighbours
+                                        .fillna(NO_NEIGHBOUR).values)
+    return neighbours
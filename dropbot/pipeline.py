@@ -0,0 +1,230 @@
+'''
+Pipelined (non-blocking) RPC request submission.
+
+By default, each RPC request blocks until the respective response has been
+received, i.e., each request costs a full USB round trip.  A
+:class:`RequestPipeline` instead writes each request packet immediately
+(tagged with a unique packet identifier, i.e., ``iuid``) and returns a
+future.  Response packets are matched to outstanding requests by ``iuid``,
+so up to :attr:`RequestPipeline.depth` requests may be in flight at once.
+
+.. versionadded:: 1.74.0
+'''
+from __future__ import absolute_import, division, print_function
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+#: Maximum packet identifier (``iuid`` is a ``uint16``, where 0 is reserved
+#: for unsolicited packets, e.g., events).
+MAX_IUID = (1 << 16) - 1
+
+
+class PipelineClosed(IOError):
+    pass
+
+
+class RequestPipeline(object):
+    '''
+    Match responses to pipelined requests by packet identifier.
+
+    Parameters
+    ----------
+    write : callable
+        Function to write raw request packet bytes to the device.
+    depth : int, optional
+        Maximum number of requests awaiting a response.  Submitting another
+        request blocks until a response is received.
+
+    Example
+    -------
+
+        >>> pipeline = RequestPipeline(serial_device.write, depth=8)
+        >>> # Call `pipeline.dispatch(packet)` for each received response.
+        >>> futures = [pipeline.send(packet) for packet in packets]
+        >>> responses = [f.result(timeout=1) for f in futures]
+    '''
+    def __init__(self, write, depth=8):
+        self.write = write
+        self.depth = depth
+        self._slots = threading.BoundedSemaphore(depth)
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._next_iuid = 1
+        self._closed = False
+
+    @property
+    def pending(self):
+        '''
+        Number of requests awaiting a response.
+        '''
+        return len(self._futures)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def _allocate_iuid(self):
+        while True:
+            iuid = self._next_iuid
+            self._next_iuid = iuid % MAX_IUID + 1
+            if iuid not in self._futures:
+                return iuid
+
+    def send(self, packet):
+        '''
+        Write request packet without waiting for the response.
+
+        Blocks while :attr:`depth` requests are awaiting a response.
+
+        Parameters
+        ----------
+        packet : nadamq.NadaMq.cPacket
+            Request packet.  The ``iuid`` of the packet is overwritten.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the response packet.
+
+        Raises
+        ------
+        PipelineClosed
+            If pipeline has been closed.
+        '''
+        self._slots.acquire()
+        future = Future()
+        try:
+            # Lock ensures packets are written in the order `iuid` values are
+            # allocated.
+            with self._lock:
+                if self._closed:
+                    raise PipelineClosed('Pipeline is closed.')
+                packet.iuid = self._allocate_iuid()
+                self._futures[packet.iuid] = future
+                self.write(packet.tostring())
+        except Exception:
+            self._futures.pop(getattr(packet, 'iuid', None), None)
+            self._slots.release()
+            raise
+        return future
+
+    def dispatch(self, packet):
+        '''
+        Resolve the future of the request matching the response packet.
+
+        Returns
+        -------
+        bool
+            ``False`` if no request matches the packet ``iuid``.
+        '''
+        with self._lock:
+            future = self._futures.pop(packet.iuid, None)
+        if future is None:
+            logger.debug('Unexpected response `iuid`: %s', packet.iuid)
+            return False
+        self._slots.release()
+        future.set_result(packet)
+        return True
+
+    def abandon(self, iuid):
+        '''
+        Stop waiting for the response to the specified request (e.g., after a
+        time out), freeing its pipeline slot.
+        '''
+        with self._lock:
+            future = self._futures.pop(iuid, None)
+        if future is not None:
+            self._slots.release()
+            future.cancel()
+
+    def close(self, exception=None):
+        '''
+        Fail all outstanding requests (e.g., on disconnection) and reject
+        subsequent requests.
+        '''
+        with self._lock:
+            self._closed = True
+            futures = list(self._futures.values())
+            self._futures.clear()
+        for future in futures:
+            self._slots.release()
+            future.set_exception(exception or PipelineClosed('Pipeline '
+                                                             'closed.'))
+
+
+class PipelinedCaller(object):
+    '''
+    Submit proxy method calls to a :class:`RequestPipeline`, returning a
+    future for each call.
+
+    Each method call runs in a worker thread.  :meth:`submit` only returns
+    once the request packet of the call has been written, so requests reach
+    the device in submission order.
+
+    Parameters
+    ----------
+    proxy : object
+        Proxy whose ``_send_command`` sends packets using
+        :data:`pipeline`.
+    pipeline : RequestPipeline
+    '''
+    def __init__(self, proxy, pipeline):
+        self.proxy = proxy
+        self.pipeline = pipeline
+        self._executor = ThreadPoolExecutor(max_workers=pipeline.depth)
+        self._local = threading.local()
+
+    def submit(self, method_name, *args, **kwargs):
+        '''
+        Call proxy method without waiting for the response.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the return value of the method.
+        '''
+        written = threading.Event()
+        method = getattr(self.proxy, method_name)
+
+        def _call():
+            self._local.written = written
+            try:
+                return method(*args, **kwargs)
+            finally:
+                written.set()
+                self._local.written = None
+
+        future = self._executor.submit(_call)
+        written.wait()
+        return future
+
+    def send(self, packet, timeout=None):
+        '''
+        Send packet using pipeline and wait for response.
+
+        If called from a worker thread of :meth:`submit`, signal that the
+        request has been written before waiting for the response.
+
+        Raises
+        ------
+        IOError
+            If no response was received within :data:`timeout` seconds.
+        '''
+        try:
+            future = self.pipeline.send(packet)
+        finally:
+            written = getattr(self._local, 'written', None)
+            if written is not None:
+                written.set()
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            self.pipeline.abandon(packet.iuid)
+            raise IOError('Timed out waiting for response.')
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
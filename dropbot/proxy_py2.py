@@ -6,6 +6,7 @@ import math
 import threading
 import time
 import uuid
+import weakref
 
 from base_node_rpc.proxy import ConfigMixinBase, StateMixinBase
 from path_helpers import path
@@ -17,8 +18,13 @@ import serial
 import si_prefix as si
 import six
 
+from .binary_events import EVENT_TYPES, BinaryEventDispatcher
+from .clock import DeviceClock
 from .config import Config
 from .core import dropbot_state, NOMINAL_ON_BOARD_CALIBRATION_CAPACITORS
+from .drops import unpack_drops
+from .neighbours import (neighbours_to_series, pack_neighbours,
+                         series_to_neighbours, unpack_neighbours)
 from ._version import get_versions
 from .bin.upload import upload
 
@@ -32,6 +38,7 @@ EVENT_ACTUATED_CHANNEL_CAPACITANCES = (1 << 31)
 EVENT_CHANNELS_UPDATED              = (1 << 30)
 EVENT_SHORTS_DETECTED               = (1 << 28)
 EVENT_DROPS_DETECTED                = (1 << 27)
+EVENT_CHANNELS_SCANNED              = (1 << 26)
 EVENT_ENABLE                        = (1 << 0)
 
 
@@ -47,31 +54,117 @@ class CommunicationError(Exception):
     pass
 
 
-def _unpack_drops(packed_drops):
+#: Amplitude calculation methods supported by
+#: :meth:`ProxyMixin.measure_capacitance`.
+AMPLITUDE_METHODS = ('filtered_mean', 'percentile_difference')
+
+
+def _amplitudes(samples, methods):
+    '''
+    Compute amplitude of analog square wave measurements using each of the
+    specified methods.
+
+    Parameters
+    ----------
+    samples : numpy.ndarray
+        Raw analog measurements.
+    methods : list
+        Amplitude calculation methods (see :data:`AMPLITUDE_METHODS`).
+
+    Returns
+    -------
+    numpy.ndarray
+        Amplitude (in analog counts) computed using each method.
+
+
+    .. versionadded:: 1.74.0
+    '''
+    samples = np.asarray(samples, dtype=float)
+    values = np.empty(len(methods))
+    for i, method_i in enumerate(methods):
+        if method_i == 'filtered_mean':
+            # Mean absolute deviation from ground, excluding outliers.
+            v_abs = np.abs(samples - samples.mean())
+            values[i] = v_abs[v_abs < 1.5 * v_abs.mean()].mean()
+        elif method_i == 'percentile_difference':
+            low, high = np.percentile(samples, [25, 75])
+            values[i] = .5 * (high - low)
+    return values
+
+
+def _amplitude_methods(amplitude, on_device=False):
     '''
-    Unpack raw drops array format:
+    Returns
+    -------
+    list
+        Amplitude calculation methods (see :data:`AMPLITUDE_METHODS`).
+
+    Raises
+    ------
+    NameError
+        If an amplitude calculation method is unknown.
+    ValueError
+        If :data:`on_device` is ``True`` and an amplitude calculation method
+        other than ``percentile_difference`` is specified.
+
+
+    .. versionadded:: 1.74.0
+    '''
+    methods = ([amplitude] if isinstance(amplitude, six.string_types)
+               else list(amplitude))
+    for method_i in methods:
+        if method_i not in AMPLITUDE_METHODS:
+            raise NameError('Unknown amplitude calculation method `%s`.' %
+                            method_i)
+    if on_device and set(methods) != set(['percentile_difference']):
+        raise ValueError('Only `percentile_difference` amplitude may be '
+                         'computed on the device.')
+    return methods
+
+
+def _hv_feedback_voltage(analog_value):
+    '''
+    Convert high-voltage feedback analog reading to actuation voltage (RMS).
 
-        [drop 0 channel count][drop 0: channel 0, channel 1, ...][drop 1 channel count][drop 1: channel 0, channel 1, ...]
+    .. versionadded:: 1.74.0
+    '''
+    # Divide by 2 to convert from peak-to-peak to RMS.
+    return analog_value / 2.0 ** 16 * 3.3 * 2e6 / 20e3 / 2.0
 
-    into a list of `numpy.array` channels lists.
 
+def _set_packed_channels(packed_channels, on=None, off=None):
+    '''
+    Set the state of the specified channels in a packed channel states array
+    (8 channels per byte, where the least significant bit of byte 0 is
+    channel 0).
+
+    Parameters
+    ----------
+    packed_channels : numpy.ndarray
+        Packed channel states (``uint8``).  Not modified.
+    on, off : list-like, optional
+        Channels to turn on and off, respectively.  Channels listed in both
+        are turned on.
 
     Returns
     -------
-    list<numpy.array>
-        List of channels lists, each channel list corresponding to channels
-        covered by a drop.
+    numpy.ndarray
+        Packed channel states with the specified channels set.
+
+
+    .. versionadded:: 1.74.0
     '''
-    drops = []
-    i = 0
-    while i < packed_drops.shape[0]:
-        drop_j_size = packed_drops[i]
-        start_j = i + 1
-        end_j = start_j + drop_j_size
-        drop_j = packed_drops[i + 1:end_j]
-        drops.append(drop_j)
-        i = end_j
-    return drops
+    packed_channels = np.array(packed_channels, dtype='uint8')
+    for channels, set_ in ((off, False), (on, True)):
+        if channels is None:
+            continue
+        channels = np.asarray(channels, dtype=int)
+        bits = np.left_shift(1, channels & 0x07).astype('uint8')
+        if set_:
+            np.bitwise_or.at(packed_channels, channels >> 3, bits)
+        else:
+            np.bitwise_and.at(packed_channels, channels >> 3, ~bits)
+    return packed_channels
 
 
 try:
@@ -109,6 +202,12 @@ try:
                 Synchronize device millisecond counter to UTC time upon making
                 a connection (and on any subsequent *reconnection*).
 
+            .. versionchanged:: 1.74.0
+                Keep host-side shadow copies of device state and config (see
+                :meth:`invalidate_cache`).  Add ``clock_refresh_interval_s``
+                parameter and add ``host_time`` to ``capacitance-updated``
+                and ``capacitance-exceeded`` messages (see :attr:`clock`).
+
 
             Parameters
             ----------
@@ -128,9 +227,19 @@ try:
 
                 Default is to raise all exceptions encountered during
                 initialization.
+            clock_refresh_interval_s : float, optional
+                Interval between device clock samples (see
+                :meth:`refresh_clock`).  If ``None``, the device clock is
+                only sampled upon connection.
             '''
             self.transaction_lock = threading.RLock()
             self.__number_of_channels = 0
+            self.invalidate_cache()
+            #: Model of device microsecond counter relative to host time.
+            self.clock = DeviceClock()
+            self._clock_stop = None
+            clock_refresh_interval_s = kwargs.pop('clock_refresh_interval_s',
+                                                  60.)
             try:
                 # Get list of exception types to ignore.
                 #
@@ -172,8 +281,12 @@ try:
                 self.signals.signal('connected').connect(lambda *args:
                                                          self.sync_time(),
                                                          weak=False)
+                self._connect_cache_signals()
+                self._connect_clock_signals()
 
                 self.signals.signal('connected').send({'event': 'connected'})
+                if clock_refresh_interval_s:
+                    self._start_clock_refresh(clock_refresh_interval_s)
             except Exception:
                 logger.debug('Error connecting to device.', exc_info=True)
                 self.terminate()
@@ -187,10 +300,320 @@ try:
             .. versionadded:: 1.71.0
                 Wrap parent :meth:`initialize_switching_boards()` to cache
                 number of available channels.
+
+            .. versionchanged:: 1.74.0
+                Invalidate cached state (i.e., ``channel_count``) and cached
+                channel states.
             '''
             self.__number_of_channels = self._initialize_switching_boards()
+            self._state_cache = None
+            self._channel_states_cache = None
+            self._disabled_channels_cache = None
             return self.__number_of_channels
 
+        def invalidate_cache(self):
+            '''
+            Discard host-side shadow copies of device state and config.
+
+            State and config are cached the first time they are read from the
+            device and kept up to date by :meth:`update_state` and
+            :meth:`update_config`.  Likewise, the packed channel states and
+            disabled channels mask are kept up to date by
+            :meth:`set_state_of_channels` and
+            :meth:`set_disabled_channels_mask`.  Cached copies are also
+            updated when events indicate that the firmware itself changed the
+            state (e.g., ``halted`` disables the high-voltage output and all
+            channels), and discarded when the connection is (re-)established.
+
+            Call this method if the device state or config may have been
+            changed by other means.
+
+
+            .. versionadded:: 1.74.0
+            '''
+            self._state_cache = None
+            self._config_cache = None
+            self._channel_states_cache = None
+            self._disabled_channels_cache = None
+
+        def _connect_cache_signals(self):
+            '''
+            Update cached state based on events indicating the firmware has
+            modified its own state.
+
+            .. versionadded:: 1.74.0
+            '''
+            def _on_halted(message):
+                # Firmware `halt()` disables high voltage output and all
+                # channels.
+                state = self._state_cache
+                if state is not None:
+                    state.hv_output_enabled = False
+                self._channel_states_cache = None
+                self._disabled_channels_cache = None
+
+            def _on_capacitance_exceeded(message):
+                # Firmware resets target capacitance once exceeded.
+                state = self._state_cache
+                if state is not None:
+                    state.target_capacitance = 0
+
+            def _on_capacitance_steady(message):
+                # Firmware resets steady state criteria once steady.
+                state = self._state_cache
+                if state is not None:
+                    state.steady_state_rel_std = 0
+
+            def _on_channels_updated(message):
+                # Actuated channels are a subset of the requested channels
+                # (i.e., excluding disabled channels), and include _all_
+                # actuated channels.
+                #
+                # XXX Replace (rather than modify) cached array since event
+                # may be handled while another thread is setting channels.
+                actuated = message.get('actuated', [])
+                packed = np.zeros(self.number_of_channels // 8,
+                                  dtype='uint8')
+                self._channel_states_cache = _set_packed_channels(packed,
+                                                                  actuated)
+
+            def _on_capacitance_records(records):
+                # See `_on_capacitance_exceeded` and `_on_capacitance_steady`.
+                state = self._state_cache
+                if state is not None:
+                    events = set(EVENT_TYPES.get(type_) for type_ in
+                                 np.unique(records['type']).tolist())
+                    if 'capacitance-exceeded' in events:
+                        state.target_capacitance = 0
+                    if 'capacitance-steady' in events:
+                        state.steady_state_rel_std = 0
+
+            def _on_actuation_step(message):
+                # Actuation program sets channels on the device.
+                self._channel_states_cache = None
+
+            self.signals.signal('connected')\
+                .connect(lambda *args: self.invalidate_cache(), weak=False)
+            self.signals.signal('halted').connect(_on_halted, weak=False)
+            self.signals.signal('capacitance-exceeded')\
+                .connect(_on_capacitance_exceeded, weak=False)
+            self.signals.signal('capacitance-steady')\
+                .connect(_on_capacitance_steady, weak=False)
+            self.signals.signal('capacitance-records')\
+                .connect(_on_capacitance_records, weak=False)
+            self.signals.signal('channels-updated')\
+                .connect(_on_channels_updated, weak=False)
+            for name in ('actuation-step-completed', 'actuation-step-timeout'):
+                self.signals.signal(name).connect(_on_actuation_step,
+                                                  weak=False)
+
+        def _connect_clock_signals(self):
+            '''
+            Resample device clock upon connection and add ``host_time`` to
+            messages with a device ``time_us`` timestamp.
+
+            .. versionadded:: 1.74.0
+            '''
+            def _on_connected(*args):
+                # Device counter restarts if the device was reset.
+                self.clock.reset()
+                self.refresh_clock()
+
+            def _on_time_us_event(message):
+                message['host_time'] = \
+                    self.clock.host_time(message['time_us'])
+
+            self.signals.signal('connected').connect(_on_connected,
+                                                     weak=False)
+            for name in ('capacitance-updated', 'capacitance-exceeded',
+                         'capacitance-steady', 'actuation-step-completed',
+                         'actuation-step-timeout', 'channels-scanned'):
+                self.signals.signal(name).connect(_on_time_us_event,
+                                                  weak=False)
+
+        def _start_clock_refresh(self, interval_s):
+            stop = self._clock_stop = threading.Event()
+            # Thread only holds weak reference to proxy.
+            proxy_ref = weakref.ref(self)
+
+            def _run():
+                while not stop.wait(interval_s):
+                    proxy = proxy_ref()
+                    if proxy is None:
+                        break
+                    try:
+                        proxy.refresh_clock()
+                    except Exception:
+                        logger.debug('Error sampling device clock.',
+                                     exc_info=True)
+                    del proxy
+
+            thread = threading.Thread(target=_run)
+            thread.daemon = True
+            thread.start()
+
+        def refresh_clock(self):
+            '''
+            Sample device microsecond counter and update :attr:`clock` model
+            fit (i.e., offset and drift relative to host time).
+
+            Called upon connection and periodically (see
+            ``clock_refresh_interval_s`` constructor argument).
+
+            Returns
+            -------
+            float
+                Round-trip time of sample in seconds.
+
+
+            .. versionadded:: 1.74.0
+            '''
+            with self.transaction_lock:
+                start = time.time()
+                time_us = self.microseconds()
+                end = time.time()
+            # Assume counter was read half-way through the round trip.
+            self.clock.add_sample(.5 * (start + end), time_us)
+            return end - start
+
+        def terminate(self):
+            '''
+            .. versionadded:: 1.74.0
+                Stop periodic device clock sampling.
+            '''
+            stop = getattr(self, '_clock_stop', None)
+            if stop is not None:
+                stop.set()
+            super(ProxyMixin, self).terminate()
+
+        @property
+        def _state_pb(self):
+            '''
+            .. versionadded:: 1.74.0
+                Return cached state (only read from the device if no cached
+                copy is available).
+            '''
+            state = self._state_cache
+            if state is None:
+                state = super(ProxyMixin, self)._state_pb
+                self._state_cache = state
+            return state
+
+        @property
+        def _config_pb(self):
+            '''
+            .. versionadded:: 1.74.0
+                Return cached config (only read from the device if no cached
+                copy is available).
+            '''
+            config = self._config_cache
+            if config is None:
+                config = super(ProxyMixin, self)._config_pb
+                self._config_cache = config
+            return config
+
+        def update_state(self, **kwargs):
+            '''
+            .. versionadded:: 1.74.0
+                Update cached state to match.
+            '''
+            with self.transaction_lock:
+                result = super(ProxyMixin, self).update_state(**kwargs)
+                state = self._state_cache
+                if not result:
+                    # Update may have been partially applied.
+                    self._state_cache = None
+                elif state is not None:
+                    state.MergeFrom(self.state_class(**kwargs))
+            return result
+
+        def update_config(self, **kwargs):
+            '''
+            .. versionadded:: 1.74.0
+                Update cached config to match.
+            '''
+            with self.transaction_lock:
+                config_kwargs = dict((k, v) for k, v in kwargs.items()
+                                     if k != 'save')
+                result = super(ProxyMixin, self).update_config(**kwargs)
+                config = self._config_cache
+                if not result:
+                    self._config_cache = None
+                elif config is not None:
+                    config.MergeFrom(self.config_class(**config_kwargs))
+            return result
+
+        def reset_config(self, **kwargs):
+            '''
+            .. versionadded:: 1.74.0
+                Invalidate cached config.
+            '''
+            try:
+                return super(ProxyMixin, self).reset_config(**kwargs)
+            finally:
+                self._config_cache = None
+
+        def set_id(self, id):
+            '''
+            .. versionadded:: 1.74.0
+                Invalidate cached config.
+            '''
+            try:
+                return super(ProxyMixin, self).set_id(id)
+            finally:
+                self._config_cache = None
+
+        def halt(self):
+            '''
+            .. versionadded:: 1.74.0
+                Update cached state (i.e., high voltage output is disabled).
+            '''
+            result = super(ProxyMixin, self).halt()
+            state = self._state_cache
+            if state is not None:
+                state.hv_output_enabled = False
+            return result
+
+        def enable_event(self, event):
+            '''
+            .. versionadded:: 1.74.0
+                Invalidate cached state (i.e., ``event_mask``).
+            '''
+            try:
+                return super(ProxyMixin, self).enable_event(event)
+            finally:
+                self._state_cache = None
+
+        def disable_event(self, event):
+            '''
+            .. versionadded:: 1.74.0
+                Invalidate cached state (i.e., ``event_mask``).
+            '''
+            try:
+                return super(ProxyMixin, self).disable_event(event)
+            finally:
+                self._state_cache = None
+
+        def enable_events(self):
+            '''
+            .. versionadded:: 1.74.0
+                Invalidate cached state (i.e., ``event_mask``).
+            '''
+            try:
+                return super(ProxyMixin, self).enable_events()
+            finally:
+                self._state_cache = None
+
+        def disable_events(self):
+            '''
+            .. versionadded:: 1.74.0
+                Invalidate cached state (i.e., ``event_mask``).
+            '''
+            try:
+                return super(ProxyMixin, self).disable_events()
+            finally:
+                self._state_cache = None
+
         def _connect(self, *args, **kwargs):
             '''
             .. versionadded:: 1.55
@@ -200,6 +623,7 @@ try:
                 but subsequent restored connection events after connecting to
                 the ``connected`` signal will be received.
             '''
+            self.invalidate_cache()
             super(ProxyMixin, self)._connect(*args, **kwargs)
             self.signals.signal('connected').send({'event': 'connected'})
 
@@ -233,12 +657,155 @@ try:
             '''
             return self._packet_queue_manager.signals
 
-        def i2c_eeprom_write(self, i2c_address, eeprom_address, data):
+        def subscribe(self, name, receiver=None, loop=None):
+            '''
+            Subscribe to signal for the duration of a ``with`` block.
+
+            Parameters
+            ----------
+            name : str
+                Signal name, e.g., ``"capacitance-updated"``.
+            receiver : callable, optional
+                Function called with each message.  If not specified,
+                messages are retrieved using the
+                :meth:`~dropbot.subscription.Subscription.get` coroutine.
+            loop : asyncio.BaseEventLoop, optional
+                Event loop for :meth:`~dropbot.subscription.Subscription.get`.
+
+            Returns
+            -------
+            dropbot.subscription.Subscription
+                Subscription context manager.  Receiver is disconnected upon
+                exiting the ``with`` block.
+
+
+            .. versionadded:: 1.74.0
+            '''
+            from .subscription import subscribe
+
+            return subscribe(self.signals.signal(name), receiver=receiver,
+                             loop=loop)
+
+        def capacitance_stream(self, maxlen=100, policy='drop-oldest',
+                               loop=None):
+            '''
+            Stream of ``capacitance-updated`` messages, read in batches.
+
+            Capacitance updates are only sent while the
+            ``capacitance_update_interval_ms`` state field is non-zero.
+
+            Parameters
+            ----------
+            maxlen : int, optional
+                Maximum number of buffered messages.
+            policy : str, optional
+                Either ``"drop-oldest"`` (discard oldest buffered message) or
+                ``"block"`` (block serial thread until next read) when
+                :data:`maxlen` messages are buffered.
+            loop : asyncio.BaseEventLoop, optional
+                Event loop that the stream is read in.
+
+            Returns
+            -------
+            dropbot.subscription.MessageStream
+                Stream context manager.
+
+            Example
+            -------
+
+                >>> proxy.update_state(capacitance_update_interval_ms=10)
+                >>> with proxy.capacitance_stream(maxlen=100) as stream:
+                ...     while True:
+                ...         messages = yield asyncio.From(stream.read())
+                ...         ...
+
+
+            .. versionadded:: 1.74.0
+            '''
+            from .subscription import MessageStream
+
+            return MessageStream(self.signals.signal('capacitance-updated'),
+                                 maxlen=maxlen, policy=policy, loop=loop)
+
+        @property
+        def binary_event_dispatcher(self):
+            '''
+            Dispatcher of binary event records received from the device (see
+            :meth:`enable_binary_events`).
+
+            .. versionadded:: 1.74.0
+            '''
+            dispatcher = getattr(self, '_binary_event_dispatcher', None)
+            if dispatcher is None:
+                dispatcher = BinaryEventDispatcher(self.signals)
+                self._binary_event_dispatcher = dispatcher
+            elif dispatcher.signals is not self.signals:
+                # Signals namespace may be replaced upon reconnection.
+                dispatcher.signals = self.signals
+            return dispatcher
+
+        def enable_binary_events(self, messages=True):
+            '''
+            Send ``capacitance-updated``, ``capacitance-exceeded`` and
+            ``capacitance-steady`` events as binary records rather than JSON
+            (see :mod:`dropbot.binary_events`).
+
+            Records are sent in batches (as a NumPy record array) using the
+            ``capacitance-records`` signal.
+
+            Parameters
+            ----------
+            messages : bool, optional
+                If ``True``, also send each record as an event message (e.g.,
+                using the ``capacitance-updated`` signal), for compatibility
+                with existing receivers.
+
+            Returns
+            -------
+            bool
+                ``True`` if device state was updated.
+
+
+            .. versionadded:: 1.74.0
+            '''
+            self.binary_event_dispatcher.messages = messages
+            self._start_binary_events()
+            return self.update_state(binary_events=True)
+
+        def disable_binary_events(self):
+            '''
+            Send capacitance events as JSON (i.e., the default).
+
+            .. versionadded:: 1.74.0
+            '''
+            result = self.update_state(binary_events=False)
+            self._stop_binary_events()
+            return result
+
+        def _start_binary_events(self):
+            '''
+            Start passing binary event record packets received from the device
+            to :attr:`binary_event_dispatcher`.
+
+            Overridden by proxies which receive stream packets in a queue
+            (e.g., :class:`dropbot.proxy_py3.SerialProxy`).
+
+            .. versionadded:: 1.74.0
+            '''
+            pass
+
+        def _stop_binary_events(self):
+            pass
+
+        def i2c_eeprom_write(self, i2c_address, eeprom_address, data,
+                             page_size=16, verify=False, timeout_ms=20):
             '''
             Write data to specified address in I2C EEPROM chip.
 
-            If the number of bytes exceeds the maximum I2C packet size,
-            multiple requests will be made automatically.
+            Data is split into chunks aligned to EEPROM page boundaries, and
+            each chunk is written with a single page write.  After each page
+            write, the DropBot polls the EEPROM until the internal write
+            cycle has completed (see :meth:`i2c_eeprom_write_page`).
 
             Parameters
             ----------
@@ -250,15 +817,55 @@ try:
                 Address to write data to in EEPROM.
             data : list-like
                 Bytes to write to :data:`eeprom_address`
+            page_size : int, optional
+                EEPROM page (i.e., write buffer) size in bytes.
+            verify : bool, optional
+                If ``True``, read data back from EEPROM and verify it matches
+                :data:`data`.
+            timeout_ms : int, optional
+                Maximum time to wait for each page write cycle to complete.
+
+            Raises
+            ------
+            IOError
+                If the EEPROM does not acknowledge a page write or the write
+                cycle does not complete within :data:`timeout_ms`.
+            CommunicationError
+                If :data:`verify` is ``True`` and the data read back from the
+                EEPROM does not match :data:`data`.
+
+
+            .. versionchanged:: 1.74.0
+                Write each byte once, in page-aligned chunks, and wait for each
+                write cycle to complete.  Add :data:`page_size`,
+                :data:`verify` and :data:`timeout_ms` keyword arguments.
             '''
-            i2c_packet_size = 16
-            for i in range(int(math.ceil(len(data) / float(i2c_packet_size)))):
-                start = i * i2c_packet_size
-                end = min((i + 1) * i2c_packet_size, len(data))
-                self.i2c_write(i2c_address, [eeprom_address + start] +
-                               (end - start) * [255])
-                self.i2c_write(i2c_address, [eeprom_address + start] +
-                               data[start:end])
+            data = np.asarray(data, dtype='uint8')
+            start = 0
+            while start < data.size:
+                address = eeprom_address + start
+                # Page writes wrap around within the page, so never cross a
+                # page boundary.
+                end = min(start + page_size - address % page_size, data.size)
+                result = self.i2c_eeprom_write_page(i2c_address, address,
+                                                    data[start:end],
+                                                    timeout_ms)
+                if result == -1:
+                    raise IOError('EEPROM 0x%02x did not acknowledge write '
+                                  'to address %d.' % (i2c_address, address))
+                elif result < 0:
+                    raise IOError('Timed out waiting for EEPROM 0x%02x write '
+                                  'cycle at address %d.' % (i2c_address,
+                                                             address))
+                start = end
+
+            if verify:
+                data_read = self.i2c_eeprom_read(i2c_address, eeprom_address,
+                                                 data.size)
+                if not np.array_equal(data_read, data):
+                    raise CommunicationError('Data read back from EEPROM '
+                                             '0x%02x does not match data '
+                                             'written.' % i2c_address)
 
         def i2c_eeprom_read(self, i2c_address, eeprom_address, length):
             '''
@@ -358,6 +965,94 @@ try:
                                    self).channel_capacitances(channels),
                              index=channels)
 
+        @property
+        def channel_scan_mask(self):
+            '''
+            Channels included in periodic channel capacitance scan (see
+            :meth:`start_channel_scan`), as an array with one entry (0 or 1)
+            per channel.
+
+
+            .. versionadded:: 1.74.0
+            '''
+            return np.unpackbits(super(ProxyMixin, self)
+                                 .channel_scan_mask()[::-1])[::-1]
+
+        @channel_scan_mask.setter
+        def channel_scan_mask(self, mask):
+            self.set_channel_scan_mask(mask)
+
+        def set_channel_scan_mask(self, mask):
+            '''
+            Pack array containing one entry per channel to bytes (8 channels
+            per byte).  Set channel scan mask on device using mask bytes.
+
+            See also: `channel_scan_mask` (get)
+
+
+            .. versionadded:: 1.74.0
+            '''
+            mask = np.asarray(mask)
+            if len(mask) != self.number_of_channels:
+                raise ValueError('Error setting channel scan mask.  Check '
+                                 'size of mask matches channel count.')
+            return super(ProxyMixin, self).set_channel_scan_mask(
+                np.packbits(mask.astype(int)[::-1])[::-1])
+
+        def start_channel_scan(self, interval_ms, channels=None):
+            '''
+            Periodically measure the capacitance of each of the specified
+            channels on the device.
+
+            After each scan, the device sends a ``channels-scanned`` event
+            containing the scanned ``channels``, the respective
+            ``capacitances``, and the ``time_us`` and ``duration_us`` of the
+            scan.  Unlike :meth:`channel_capacitances`, the host is not
+            blocked while channels are scanned.
+
+            Scans are skipped while an actuation program is running.
+
+            Parameters
+            ----------
+            interval_ms : int
+                Interval between scans in milliseconds.
+            channels : list-like, optional
+                Channels to scan (default: all channels).
+
+            Returns
+            -------
+            bool
+                ``True`` if device state was updated.
+
+            See also
+            --------
+            dropbot.channel_scan.ChannelScanBuffer
+
+
+            .. versionadded:: 1.74.0
+
+            .. note::
+                Events must be enabled (see :meth:`enable_events`).
+            '''
+            mask = np.zeros(self.number_of_channels, dtype=int)
+            if channels is None:
+                mask[:] = 1
+            else:
+                mask[np.asarray(channels, dtype=int)] = 1
+            self.set_channel_scan_mask(mask)
+            self.enable_event(EVENT_CHANNELS_SCANNED)
+            return self.update_state(channel_scan_interval_ms=interval_ms)
+
+        def stop_channel_scan(self):
+            '''
+            Stop periodic channel capacitance scan (see
+            :meth:`start_channel_scan`).
+
+
+            .. versionadded:: 1.74.0
+            '''
+            return self.update_state(channel_scan_interval_ms=0)
+
         def reset_C16(self):
             '''
             Reset ``C16`` to default.
@@ -419,7 +1114,8 @@ try:
             logging.info('Calibrated `C16` as %sF', si.si_format(C16_))
             return C16_
 
-        def measure_capacitance(self, n_samples=50, amplitude='filtered_mean'):
+        def measure_capacitance(self, n_samples=50, amplitude='filtered_mean',
+                                voltage=None, on_device=False):
             '''
             Parameters
             ----------
@@ -431,6 +1127,17 @@ try:
                 for more information.  Each value must be one of
                 ``filtered_mean`` or ``percentile_difference``.
 
+                All methods in a list are computed from the same set of
+                analog measurements.
+            voltage : float, optional
+                Actuation voltage (RMS).  If not specified, the actuation
+                voltage is measured using :meth:`measure_voltage`.
+            on_device : bool, optional
+                If ``True``, compute the ``percentile_difference`` amplitude
+                on the DropBot (see :meth:`u16_percentile_diff`), such that
+                only the result (rather than :data:`n_samples` analog
+                measurements) is transferred.
+
             Returns
             -------
             float
@@ -441,42 +1148,114 @@ try:
                 Series is indexed by the specified amplitude calculation
                 methods.
 
+            Raises
+            ------
+            ValueError
+                If :data:`on_device` is ``True`` and an amplitude calculation
+                method other than ``percentile_difference`` is specified.
+
             .. versionchanged:: 1.41
                 Add :data:`amplitude` keyword argument.  See `issue #25 <https://gitlab.com/sci-bots/dropbot.py/issues/25>`_
                 for more information.
+            .. versionchanged:: 1.74.0
+                Compute amplitudes directly from raw ``uint16`` analog
+                measurements (i.e., without constructing
+                :class:`pandas.DataFrame` instances).  Add :data:`voltage` and
+                :data:`on_device` keyword arguments.  If :data:`voltage` is
+                not specified, measure actuation voltage in the same request
+                as the chip load feedback (see
+                :meth:`measure_capacitance_voltage`).
+            '''
+            if voltage is None:
+                result = self.measure_capacitance_voltage(n_samples=n_samples,
+                                                          amplitude=amplitude,
+                                                          on_device=on_device)
+                return result['capacitance']
+
+            methods = _amplitude_methods(amplitude, on_device)
+            if on_device:
+                counts = self.u16_percentile_diff(11, n_samples, 25, 75)
+                values = np.full(len(methods), .5 * counts)
+            else:
+                samples = self.analog_reads_simple(11, n_samples)
+                values = _amplitudes(samples, methods)
+            return self._feedback_capacitance(values, voltage, amplitude)
+
+        def measure_capacitance_voltage(self, n_samples=50,
+                                        amplitude='filtered_mean',
+                                        on_device=False, raw=False):
             '''
-            df_volts = pd.DataFrame({'volts':
-                                     self.analog_reads_simple(11, n_samples) *
-                                     3.3 / 2**16})
+            Measure chip load capacitance and actuation voltage in a single
+            request.
 
-            singleton = False
+            The actuation voltage is sampled immediately after the chip load
+            feedback, so the capacitance and voltage are consistent, e.g.,
+            for calibration.
 
-            if isinstance(amplitude, six.string_types):
-                amplitude = [amplitude]
-                singleton = True
-
-            values = []
-            for method_i in amplitude:
-                if method_i == 'filtered_mean':
-                    v_gnd = np.mean(df_volts)
-                    v_abs = np.abs(df_volts - v_gnd)
-                    v_abs_mean = np.mean(v_abs)
-                    filter_th = v_abs_mean * 1.5
-                    amplitude_i = np.mean(v_abs[v_abs < filter_th])['volts']
-                elif method_i == 'percentile_difference':
-                    volts_description = df_volts['volts'].describe()
-                    amplitude_i = .5 * (volts_description['75%'] -
-                                        volts_description['25%'])
-                else:
-                    raise NameError('Unknown amplitude calculation method '
-                                    '`%s`.' % method_i)
-                values.append(amplitude_i)
+            Parameters
+            ----------
+            n_samples : int, optional
+                Number of analog measurements to sample for the capacitance
+                calculation.
+            amplitude : str or list, optional
+                The amplitude calculation method(s) (see
+                :meth:`measure_capacitance`).
+            on_device : bool, optional
+                If ``True``, compute the ``percentile_difference`` amplitude
+                on the DropBot, such that only the result is transferred.
+            raw : bool, optional
+                If ``True``, include raw chip load feedback analog
+                measurements in result (only if :data:`on_device` is
+                ``False``).
 
-            if not singleton:
-                value = pd.Series(values, index=amplitude)
+            Returns
+            -------
+            dict
+                ``time_us``: DropBot microsecond counter at start of
+                acquisition.
+
+                ``voltage``: Actuation voltage (RMS).
+
+                ``capacitance``: Capacitance as :class:`float` if a single
+                amplitude calculation method is specified; otherwise, a
+                :class:`pandas.Series` indexed by method.
+
+                ``samples``: Raw ``uint16`` chip load feedback analog
+                measurements (only if :data:`raw` is ``True``).
+
+
+            .. versionadded:: 1.74.0
+            '''
+            methods = _amplitude_methods(amplitude, on_device)
+            data = self.chip_load_feedback(n_samples, on_device)
+            time_us = int(data[0]) | (int(data[1]) << 16)
+            voltage = _hv_feedback_voltage(data[2])
+            if on_device:
+                values = np.full(len(methods), .5 * data[3])
             else:
-                value = values[0]
-            return value / self.measure_voltage() * self.config.C16
+                samples = data[3:]
+                values = _amplitudes(samples, methods)
+            result = {'time_us': time_us, 'voltage': voltage,
+                      'capacitance': self._feedback_capacitance(values,
+                                                                voltage,
+                                                                amplitude)}
+            if raw and not on_device:
+                result['samples'] = samples
+            return result
+
+        def _feedback_capacitance(self, amplitudes, voltage, amplitude):
+            '''
+            Convert chip load feedback amplitude(s) (in analog counts) to
+            capacitance.
+
+            .. versionadded:: 1.74.0
+            '''
+            # Convert from analog counts to volts and from volts to farads.
+            values = amplitudes * (3.3 / 2 ** 16 / voltage *
+                                   self._config_pb.C16)
+            if isinstance(amplitude, six.string_types):
+                return values[0]
+            return pd.Series(values, index=list(amplitude))
 
         def get_environment_state(self, i2c_address=0x27):
             '''
@@ -516,7 +1295,11 @@ try:
 
         @property
         def frequency(self):
-            return self.state['frequency']
+            '''
+            .. versionchanged:: 1.74.0
+                Read from cached state.
+            '''
+            return self._state_pb.frequency
 
         @frequency.setter
         def frequency(self, value):
@@ -527,11 +1310,10 @@ try:
             '''
             .. versionadded:: 1.39
             '''
-            return 1.5 / 2.0 * (2e6 / self.config['R7'] + 1)
+            return 1.5 / 2.0 * (2e6 / self._config_pb.R7 + 1)
 
         def measure_voltage(self):
-            # divide by 2 to convert from peak-to-peak to rms
-            return self.analog_read(1) / 2.0**16 * 3.3 * 2e6 / 20e3 / 2.0
+            return _hv_feedback_voltage(self.analog_read(1))
 
         def measure_input_current(self, n=2000):
             i = self.analog_reads_simple(3, n) / 2.0**16 * 3.3 / 0.03
@@ -568,7 +1350,11 @@ try:
 
         @property
         def voltage(self):
-            return self.state['voltage']
+            '''
+            .. versionchanged:: 1.74.0
+                Read from cached state.
+            '''
+            return self._state_pb.voltage
 
         @voltage.setter
         def voltage(self, value):
@@ -576,24 +1362,35 @@ try:
             .. versionchanged:: 1.66
                 Select and enable high voltage output if it is not currently
                 enabled.
+
+            .. versionchanged:: 1.74.0
+                Compare against cached state instead of reading full state
+                from device.
             '''
             with self.transaction_lock:
-                original_state = self.state
+                original_state = self._state_pb
 
                 # Construct required state
-                state = original_state.copy()
-                state.hv_output_enabled = True
-                state.hv_output_selected = True
-                state.voltage = value
-
-                if not (state == original_state).all():
+                state = self.state_class(hv_output_enabled=True,
+                                         hv_output_selected=True,
+                                         voltage=value)
+
+                # Only update modified state properties.
+                changes = dict((field.name, value_i)
+                               for field, value_i in state.ListFields()
+                               if getattr(original_state, field.name) !=
+                               value_i)
+                if changes:
                     # At least one state property must be modified.
-                    # Only update modified state properties.
-                    self.state = state[state != original_state]
+                    self.update_state(**changes)
 
         @property
         def hv_output_enabled(self):
-            return self.state['hv_output_enabled']
+            '''
+            .. versionchanged:: 1.74.0
+                Read from cached state.
+            '''
+            return self._state_pb.hv_output_enabled
 
         @hv_output_enabled.setter
         def hv_output_enabled(self, value):
@@ -601,7 +1398,11 @@ try:
 
         @property
         def hv_output_selected(self):
-            return self.state['hv_output_selected']
+            '''
+            .. versionchanged:: 1.74.0
+                Read from cached state.
+            '''
+            return self._state_pb.hv_output_selected
 
         @hv_output_selected.setter
         def hv_output_selected(self, value):
@@ -657,8 +1458,14 @@ try:
             if len(mask) != self.number_of_channels:
                 raise ValueError('Error setting disabled channels mask.  Check '
                                  'size of mask matches channel count.')
-            super(ProxyMixin, self).set_disabled_channels_mask(
-                      np.packbits(mask.astype(int)[::-1])[::-1])
+            packed = np.packbits(np.asarray(mask).astype(int)[::-1])[::-1]
+            try:
+                super(ProxyMixin, self).set_disabled_channels_mask(packed)
+            finally:
+                # Disabled channels are not actuated (see
+                # `state_of_channels`).
+                self._disabled_channels_cache = None
+                self._channel_states_cache = None
 
         def _state_of_channels(self):
             '''
@@ -672,11 +1479,60 @@ try:
             '''
             return super(ProxyMixin, self).set_state_of_channels(states)
 
+        def _packed_state_of_channels(self):
+            '''
+            Returns
+            -------
+            numpy.ndarray
+                Packed requested channel states (8 channels per byte), read
+                from the device only if no cached copy is available.
+
+
+            .. versionadded:: 1.74.0
+            '''
+            packed = self._channel_states_cache
+            if packed is None:
+                packed = np.array(self._state_of_channels(), dtype='uint8')
+                self._channel_states_cache = packed
+            return packed
+
+        def _packed_disabled_channels(self):
+            '''
+            Returns
+            -------
+            numpy.ndarray
+                Packed disabled channels mask (8 channels per byte), read from
+                the device only if no cached copy is available.
+
+
+            .. versionadded:: 1.74.0
+            '''
+            packed = self._disabled_channels_cache
+            if packed is None:
+                packed = np.array(self._disabled_channels_mask(),
+                                  dtype='uint8')
+                self._disabled_channels_cache = packed
+            return packed
+
+        def turn_off_all_channels(self):
+            '''
+            .. versionadded:: 1.74.0
+                Clear cached channel states.
+            '''
+            with self.transaction_lock:
+                try:
+                    result = super(ProxyMixin, self).turn_off_all_channels()
+                except Exception:
+                    self._channel_states_cache = None
+                    raise
+                self._channel_states_cache = \
+                    np.zeros(self.number_of_channels // 8, dtype='uint8')
+            return result
+
         @property
         def state_of_channels(self):
             '''
-            Retrieve the state bytes from the device and unpack them into an
-            array with one entry per channel.
+            Unpack the state bytes into an array with one entry per channel.
 
             Notes
             -----
@@ -693,9 +1549,14 @@ try:
 
             .. versionchanged:: 1.56
                 Return channels as `pandas.Series` instance.
+            .. versionchanged:: 1.74.0
+                Unpack cached channel states (only read from the device if no
+                cached copy is available).  As when read from the device,
+                disabled channels are reported as off.
             '''
-            return pd.Series(np.unpackbits(super(ProxyMixin, self)
-                                           .state_of_channels()[::-1])[::-1])
+            packed = self._packed_state_of_channels() & \
+                ~self._packed_disabled_channels()
+            return pd.Series(np.unpackbits(packed[::-1])[::-1])
 
         @state_of_channels.setter
         def state_of_channels(self, states):
@@ -737,23 +1598,192 @@ try:
             .. versionchanged:: 1.73.2
                 Add ``verify`` keyword argument.  Remove call to deprecated
                 :meth:`reset_switching_boards()`.
+            .. versionchanged:: 1.74.0
+                Apply appended states to cached channel states, i.e., do not
+                read channel states from the device before writing.
             '''
             N = self.number_of_channels
-            if isinstance(states, pd.Series):
-                if len(states) == N or not append:
-                    channel_states = np.zeros(N, dtype=int)
+            with self.transaction_lock:
+                if isinstance(states, pd.Series):
+                    if len(states) == N or not append:
+                        packed = np.zeros(N // 8, dtype='uint8')
+                    else:
+                        packed = self._packed_state_of_channels()
+                    values = states.values.astype(bool)
+                    channels = states.index.values
+                    state_bits = _set_packed_channels(packed,
+                                                      channels[values],
+                                                      channels[~values])
                 else:
-                    channel_states = self.state_of_channels
-                channel_states[states.index] = states
-                states = channel_states
-            else:
-                states = np.asarray(states, dtype=int)
+                    states = np.asarray(states, dtype=int)
+                    state_bits = np.packbits(states[::-1])[::-1]
+
+                try:
+                    result = super(ProxyMixin,
+                                   self).set_state_of_channels(state_bits)
+                except Exception:
+                    self._channel_states_cache = None
+                    raise
+                if not result:
+                    raise ValueError('Error setting state of channels.  Check '
+                                     'number of states matches channel '
+                                     'count.')
+                self._channel_states_cache = state_bits
+
+        def update_channels(self, on=None, off=None):
+            '''
+            Turn the specified channels on and/or off, leaving the state of all
+            other channels unchanged.
+
+            Only the listed channels are sent to the DropBot, and only
+            switching board registers with a changed output are written.
+            This is much cheaper than :meth:`set_state_of_channels` when only
+            a few channels change, e.g., when moving a drop.
+
+            Parameters
+            ----------
+            on : list-like, optional
+                Channels to turn on.
+            off : list-like, optional
+                Channels to turn off.  Channels listed in both :data:`on` and
+                :data:`off` are turned on.
+
+            Returns
+            -------
+            int
+                Number of switching board output registers written.
+
+            Raises
+            ------
+            ValueError
+                If any channel is not less than :attr:`number_of_channels`.
+
+            Example
+            -------
+
+                >>> # Move drop from channel 10 to channel 11.
+                >>> proxy.update_channels(on=[11], off=[10])
+
 
-            state_bits = np.packbits(states.astype(int)[::-1])[::-1]
-            if not super(ProxyMixin,
-                            self).set_state_of_channels(state_bits):
-                raise ValueError('Error setting state of channels.  Check '
-                                 'number of stateappends matches channel count.')
+            .. versionadded:: 1.74.0
+            '''
+            on = np.unique(np.asarray([] if on is None else on, dtype='uint8'))
+            off = np.unique(np.asarray([] if off is None else off,
+                                       dtype='uint8'))
+            if not on.size and not off.size:
+                return 0
+            with self.transaction_lock:
+                try:
+                    result = super(ProxyMixin, self).update_channels(on, off)
+                except Exception:
+                    self._channel_states_cache = None
+                    raise
+                if result < 0:
+                    raise ValueError('Error updating channels.  Check channel '
+                                     'numbers are less than the number of '
+                                     'channels.')
+                packed = self._channel_states_cache
+                if packed is not None:
+                    self._channel_states_cache = \
+                        _set_packed_channels(packed, on, off)
+            return result
+
+        def run_actuation_program(self, steps):
+            '''
+            Load and start an actuation program, i.e., a sequence of channel
+            actuations run by the DropBot without a request from the host for
+            each step.
+
+            Each step actuates the step channels (replacing any previously
+            actuated channels) and completes once the minimum duration has
+            passed and all specified completion criteria are met.  An
+            ``actuation-step-completed`` event is sent as each step completes.
+            If a step times out, an ``actuation-step-timeout`` event is sent
+            instead and the program is stopped.
+
+            Step criteria are evaluated on each periodic capacitance reading,
+            i.e., only while the high-voltage output is enabled.
+
+            Parameters
+            ----------
+            steps : pandas.DataFrame or list[dict]
+                One row per step, with the following columns:
+
+                 - ``channels``: list of channels to actuate.
+                 - ``min_duration``: minimum step duration in seconds.
+                 - ``timeout`` (optional): maximum step duration in seconds
+                   (``0`` or ``NaN`` for no timeout).
+                 - ``target_capacitance`` (optional): capacitance (in Farads)
+                   to reach before completing step (``0`` or ``NaN`` to
+                   disable).
+                 - ``steady_state_rel_std`` (optional): maximum relative
+                   standard deviation of capacitance readings within the
+                   last ``min_duration`` before completing step (``0`` or
+                   ``NaN`` to disable).
+
+            Returns
+            -------
+            int
+                Number of steps.
+
+            Raises
+            ------
+            ValueError
+                If the program has too many steps (see
+                :data:`dropbot.simulator.MAX_ACTUATION_PROGRAM_STEPS`).
+
+            Example
+            -------
+
+                >>> # Move drop from channel 10 to channel 11.
+                >>> proxy.run_actuation_program([{'channels': [10, 11],
+                ...                               'min_duration': .3,
+                ...                               'steady_state_rel_std': .02,
+                ...                               'timeout': 5},
+                ...                              {'channels': [11],
+                ...                               'min_duration': .3,
+                ...                               'steady_state_rel_std': .02,
+                ...                               'timeout': 5}])
+                2
+
+
+            .. versionadded:: 1.74.0
+            '''
+            defaults = {'timeout': 0, 'target_capacitance': 0,
+                        'steady_state_rel_std': 0}
+            steps = pd.DataFrame(steps)
+            for column, default in defaults.items():
+                if column not in steps:
+                    steps[column] = default
+            steps = steps.fillna(defaults)
+
+            N = self.number_of_channels
+            empty = np.zeros(N // 8, dtype='uint8')
+            channel_states = np.concatenate([empty[:0]] +
+                                            [_set_packed_channels(empty,
+                                                                  channels)
+                                             for channels in
+                                             steps['channels']])
+
+            def _to_ms(seconds):
+                return np.round(np.asarray(seconds, dtype=float) *
+                                1e3).astype('uint32')
+
+            with self.transaction_lock:
+                # Actuation program sets channels on the device.
+                self._channel_states_cache = None
+                result = super(ProxyMixin, self)\
+                    .run_actuation_program(channel_states,
+                                           _to_ms(steps['min_duration']),
+                                           _to_ms(steps['timeout']),
+                                           steps['target_capacitance']
+                                           .values.astype('float32'),
+                                           steps['steady_state_rel_std']
+                                           .values.astype('float32'))
+            if result < 0:
+                raise ValueError('Error loading actuation program.  Check '
+                                 'the number of steps.')
+            return result
 
         def reset_switching_boards(self):
             '''
@@ -772,7 +1802,11 @@ try:
 
         @property
         def id(self):
-            return self.config['id']
+            '''
+            .. versionchanged:: 1.74.0
+                Read from cached config.
+            '''
+            return self._config_pb.id
 
         @id.setter
         def id(self, id):
@@ -805,7 +1839,17 @@ try:
             return self.__number_of_channels
 
         def detect_shorts(self, delay_ms=5):
-            return super(ProxyMixin, self).detect_shorts(delay_ms).tolist()
+            '''
+            .. versionchanged:: 1.74.0
+                Invalidate cached channel states (the firmware disables
+                shorted channels).
+            '''
+            try:
+                return super(ProxyMixin, self).detect_shorts(delay_ms)\
+                    .tolist()
+            finally:
+                self._channel_states_cache = None
+                self._disabled_channels_cache = None
 
         def _hardware_version(self):
             return super(ProxyMixin, self).hardware_version()
@@ -816,15 +1860,15 @@ try:
 
         @property
         def min_waveform_frequency(self):
-            return self.config['min_frequency']
+            return self._config_pb.min_frequency
 
         @property
         def max_waveform_frequency(self):
-            return self.config['max_frequency']
+            return self._config_pb.max_frequency
 
         @property
         def max_waveform_voltage(self):
-            return self.config['max_voltage']
+            return self._config_pb.max_voltage
 
         @property
         def min_waveform_voltage(self):
@@ -832,22 +1876,34 @@ try:
 
         @property
         def neighbours(self):
-            channel_neighbours = super(ProxyMixin, self).neighbours()
-            N = channel_neighbours.shape[0] / 4
-            index = pd.MultiIndex.from_arrays([np.repeat(range(N), 4),
-                                               ['up', 'down', 'left', 'right']
-                                               * N])
-            channel_neighbours = pd.Series(channel_neighbours, index=index)
-            channel_neighbours.loc[channel_neighbours == 255] = np.nan
-            return channel_neighbours
+            '''
+            Neighbour of each channel, indexed by ``channel`` and
+            ``direction`` (``NaN`` where no neighbour exists).
+
+            May be set using either a ``pandas.Series`` in the same format,
+            or a neighbour table array of shape ``(N, 4)`` (e.g., as returned
+            by :func:`dropbot.chip.get_neighbours_array`).
+
+            .. versionchanged:: 1.74.0
+                Support any number of channels.  Accept neighbour table
+                arrays.
+            '''
+            packed = super(ProxyMixin, self).neighbours()
+            return neighbours_to_series(unpack_neighbours(packed))
 
         @neighbours.setter
         def neighbours(self, value):
-            self.assign_neighbours(value.fillna(-1).astype('uint8').values)
+            if isinstance(value, pd.Series):
+                value = series_to_neighbours(value, self.number_of_channels)
+            self.assign_neighbours(pack_neighbours(value))
 
         @property
         def drops(self):
-            return _unpack_drops(super(ProxyMixin, self).drops())
+            '''
+            .. versionchanged:: 1.74.0
+                Decode using :func:`dropbot.drops.unpack_drops`.
+            '''
+            return unpack_drops(super(ProxyMixin, self).drops())
 
         def get_drops(self, channels=None, capacitance_threshold=0):
             '''
@@ -870,6 +1926,10 @@ try:
                 by contiguous electrode regions (i.e., sets of electrodes that
                 are connected by neighbours where capacitance threshold was
                 also met).
+
+
+            .. versionchanged:: 1.74.0
+                Decode using :func:`dropbot.drops.unpack_drops`.
             '''
             if channels is None:
                 drops_raw = (super(ProxyMixin, self)
@@ -878,7 +1938,7 @@ try:
                 drops_raw = (super(ProxyMixin, self)
                              .get_channels_drops(channels,
                                                  capacitance_threshold))
-            return _unpack_drops(drops_raw)
+            return unpack_drops(drops_raw)
 
 
     class Proxy(ProxyMixin, _Proxy):
@@ -951,6 +2011,7 @@ try:
                 # Restore original timeout duration.
                 self._timeout_s = original_timeout_s
                 self.terminate()
+                self.invalidate_cache()
 
         def reboot(self):
             '''
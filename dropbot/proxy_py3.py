@@ -2,10 +2,14 @@
 from logging_helpers import _L
 import base_node_rpc as bnr
 import base_node_rpc.async
+import six.moves.queue
+import threading
 import time
 
 from .bin.upload import upload
+from .binary_events import BINARY_EVENTS_STREAM_ID
 from .node import Proxy
+from .pipeline import PipelinedCaller, RequestPipeline
 from .proxy_py2 import ProxyMixin
 
 
@@ -15,7 +19,23 @@ class SerialProxy(ProxyMixin, Proxy):
     RPC communication.
     '''
     def __init__(self, settling_time_s=.05, **kwargs):
+        '''
+        .. versionchanged:: 1.74.0
+            Add ``pipeline_depth`` keyword argument.
+
+        Parameters
+        ----------
+        pipeline_depth : int, optional
+            If specified, enable pipelined requests with the specified
+            maximum number of requests in flight (see
+            :meth:`enable_pipeline`).
+        '''
         self.default_timeout = kwargs.pop('timeout', 5)
+        self._pipeline_depth = kwargs.pop('pipeline_depth', None)
+        self._pipelined = None
+        self._pipeline_thread = None
+        self._binary_events_stop = None
+        self._binary_events_thread = None
         port = kwargs.pop('port', None)
         if port is None:
             # Find DropBots
@@ -36,20 +56,198 @@ class SerialProxy(ProxyMixin, Proxy):
         return self.monitor.signals
 
     def connect(self):
+        '''
+        .. versionchanged:: 1.74.0
+            Discard cached device state and config.
+        '''
+        reconnect = self.monitor is not None
         self.terminate()
         monitor = bnr.async.BaseNodeSerialMonitor(port=self.port)
         monitor.start()
         monitor.connected_event.wait()
         self.monitor = monitor
+        self.invalidate_cache()
+        if reconnect:
+            # Signals namespace belongs to the (new) monitor.
+            self._connect_cache_signals()
+        if self._pipeline_depth:
+            self.enable_pipeline(self._pipeline_depth)
         return self.monitor
 
+    def enable_pipeline(self, depth=8):
+        '''
+        Enable pipelined requests.
+
+        While enabled, each request packet is written immediately, tagged
+        with a unique packet identifier (``iuid``), and responses are matched
+        to requests by ``iuid``.  Commands issued concurrently (e.g., from
+        multiple threads or using :meth:`submit`) no longer wait for the
+        response to the preceding command before being sent.
+
+        Notes
+        -----
+        Request packets are written directly to the serial device using
+        ``monitor.write()`` and response packets are taken from the ``data``
+        packet queue of the monitor (i.e., ``monitor.queues['data']``) by a
+        dispatch thread.
+
+        Parameters
+        ----------
+        depth : int, optional
+            Maximum number of requests awaiting a response.
+
+
+        .. versionadded:: 1.74.0
+        '''
+        self.disable_pipeline()
+        self._pipeline_depth = depth
+        pipeline = RequestPipeline(self.monitor.write, depth=depth)
+        self._pipelined = PipelinedCaller(self, pipeline)
+        self._pipeline_thread = \
+            threading.Thread(target=self._dispatch_responses,
+                             args=(self.monitor, pipeline))
+        self._pipeline_thread.daemon = True
+        self._pipeline_thread.start()
+
+    def disable_pipeline(self):
+        '''
+        Disable pipelined requests, failing any outstanding requests.
+
+
+        .. versionadded:: 1.74.0
+        '''
+        self._pipeline_depth = None
+        self._stop_pipeline()
+
+    def _stop_pipeline(self):
+        pipelined, self._pipelined = self._pipelined, None
+        if pipelined is not None:
+            pipelined.pipeline.close()
+            pipelined.shutdown()
+        if self._pipeline_thread is not None:
+            self._pipeline_thread.join()
+            self._pipeline_thread = None
+
+    def _dispatch_responses(self, monitor, pipeline):
+        while not pipeline.closed:
+            try:
+                response = monitor.queues['data'].get(timeout=.1)
+            except six.moves.queue.Empty:
+                continue
+            # Packet queues may contain `(timestamp, packet)` tuples.
+            if isinstance(response, tuple):
+                response = response[-1]
+            pipeline.dispatch(response)
+
+    def _start_binary_events(self):
+        '''
+        Start thread passing binary event record packets from the ``stream``
+        packet queue of the monitor (i.e., ``monitor.queues['stream']``) to
+        :attr:`binary_event_dispatcher`.
+
+        All packets queued at once are decoded as a single batch.
+
+        .. note::
+            Other stream packets (e.g., DMA ADC data) are discarded while
+            binary events are enabled.
+
+
+        .. versionadded:: 1.74.0
+        '''
+        if self._binary_events_thread is not None:
+            return
+        self._binary_events_stop = threading.Event()
+        self._binary_events_thread = \
+            threading.Thread(target=self._dispatch_binary_events,
+                             args=(self.monitor, self._binary_events_stop))
+        self._binary_events_thread.daemon = True
+        self._binary_events_thread.start()
+
+    def _stop_binary_events(self):
+        if self._binary_events_thread is not None:
+            self._binary_events_stop.set()
+            self._binary_events_thread.join()
+            self._binary_events_thread = None
+
+    def _dispatch_binary_events(self, monitor, stop):
+        queue = monitor.queues['stream']
+        while not stop.is_set():
+            try:
+                packets = [queue.get(timeout=.1)]
+            except six.moves.queue.Empty:
+                continue
+            while True:
+                try:
+                    packets.append(queue.get_nowait())
+                except six.moves.queue.Empty:
+                    break
+            payloads = []
+            for packet in packets:
+                # Packet queues may contain `(timestamp, packet)` tuples.
+                if isinstance(packet, tuple):
+                    packet = packet[-1]
+                if packet.iuid == BINARY_EVENTS_STREAM_ID:
+                    payloads.append(packet.data())
+                else:
+                    _L().debug('discard stream packet (iuid=%s)', packet.iuid)
+            if payloads:
+                try:
+                    self.binary_event_dispatcher.dispatch(payloads)
+                except Exception:
+                    _L().debug('error dispatching binary events',
+                               exc_info=True)
+
+    def submit(self, method_name, *args, **kwargs):
+        '''
+        Call proxy method without waiting for the response.
+
+        Requires pipelined requests to be enabled (see
+        :meth:`enable_pipeline`).
+
+        Example
+        -------
+
+            >>> proxy.enable_pipeline(depth=8)
+            >>> futures = [proxy.submit('capacitance', 0) for i in range(100)]
+            >>> capacitances = [f.result() for f in futures]
+
+        Note that requests are sent in order of submission, but for methods
+        issuing more than one request, only the first request is guaranteed to
+        be sent before requests of subsequently submitted calls.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the return value of the method call.
+
+
+        .. versionadded:: 1.74.0
+        '''
+        if self._pipelined is None:
+            raise RuntimeError('Pipelined requests are not enabled.  See '
+                               '`enable_pipeline()`.')
+        return self._pipelined.submit(method_name, *args, **kwargs)
+
     def _send_command(self, packet, timeout=None):
+        '''
+        .. versionchanged:: 1.74.0
+            Send packet using request pipeline if enabled.
+        '''
         if timeout is None:
             timeout = self.default_timeout
         _L().debug('using timeout %s', timeout)
+        pipelined = self._pipelined
+        if pipelined is not None:
+            return pipelined.send(packet, timeout=timeout)
         return self.monitor.request(packet.tostring(), timeout=timeout)
 
     def terminate(self):
+        '''
+        .. versionchanged:: 1.74.0
+            Stop pipelined request and binary event dispatch.
+        '''
+        self._stop_pipeline()
+        self._stop_binary_events()
         if self.monitor is not None:
             self.monitor.stop()
 
@@ -0,0 +1,500 @@
+'''
+Pseudo-terminal (pty) serial stand-in for a DropBot control board.
+
+:class:`PtyDevice` exposes a :class:`dropbot.simulator.SimulatedNode` through
+a pseudo-terminal using the same packet framing as the firmware (see
+``src/packet_stream.h`` and the ``nadamq`` packet parser), i.e.::
+
+    "|||" <iuid: u16> <type: u8> [<length: u16> <payload> <crc: u16>]
+
+where multi-byte header fields are in network byte order and ``crc`` is the
+CRC-16 (ARC, i.e., reflected polynomial ``0x8005``) of the payload.  The
+length, payload and CRC are only present for ``DATA`` and ``STREAM`` packets.
+
+``DATA`` request packets are decoded as generated ``node.Proxy`` RPC
+requests::
+
+    <command code: uint16> <packed scalar arguments and (length: uint32,
+    offset: uint32) array descriptors> <array data>
+
+and answered with a ``DATA`` packet (with the same ``iuid``) containing the
+raw return value.  Events sent by the simulated device are written as
+``STREAM`` packets containing JSON messages (or binary event records, see
+:mod:`dropbot.binary_events`), like the firmware.
+
+Only the subset of commands listed in :data:`RPC_SIGNATURES` is decoded.  Any
+other command is answered with :attr:`PtyDevice.default_response` (zeros by
+default), which allows, e.g., register reads during proxy initialization to
+succeed.
+
+Example
+-------
+
+Run a fake device linked at ``/tmp/dropbot-pty`` from the command line::
+
+    python -m dropbot.pty_device --link /tmp/dropbot-pty --time-scale 1
+
+or from Python::
+
+    >>> device = PtyDevice(link_path='/tmp/dropbot-pty')
+    >>> device.start()
+    >>> proxy = dropbot.proxy_py3.SerialProxy(port=device.port)
+
+.. note:: POSIX only.
+
+.. versionadded:: 1.74.0
+'''
+from __future__ import absolute_import, division, print_function
+from collections import namedtuple, OrderedDict
+import argparse
+import json
+import logging
+import os
+import select
+import struct
+import threading
+import time
+
+import numpy as np
+
+from .binary_events import BINARY_EVENTS_STREAM_ID
+from .simulator import SimulatedNode
+
+logger = logging.getLogger(__name__)
+
+#: Packet start flag.
+START_FLAG = b'|||'
+#: Packet types (see ``Packet::packet_type`` in ``nadamq``).
+PACKET_TYPE_ACK = b'a'
+PACKET_TYPE_NACK = b'n'
+PACKET_TYPE_DATA = b'd'
+PACKET_TYPE_STREAM = b's'
+PACKET_TYPE_ID_REQUEST = b'i'
+PACKET_TYPE_ID_RESPONSE = b'I'
+_PAYLOAD_PACKET_TYPES = (PACKET_TYPE_DATA, PACKET_TYPE_STREAM,
+                         PACKET_TYPE_ID_RESPONSE)
+
+#: Argument and return types of supported RPC commands.  Array arguments and
+#: return types are denoted by a ``[]`` suffix.  A return type of ``None``
+#: denotes a command with no return value.
+RPC_SIGNATURES = OrderedDict([
+    ('actuation_step', ([], 'int16')),
+    ('analog_read', ([('pin', 'uint8')], 'uint16')),
+    ('analog_reads_simple', ([('pin', 'uint8'), ('n_samples', 'uint16')],
+                             'uint16[]')),
+    ('assign_neighbours', ([('packed_channel_neighbours', 'uint8[]')],
+                           'int8')),
+    ('capacitance', ([('n_samples', 'uint16')], 'float32')),
+    ('channel_capacitances', ([('channels', 'uint8[]')], 'float32[]')),
+    ('channel_scan_mask', ([], 'uint8[]')),
+    ('chip_load_feedback', ([('n_samples', 'uint16'), ('reduce', 'bool')],
+                            'uint16[]')),
+    ('detect_shorts', ([('delay_ms', 'uint8')], 'uint8[]')),
+    ('disable_event', ([('event', 'uint32')], 'bool')),
+    ('disable_events', ([], 'bool')),
+    ('disabled_channels_mask', ([], 'uint8[]')),
+    ('drops', ([], 'uint8[]')),
+    ('enable_event', ([('event', 'uint32')], None)),
+    ('enable_events', ([], None)),
+    ('get_all_drops', ([('c_threshold', 'float32')], 'uint8[]')),
+    ('get_channels_drops', ([('channels', 'uint8[]'),
+                             ('c_threshold', 'float32')], 'uint8[]')),
+    ('halt', ([], None)),
+    ('i2c_eeprom_write_page', ([('i2c_address', 'uint8'),
+                               ('eeprom_address', 'uint8'),
+                               ('data', 'uint8[]'), ('timeout_ms', 'uint8')],
+                              'int16')),
+    ('i2c_read', ([('address', 'uint8'), ('n_bytes_to_read', 'uint8')],
+                  'uint8[]')),
+    ('i2c_write', ([('address', 'uint8'), ('data', 'uint8[]')], None)),
+    ('initialize_switching_boards', ([], 'uint16')),
+    ('microseconds', ([], 'uint32')),
+    ('millis', ([], 'uint32')),
+    ('neighbours', ([], 'uint8[]')),
+    ('number_of_channels', ([], 'uint16')),
+    ('ram_free', ([], 'uint32')),
+    ('run_actuation_program', ([('channel_states', 'uint8[]'),
+                                ('min_durations_ms', 'uint32[]'),
+                                ('timeouts_ms', 'uint32[]'),
+                                ('target_capacitances', 'float32[]'),
+                                ('steady_state_rel_stds', 'float32[]')],
+                               'int16')),
+    ('save_config', ([], None)),
+    ('scan_channels', ([], 'uint16')),
+    ('select_on_board_test_capacitor', ([('index', 'int8')], 'float32')),
+    ('serialize_config', ([], 'uint8[]')),
+    ('serialize_state', ([], 'uint8[]')),
+    ('set_channel_scan_mask', ([('channel_scan_mask', 'uint8[]')], 'bool')),
+    ('set_disabled_channels_mask', ([('mask', 'uint8[]')], None)),
+    ('set_state_of_channels', ([('channel_states', 'uint8[]')], 'bool')),
+    ('state_of_channels', ([], 'uint8[]')),
+    ('stop_actuation_program', ([], 'bool')),
+    ('sync_time', ([('wall_time', 'float64')], 'uint32')),
+    ('turn_off_all_channels', ([], None)),
+    ('u16_percentile_diff', ([('pin', 'uint8'), ('n_samples', 'uint16'),
+                              ('low_percentile', 'float32'),
+                              ('high_percentile', 'float32')], 'uint16')),
+    ('update_channels', ([('on', 'uint8[]'), ('off', 'uint8[]')], 'int16')),
+    ('update_config', ([('config', 'uint8[]')], 'bool')),
+    ('update_state', ([('state', 'uint8[]')], 'bool')),
+    ('wall_time', ([], 'float64'))])
+
+Packet = namedtuple('Packet', 'iuid type payload')
+
+
+def _crc16_table():
+    table = []
+    for i in range(256):
+        crc = i
+        for j in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+_CRC16_TABLE = _crc16_table()
+
+
+def crc16(data, crc=0):
+    '''
+    CRC-16 (ARC) checksum, as computed by the firmware packet writer.
+    '''
+    for byte in bytearray(data):
+        crc = (crc >> 8) ^ _CRC16_TABLE[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def encode_packet(payload=b'', iuid=0, type_=PACKET_TYPE_DATA):
+    '''
+    Returns
+    -------
+    bytes
+        Framed packet.
+    '''
+    header = START_FLAG + struct.pack('>Hc', iuid, type_)
+    if type_ not in _PAYLOAD_PACKET_TYPES:
+        return header
+    return (header + struct.pack('>H', len(payload)) + payload +
+            struct.pack('>H', crc16(payload)))
+
+
+class PacketParser(object):
+    '''
+    Incremental packet parser.
+
+    Bytes preceding a start flag are discarded.  Packets with an invalid CRC
+    are dropped (and logged).
+    '''
+    def __init__(self):
+        self._buffer = b''
+
+    def feed(self, data):
+        '''
+        Parameters
+        ----------
+        data : bytes
+            Received bytes.
+
+        Returns
+        -------
+        list[Packet]
+            Packets completed by :data:`data`.
+        '''
+        self._buffer += data
+        packets = []
+        while True:
+            start = self._buffer.find(START_FLAG)
+            if start < 0:
+                # Keep trailing bytes in case they are part of a start flag.
+                self._buffer = self._buffer[-(len(START_FLAG) - 1):]
+                break
+            buffer_ = self._buffer[start:]
+            self._buffer = buffer_
+            if len(buffer_) < 6:
+                break
+            iuid, type_ = struct.unpack('>Hc', buffer_[3:6])
+            if type_ not in _PAYLOAD_PACKET_TYPES:
+                packets.append(Packet(iuid, type_, b''))
+                self._buffer = buffer_[6:]
+                continue
+            if len(buffer_) < 8:
+                break
+            length, = struct.unpack('>H', buffer_[6:8])
+            if len(buffer_) < 10 + length:
+                break
+            payload = buffer_[8:8 + length]
+            crc, = struct.unpack('>H', buffer_[8 + length:10 + length])
+            self._buffer = buffer_[10 + length:]
+            if crc != crc16(payload):
+                logger.warning('Dropped packet (iuid=%s) with invalid CRC.',
+                               iuid)
+                continue
+            packets.append(Packet(iuid, type_, payload))
+        return packets
+
+
+def decode_arguments(signature, data):
+    '''
+    Decode RPC arguments packed by a generated ``node.Proxy`` method.
+
+    Parameters
+    ----------
+    signature : list[tuple[str, str]]
+        Argument names and types (see :data:`RPC_SIGNATURES`).
+    data : bytes
+        Request payload following the command code.
+
+    Returns
+    -------
+    list
+        Argument values, with array arguments as :class:`numpy.ndarray`.
+    '''
+    fields = []
+    for name, type_ in signature:
+        if type_.endswith('[]'):
+            fields += [(name + '_length', '<u4'), (name + '_data', '<u4')]
+        else:
+            fields.append((name, np.dtype(type_).newbyteorder('<')))
+    struct_ = np.frombuffer(data, dtype=fields, count=1)[0] if fields else ()
+    arguments = []
+    for name, type_ in signature:
+        if type_.endswith('[]'):
+            dtype = np.dtype(type_[:-2]).newbyteorder('<')
+            length = int(struct_[name + '_length'])
+            offset = int(struct_[name + '_data'])
+            arguments.append(np.frombuffer(data, dtype=dtype, count=length,
+                                           offset=offset))
+        else:
+            arguments.append(struct_[name].item())
+    return arguments
+
+
+def encode_result(value, type_):
+    '''
+    Encode RPC return value as raw little-endian bytes.
+    '''
+    if type_ is None:
+        return b''
+    dtype = np.dtype(type_.rstrip('[]')).newbyteorder('<')
+    return np.asarray(value, dtype=dtype).ravel().tobytes()
+
+
+def proxy_command_codes(proxy_class=None):
+    '''
+    Returns
+    -------
+    dict
+        Mapping from command code to method name, read from ``_CMD_*``
+        attributes of the generated ``node.Proxy`` class.
+    '''
+    if proxy_class is None:
+        from .node import Proxy as proxy_class
+    prefix = '_CMD_'
+    return {getattr(proxy_class, k): k[len(prefix):].lower()
+            for k in dir(proxy_class) if k.startswith(prefix)}
+
+
+class PtyDevice(object):
+    '''
+    Fake DropBot serial device backed by a pseudo-terminal.
+
+    Parameters
+    ----------
+    node : dropbot.simulator.SimulatedNode, optional
+        Simulated device.  A default :class:`SimulatedNode` is used if not
+        specified.
+    link_path : str, optional
+        If specified, maintain a symbolic link at this path pointing to the
+        current pseudo-terminal, providing a stable port name across
+        reconnections.
+    command_codes : dict, optional
+        Mapping from command code to method name.  By default, command codes
+        are read from the generated ``node.Proxy`` class.
+    device_id : dict, optional
+        Device identification (sent in response to ``ID_REQUEST`` packets).
+    '''
+    def __init__(self, node=None, link_path=None, command_codes=None,
+                 device_id=None):
+        self.node = (SimulatedNode(time_scale=1.) if node is None else node)
+        self.link_path = link_path
+        self.command_codes = (proxy_command_codes() if command_codes is None
+                              else command_codes)
+        if device_id is None:
+            from ._version import get_versions
+
+            device_id = {'name': 'dropbot',
+                         'version': get_versions()['version']}
+        self.device_id = device_id
+        #: Response to unsupported commands.
+        self.default_response = 8 * b'\x00'
+        #: Number of requests handled.
+        self.request_count = 0
+        self._master_fd = None
+        self._slave_fd = None
+        self._port = None
+        self._write_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        # Publish simulated device events as stream packets.
+        self._node_publish = self.node._publish
+        self.node._publish = self._publish
+        self._node_publish_records = self.node._publish_records
+        self.node._publish_records = self._publish_records
+
+    @property
+    def port(self):
+        '''
+        Serial port name, i.e., :attr:`link_path` if set, or the name of the
+        current pseudo-terminal.
+        '''
+        return self.link_path if self.link_path else self._port
+
+    def start(self):
+        self._open()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._close()
+        if self.link_path and os.path.islink(self.link_path):
+            os.remove(self.link_path)
+
+    def terminate(self):
+        self.stop()
+        self.node.terminate()
+
+    def reconnect(self, delay_s=0):
+        '''
+        Simulate a device disconnection (e.g., USB cable unplugged) by
+        closing the pseudo-terminal, then open a new pseudo-terminal after
+        the specified delay.
+        '''
+        self.stop()
+        time.sleep(delay_s)
+        self.start()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.terminate()
+
+    def _open(self):
+        import tty
+
+        self._master_fd, self._slave_fd = os.openpty()
+        tty.setraw(self._slave_fd)
+        self._port = os.ttyname(self._slave_fd)
+        if self.link_path:
+            if os.path.lexists(self.link_path):
+                os.remove(self.link_path)
+            os.symlink(self._port, self.link_path)
+        logger.info('Fake DropBot available at `%s`.', self.port)
+
+    def _close(self):
+        with self._write_lock:
+            for fd in (self._master_fd, self._slave_fd):
+                if fd is not None:
+                    os.close(fd)
+            self._master_fd = self._slave_fd = None
+
+    def _write(self, data):
+        with self._write_lock:
+            if self._master_fd is None:
+                return
+            while data:
+                data = data[os.write(self._master_fd, data):]
+
+    def _publish(self, message):
+        self._node_publish(message)
+        self._write(encode_packet(json.dumps(message).encode('utf8'),
+                                  type_=PACKET_TYPE_STREAM))
+
+    def _publish_records(self, payloads):
+        self._node_publish_records(payloads)
+        # One stream packet per record, like the firmware.
+        for payload in payloads:
+            self._write(encode_packet(payload, iuid=BINARY_EVENTS_STREAM_ID,
+                                      type_=PACKET_TYPE_STREAM))
+
+    def _run(self):
+        parser = PacketParser()
+        while not self._stop_event.is_set():
+            readable, _, _ = select.select([self._master_fd], [], [], .05)
+            if not readable:
+                continue
+            try:
+                data = os.read(self._master_fd, 4096)
+            except OSError:
+                # No client connected to pseudo-terminal.
+                time.sleep(.01)
+                continue
+            for packet in parser.feed(data):
+                self._write(self.handle_packet(packet))
+
+    def handle_packet(self, packet):
+        '''
+        Returns
+        -------
+        bytes
+            Framed response to :data:`packet`.
+        '''
+        if packet.type == PACKET_TYPE_ID_REQUEST:
+            return encode_packet(json.dumps(self.device_id).encode('utf8'),
+                                 iuid=packet.iuid,
+                                 type_=PACKET_TYPE_ID_RESPONSE)
+        elif packet.type != PACKET_TYPE_DATA or len(packet.payload) < 2:
+            return encode_packet(iuid=packet.iuid, type_=PACKET_TYPE_NACK)
+        self.request_count += 1
+        code, = struct.unpack('<H', packet.payload[:2])
+        name = self.command_codes.get(code)
+        if name not in RPC_SIGNATURES:
+            logger.debug('Unsupported command: `%s` (%s)', name, code)
+            payload = self.default_response
+        else:
+            signature, return_type = RPC_SIGNATURES[name]
+            try:
+                arguments = decode_arguments(signature, packet.payload[2:])
+                result = getattr(self.node, name)(*arguments)
+                payload = encode_result(result, return_type)
+            except Exception:
+                logger.debug('Error handling `%s` request.', name,
+                             exc_info=True)
+                return encode_packet(iuid=packet.iuid,
+                                     type_=PACKET_TYPE_NACK)
+        return encode_packet(payload, iuid=packet.iuid)
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description='Fake DropBot serial device '
+                                     '(pseudo-terminal).')
+    parser.add_argument('--link', default='/tmp/dropbot-pty',
+                        help='Symbolic link to pseudo-terminal (default: '
+                        '%(default)s)')
+    parser.add_argument('--time-scale', type=float, default=1.,
+                        help='Simulated time per real time (default: '
+                        '%(default)s)')
+    parser.add_argument('--seed', type=int)
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args(args)
+    node = SimulatedNode(time_scale=args.time_scale, seed=args.seed)
+    with PtyDevice(node=node, link_path=args.link):
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
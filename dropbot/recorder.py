@@ -0,0 +1,272 @@
+'''
+Columnar recording of ``capacitance-updated`` messages.
+
+Fields of each message are stored in preallocated typed arrays (one per
+column), rather than as one ``dict`` per message.
+
+.. versionadded:: 1.74.0
+
+Example
+-------
+
+    >>> recorder = CapacitanceRecorder()
+    >>> with proxy.subscribe('capacitance-updated', recorder):
+    ...     ...
+    >>> df = recorder.to_frame()
+'''
+from __future__ import absolute_import, division, print_function
+from collections import OrderedDict
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
+__all__ = ['COLUMNS', 'CapacitanceRecorder', 'RecordedMessages']
+
+#: Recorded columns and data types.
+COLUMNS = OrderedDict([('time_us', 'uint32'), ('new_value', 'float64'),
+                       ('V_a', 'float64'), ('n_samples', 'uint32'),
+                       ('step', 'uint32')])
+
+
+class CapacitanceRecorder(object):
+    '''
+    Record ``capacitance-updated`` messages in typed column arrays.
+
+    Column arrays grow in multiples of :data:`chunk_size` rows, at least
+    doubling in capacity each time they are full.  Views returned by
+    :meth:`arrays` and :meth:`to_frame` do not copy the recorded data.
+
+    Each message is tagged with the current step number (see
+    :meth:`new_step`), e.g., to group messages by actuation.
+
+    Instances may be connected directly as signal receivers.
+
+    Parameters
+    ----------
+    chunk_size : int, optional
+        Initial capacity (and growth granularity) in rows.
+
+    Attributes
+    ----------
+    step : int
+        Current step number.
+    steps : list[dict]
+        Information for each step (see :meth:`new_step`).
+    '''
+    def __init__(self, chunk_size=4096):
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._size = 0
+        self._columns = OrderedDict((name, np.empty(chunk_size, dtype=dtype))
+                                    for name, dtype in COLUMNS.items())
+        self.step = 0
+        self.steps = [{}]
+
+    def __len__(self):
+        return self._size
+
+    def __call__(self, message):
+        self.append(message)
+
+    @property
+    def capacity(self):
+        return self._columns['time_us'].shape[0]
+
+    def _reserve(self, size):
+        if size <= self.capacity:
+            return
+        chunks = -(-max(size, 2 * self.capacity) // self.chunk_size)
+        for name, column in self._columns.items():
+            resized = np.empty(chunks * self.chunk_size, dtype=column.dtype)
+            resized[:self._size] = column[:self._size]
+            self._columns[name] = resized
+
+    def new_step(self, **info):
+        '''
+        Tag subsequently recorded messages with a new step number.
+
+        Parameters
+        ----------
+        **info
+            Step information (e.g., actuated channels), stored in
+            :attr:`steps`.
+
+        Returns
+        -------
+        int
+            New step number.
+        '''
+        with self._lock:
+            self.steps.append(info)
+            self.step = len(self.steps) - 1
+            return self.step
+
+    def append(self, message):
+        '''
+        Record ``capacitance-updated`` message.
+        '''
+        with self._lock:
+            self._reserve(self._size + 1)
+            i = self._size
+            columns = self._columns
+            columns['time_us'][i] = message['time_us']
+            columns['new_value'][i] = message['new_value']
+            columns['V_a'][i] = message.get('V_a', np.nan)
+            columns['n_samples'][i] = message.get('n_samples', 0)
+            columns['step'][i] = self.step
+            self._size = i + 1
+
+    def extend(self, messages):
+        '''
+        Record sequence of ``capacitance-updated`` messages (e.g., a batch
+        read from :meth:`dropbot.proxy.ProxyMixin.capacitance_stream`), or
+        binary event records (see
+        :func:`dropbot.binary_events.decode_records`), which are copied
+        column-wise, e.g., as receiver of the ``capacitance-records`` signal.
+        '''
+        records = isinstance(messages, np.ndarray) and \
+            messages.dtype.names is not None
+        if not records:
+            messages = list(messages)
+        if not len(messages):
+            return
+        with self._lock:
+            start = self._size
+            end = start + len(messages)
+            self._reserve(end)
+            for name in COLUMNS:
+                if name == 'step':
+                    self._columns[name][start:end] = self.step
+                    continue
+                default = np.nan if name == 'V_a' else 0
+                if records:
+                    self._columns[name][start:end] = messages[name]
+                else:
+                    self._columns[name][start:end] = \
+                        [m.get(name, default) for m in messages]
+            self._size = end
+
+    def arrays(self, start=0, stop=None):
+        '''
+        Parameters
+        ----------
+        start, stop : int, optional
+            Row range.
+
+        Returns
+        -------
+        collections.OrderedDict
+            View of each recorded column array, keyed by column name.
+        '''
+        stop = self._size if stop is None else min(stop, self._size)
+        return OrderedDict((name, column[start:stop])
+                           for name, column in self._columns.items())
+
+    def to_frame(self, start=0, stop=None):
+        '''
+        Parameters
+        ----------
+        start, stop : int, optional
+            Row range.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Recorded messages, one column per field.  Columns are views of
+            the recorded arrays where supported by :mod:`pandas`.
+        '''
+        arrays = self.arrays(start, stop)
+        index = pd.RangeIndex(start, start + len(arrays['step']))
+        return pd.DataFrame(arrays, index=index, copy=False)
+
+    def message(self, i):
+        '''
+        Returns
+        -------
+        dict
+            Recorded message ``i`` in ``capacitance-updated`` message form.
+        '''
+        message = {'event': 'capacitance-updated'}
+        for name, column in self._columns.items():
+            message[name] = column[i].item()
+        return message
+
+    def messages(self, start=None):
+        '''
+        Parameters
+        ----------
+        start : int, optional
+            First message (default: next recorded message).
+
+        Returns
+        -------
+        RecordedMessages
+            Sequence of messages recorded from :data:`start` onwards,
+            including messages recorded after this call (until
+            :meth:`RecordedMessages.close` is called).
+        '''
+        return RecordedMessages(self, len(self) if start is None else start)
+
+
+class RecordedMessages(Sequence):
+    '''
+    Sequence view of messages recorded by a :class:`CapacitanceRecorder`.
+
+    Items are ``capacitance-updated`` message dictionaries, created on
+    access.  May be used in place of a list of messages, e.g., as the
+    argument to :func:`dropbot.move.wait_on_capacitance` callbacks.
+
+    Parameters
+    ----------
+    recorder : CapacitanceRecorder
+    start : int
+        First recorded message in view.
+    stop : int, optional
+        End of view.  If ``None``, the view includes messages as they are
+        recorded.
+    '''
+    def __init__(self, recorder, start, stop=None):
+        self.recorder = recorder
+        self.start = start
+        self.stop = stop
+
+    def close(self):
+        '''
+        Exclude messages recorded after this call from view.
+        '''
+        if self.stop is None:
+            self.stop = len(self.recorder)
+
+    def __len__(self):
+        stop = len(self.recorder) if self.stop is None else self.stop
+        return stop - self.start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('Message index out of range.')
+        return self.recorder.message(self.start + i)
+
+    def __repr__(self):
+        return 'RecordedMessages(start=%d, len=%d)' % (self.start, len(self))
+
+    def arrays(self):
+        '''
+        See :meth:`CapacitanceRecorder.arrays`.
+        '''
+        return self.recorder.arrays(self.start, self.start + len(self))
+
+    def to_frame(self):
+        '''
+        See :meth:`CapacitanceRecorder.to_frame`.
+        '''
+        return self.recorder.to_frame(self.start, self.start + len(self))
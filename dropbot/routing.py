@@ -0,0 +1,479 @@
+'''
+Route planning over the chip channel neighbour graph.
+
+:class:`RoutePlanner` precomputes the shortest route between every pair of
+channels as two compact ``(N, N)`` integer tables (i.e., distance and next
+hop), so each route is served by following next hops, in ``O(route length)``
+time.
+
+Channels may be blocked (e.g., disabled channels, or channels occupied by
+other drops).  Routes never start at, end at, or pass through blocked
+channels.  Blocking (or unblocking) channels only recomputes the routes that
+may be affected.
+
+.. versionadded:: 1.74.0
+
+Example
+-------
+
+    >>> planner = RoutePlanner(chip_model.neighbours)
+    >>> planner.route(110, 115)
+    [110, 109, 115]
+    >>> planner.block([109])
+    >>> messages = yield asyncio.From(move_liquid(proxy, [110, 115],
+    ...                                           planner=planner))
+
+:func:`plan_routes` schedules several drops at once, keeping drops apart so
+they do not merge along the way (see :func:`dropbot.move.move_drops`):
+
+    >>> schedule = plan_routes(planner, sources=[0, 30], targets=[9, 39])
+    >>> messages = yield asyncio.From(move_drops(proxy, schedule))
+'''
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+
+__all__ = ['NoRouteError', 'RoutePlanner', 'plan_routes']
+
+
+class NoRouteError(ValueError):
+    '''
+    No route exists between source and target channels.
+
+    Attributes
+    ----------
+    source, target : int
+        Source and target channels.
+    '''
+    def __init__(self, source, target):
+        self.source = source
+        self.target = target
+        super(NoRouteError, self).__init__('No route from channel %s to '
+                                           'channel %s.' % (source, target))
+
+
+def _pad_lists(keys, values, count):
+    '''
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape ``(count, max values per key)``, where row ``i``
+        contains the values for key ``i``, padded with ``count``.
+    '''
+    order = np.argsort(keys, kind='mergesort')
+    keys = keys[order]
+    values = values[order]
+    counts = np.bincount(keys, minlength=count)
+    width = max(counts.max() if counts.size else 0, 1)
+    k = np.arange(keys.size) - np.repeat(np.cumsum(counts) - counts, counts)
+    padded = np.full((count, width), count, dtype=int)
+    padded[keys, k] = values
+    return padded
+
+
+class RoutePlanner(object):
+    '''
+    Shortest routes between all pairs of channels.
+
+    Parameters
+    ----------
+    neighbours : array-like
+        Neighbour table of shape ``(N, k)``, where row ``i`` lists the
+        channels a drop on channel ``i`` may move to, padded with negative
+        values (e.g., see :func:`dropbot.chip.get_neighbours_array`).
+    blocked : list-like, optional
+        Channels to block.
+    chunk_size : int, optional
+        Maximum number of target channels to compute routes for at once
+        (limits memory use for large graphs).
+
+    Attributes
+    ----------
+    distance : numpy.ndarray
+        Number of moves from channel ``i`` to channel ``j`` (i.e.,
+        ``distance[i, j]``), or -1 if no route exists.
+    next_hop : numpy.ndarray
+        Next channel along the route from channel ``i`` to channel ``j``
+        (i.e., ``next_hop[i, j]``), or -1 if no route exists (or ``i ==
+        j``).
+    blocked : numpy.ndarray
+        Boolean mask of blocked channels.
+    '''
+    def __init__(self, neighbours, blocked=None, chunk_size=256):
+        neighbours = np.asarray(neighbours, dtype=int)
+        self.channel_count = count = neighbours.shape[0]
+        self.chunk_size = chunk_size
+        dtype = 'int16' if count < np.iinfo('int16').max else 'int32'
+
+        sources, columns = np.nonzero(neighbours >= 0)
+        targets = neighbours[sources, columns]
+        # Outgoing and incoming neighbours of each channel, padded with
+        # `count` (i.e., index of an always empty padding column).
+        self._out = _pad_lists(sources, targets, count)
+        self._in = _pad_lists(targets, sources, count)
+
+        self.blocked = np.zeros(count, dtype=bool)
+        if blocked is not None:
+            self.blocked[np.asarray(blocked, dtype=int)] = True
+        self.distance = np.full((count, count), -1, dtype=dtype)
+        self.next_hop = np.full((count, count), -1, dtype=dtype)
+        self._update(np.arange(count))
+
+    @classmethod
+    def from_graph(cls, G, channel_count=None, **kwargs):
+        '''
+        Parameters
+        ----------
+        G : networkx.Graph
+            Channel connection graph (nodes are channel numbers).
+        channel_count : int, optional
+            Number of channels (default: highest channel in graph plus one).
+        **kwargs
+            Keyword arguments passed to :class:`RoutePlanner`.
+
+        Returns
+        -------
+        RoutePlanner
+        '''
+        if channel_count is None:
+            channel_count = max(G.nodes()) + 1 if len(G) else 0
+        adjacency = [(int(u), int(v)) for u, neighbours_u in G.adj.items()
+                     for v in neighbours_u]
+        sources, targets = np.array(adjacency, dtype=int).reshape(-1, 2).T
+        neighbours = _pad_lists(sources, targets, channel_count)
+        neighbours[neighbours == channel_count] = -1
+        return cls(neighbours, **kwargs)
+
+    def _update(self, targets):
+        '''
+        Recompute routes to specified targets (breadth-first search from all
+        targets at once, following incoming neighbours).
+        '''
+        targets = np.asarray(targets, dtype=int)
+        for start in range(0, targets.size, self.chunk_size):
+            self._update_chunk(targets[start:start + self.chunk_size])
+
+    def _update_chunk(self, targets):
+        count = self.channel_count
+        rows = np.arange(targets.size)
+        open_ = ~self.blocked
+        distance = np.full((targets.size, count), -1,
+                           dtype=self.distance.dtype)
+        next_hop = np.full((targets.size, count), -1,
+                           dtype=self.next_hop.dtype)
+        # Frontier includes padding column, which is never set.
+        frontier = np.zeros((targets.size, count + 1), dtype=bool)
+        seeds = open_[targets]
+        frontier[rows[seeds], targets[seeds]] = True
+        distance[rows[seeds], targets[seeds]] = 0
+        visited = frontier[:, :count].copy()
+
+        d = 0
+        while True:
+            d += 1
+            # Channel `v` is reached if any outgoing neighbour of `v` is in
+            # the frontier.
+            candidates = frontier[:, self._out]
+            reached = candidates.any(axis=-1) & ~visited & open_
+            if not reached.any():
+                break
+            t_i, v_i = np.nonzero(reached)
+            hop_i = candidates[t_i, v_i].argmax(axis=-1)
+            next_hop[t_i, v_i] = self._out[v_i, hop_i]
+            distance[t_i, v_i] = d
+            visited |= reached
+            frontier[:, :count] = reached
+        self.distance[:, targets] = distance.T
+        self.next_hop[:, targets] = next_hop.T
+
+    def block(self, channels):
+        '''
+        Block channels, i.e., exclude from routes.
+
+        Only routes to targets with a route passing through a newly blocked
+        channel are recomputed.
+
+        Parameters
+        ----------
+        channels : int or list-like
+            Channels to block.
+        '''
+        channels = np.atleast_1d(np.asarray(channels, dtype=int))
+        channels = np.unique(channels[~self.blocked[channels]])
+        if not channels.size:
+            return
+        self.blocked[channels] = True
+        affected = np.isin(self.next_hop, channels).any(axis=0)
+        affected[channels] = True
+        self._update(np.flatnonzero(affected))
+        self.distance[channels] = -1
+        self.next_hop[channels] = -1
+
+    def unblock(self, channels):
+        '''
+        Unblock channels.
+
+        Only routes to targets that may be shortened by passing through a
+        newly unblocked channel are recomputed.
+
+        Parameters
+        ----------
+        channels : int or list-like
+            Channels to unblock.
+        '''
+        channels = np.atleast_1d(np.asarray(channels, dtype=int))
+        channels = np.unique(channels[self.blocked[channels]])
+        # Unblock one channel at a time so routes through several newly
+        # unblocked channels are found.
+        for channel in channels:
+            self._unblock(channel)
+
+    def _unblock(self, channel):
+        count = self.channel_count
+        self.blocked[channel] = False
+        inf = np.iinfo('int32').max // 2
+        # Pad with unreachable row for padding column.
+        distance = np.vstack([np.where(self.distance < 0, inf,
+                                       self.distance.astype('int32')),
+                              np.full((1, count), inf, dtype='int32')])
+        out_distance = distance[self._out[channel]]
+        best = out_distance.min(axis=0)
+        # A route from an incoming neighbour `a` through `channel` to target
+        # `t` is shorter if `distance[a, t] > best[t] + 2`.
+        in_ = self._in[channel]
+        in_ = in_[in_ < count]
+        in_ = in_[~self.blocked[in_]]
+        if in_.size:
+            worst = distance[in_].max(axis=0)
+            affected = (best < inf) & (worst > best + 2)
+        else:
+            affected = np.zeros(count, dtype=bool)
+        affected[channel] = True
+        self._update(np.flatnonzero(affected))
+
+        # Routes from `channel` to other targets start with the closest
+        # outgoing neighbour.
+        others = np.flatnonzero(~affected & (best < inf))
+        hops = self._out[channel][out_distance[:, others].argmin(axis=0)]
+        self.distance[channel, others] = best[others] + 1
+        self.next_hop[channel, others] = hops
+
+    def route(self, source, target):
+        '''
+        Parameters
+        ----------
+        source, target : int
+            Source and target channels.
+
+        Returns
+        -------
+        list[int]
+            Shortest route from :data:`source` to :data:`target` (inclusive).
+
+        Raises
+        ------
+        NoRouteError
+            If no route exists.
+        '''
+        if self.distance[source, target] < 0:
+            raise NoRouteError(source, target)
+        route = [int(source)]
+        next_hop = self.next_hop[:, target]
+        while route[-1] != target:
+            route.append(int(next_hop[route[-1]]))
+        return route
+
+    def route_through(self, waypoints):
+        '''
+        Parameters
+        ----------
+        waypoints : list[int]
+            Channels to visit, in order.
+
+        Returns
+        -------
+        list[int]
+            Shortest route visiting each waypoint in order.
+
+        Raises
+        ------
+        NoRouteError
+            If no route exists between two consecutive waypoints.
+        '''
+        route = [int(waypoints[0])]
+        for source, target in zip(waypoints[:-1], waypoints[1:]):
+            route.extend(self.route(source, target)[1:])
+        return route
+
+
+def _within(planner, radius):
+    '''
+    Returns
+    -------
+    numpy.ndarray
+        Boolean array of shape ``(N, N)``, where ``[i, j]`` is `True` if
+        channel ``j`` is at most :data:`radius` moves (in either direction,
+        ignoring blocked channels) from channel ``i``.
+    '''
+    count = planner.channel_count
+    within = np.eye(count, dtype=bool)
+    padded = np.zeros((count, count + 1), dtype=bool)
+    for i in range(radius):
+        padded[:, :count] = within
+        within = (within | padded[:, planner._out].any(axis=-1) |
+                  padded[:, planner._in].any(axis=-1))
+    return within
+
+
+def _plan_route(planner, near, schedule, targets, i, obstacles):
+    '''
+    Returns
+    -------
+    numpy.ndarray
+        Earliest arrival route of drop ``i`` (one channel per time step)
+        avoiding the routes of drops ``0..i-1`` in :data:`schedule` and
+        :data:`obstacles` channels.
+    '''
+    count = planner.channel_count
+    source, target = schedule[0, i], targets[i]
+    # Forbidden channels at each time step (the last row applies to all
+    # subsequent time steps).
+    forbidden = np.zeros((schedule.shape[0], count), dtype=bool)
+    forbidden |= planner.blocked | obstacles
+    for k in range(i):
+        reserved = schedule[:, k]
+        # Drops with a shared target may merge once at the target.
+        active = ~((targets[k] == target) & (reserved == target))
+        forbidden[active] |= near[reserved[active]]
+    horizon = forbidden.shape[0] - 1
+    # Target must remain free after the drop arrives.
+    blocked_at = np.flatnonzero(forbidden[:, target])
+    if blocked_at.size and blocked_at[-1] == horizon:
+        raise NoRouteError(source, target)
+    earliest = blocked_at[-1] + 1 if blocked_at.size else 0
+
+    def _forbidden(t):
+        return forbidden[min(t, horizon)]
+
+    # Breadth-first search over channels and time steps, where a drop may
+    # also stay in place.
+    padded = np.zeros(count + 1, dtype=bool)
+    reachable = [np.zeros(count, dtype=bool)]
+    reachable[0][source] = not forbidden[0, source]
+    t = 0
+    while not (t >= earliest and reachable[t][target]):
+        t += 1
+        padded[:count] = reachable[t - 1] & ~_forbidden(t)
+        reached = ((padded[:count] | padded[planner._in].any(axis=-1)) &
+                   ~_forbidden(t) & ~_forbidden(t - 1))
+        reachable.append(reached)
+        if not reached.any() or (t > horizon and
+                                 (reached == reachable[t - 1]).all()):
+            raise NoRouteError(source, target)
+
+    # Follow reachable channels back from target.
+    route = [target]
+    for t_i in range(t, 0, -1):
+        padded[:count] = reachable[t_i - 1] & ~_forbidden(t_i)
+        if padded[route[-1]]:
+            route.append(route[-1])
+        else:
+            in_ = planner._in[route[-1]]
+            route.append(in_[padded[in_]][0])
+    return np.array(route[::-1], dtype=int)
+
+
+def plan_routes(planner, sources, targets, min_distance=2):
+    '''
+    Schedule concurrent routes for several drops.
+
+    At each time step, each drop either stays in place or moves to a
+    neighbouring channel.  Drops are kept at least :data:`min_distance` moves
+    apart, both before and after each step, so actuating the next channel of
+    one drop never pulls on another drop.  Drops sharing the same target are
+    merged, i.e., once a drop reaches a shared target, other drops with the
+    same target may join it.
+
+    Routes are planned one drop at a time (i.e., earlier drops have priority)
+    using a breadth-first search over channels and time steps, avoiding the
+    reserved routes of previously planned drops.  Each drop therefore
+    arrives as early as possible given the routes of higher priority drops.
+    If no route is found for a drop, planning is restarted with the drop
+    moved to the highest priority.
+
+    Parameters
+    ----------
+    planner : RoutePlanner
+        Route planner; blocked channels are avoided.
+    sources, targets : list[int]
+        Source and target channel of each drop.
+    min_distance : int, optional
+        Minimum number of moves between drops (default: 2, i.e., drops are
+        never on the same or neighbouring channels).
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape ``(T + 1, number of drops)``, where row ``t`` is the
+        channel of each drop after ``t`` steps (row 0 contains the sources
+        and row ``T`` contains the targets).
+
+    Raises
+    ------
+    ValueError
+        If two sources are closer than :data:`min_distance`.
+    NoRouteError
+        If no schedule is found.
+    '''
+    sources = np.asarray(sources, dtype=int)
+    targets = np.asarray(targets, dtype=int)
+    near = _within(planner, min_distance - 1)
+    close = near[sources][:, sources]
+    np.fill_diagonal(close, False)
+    if close.any():
+        raise ValueError('Sources `%s` are closer than %s moves.' %
+                         (sources[close.any(axis=0)].tolist(), min_distance))
+
+    # First, treat drops that are not yet planned as obstacles at their
+    # sources.  This fails if, e.g., a drop must pass through the source of
+    # another drop, so fall back to ignoring drops that are not yet planned
+    # (which may leave no way out for a drop overtaken by a higher priority
+    # drop).
+    for wait_for_planned in (True, False):
+        try:
+            return _plan_routes(planner, near, sources, targets,
+                                wait_for_planned)
+        except NoRouteError as exception:
+            error = exception
+    raise error
+
+
+def _plan_routes(planner, near, sources, targets, wait_for_planned):
+    order = np.arange(sources.size)
+    for attempt in range(sources.size ** 2):
+        # Reserved channel of each drop (in priority order) at each step.
+        schedule = sources[order][None, :].copy()
+        try:
+            for i in range(sources.size):
+                if wait_for_planned:
+                    obstacles = near[schedule[0, i + 1:]].any(axis=0)
+                else:
+                    obstacles = False
+                route = _plan_route(planner, near, schedule, targets[order],
+                                    i, obstacles)
+                # Extend schedule so drops remain at their targets.
+                steps = max(schedule.shape[0], route.size)
+                schedule = np.vstack([schedule,
+                                      np.repeat(schedule[-1:],
+                                                steps - schedule.shape[0],
+                                                axis=0)])
+                schedule[:, i] = np.concatenate([route,
+                                                 np.repeat(route[-1], steps -
+                                                           route.size)])
+        except NoRouteError as exception:
+            if i == 0 or attempt == sources.size ** 2 - 1:
+                raise exception
+            order = np.concatenate([order[i:i + 1], order[:i],
+                                    order[i + 1:]])
+            continue
+        return schedule[:, np.argsort(order)]
@@ -0,0 +1,1118 @@
+'''
+Hardware-free DropBot simulator.
+
+Provides :class:`SimulatedProxy`, a drop-in replacement for
+:class:`dropbot.proxy.SerialProxy` which runs the :class:`ProxyMixin` host
+code paths against an in-process model of the DropBot firmware, switching
+boards and a digital microfluidics chip.
+
+The simulator consists of three layers:
+
+ - :class:`DropletModel`: electrode/droplet physics model (NumPy only).
+ - :class:`SimulatedNode`: emulates the low-level RPC methods exposed by the
+   firmware (i.e., the generated ``node.Proxy`` methods), including the
+   ``capacitance-updated``, ``capacitance-exceeded``, ``capacitance-steady``,
+   ``channels-updated`` and ``channels-scanned`` event stream.
+ - :class:`SimulatedProxy`: :class:`SimulatedNode` wrapped by
+   :class:`dropbot.proxy_py2.ProxyMixin`, i.e., exposing the same high-level
+   API as :class:`dropbot.proxy.SerialProxy`.
+
+Example
+-------
+
+    >>> import dropbot.simulator
+    >>>
+    >>> # Simulate 20x faster than real-time.
+    >>> proxy = dropbot.simulator.SimulatedProxy(time_scale=20)
+    >>> drop = proxy.physics.add_drop([0])
+    >>> proxy.voltage = 100
+    >>> proxy.set_state_of_channels(pd.Series(1, index=[1]), append=False)
+    >>> time.sleep(.1)  # 2 seconds of simulated time
+    >>> proxy.get_drops()
+    [array([1], dtype=uint8)]
+
+Alternatively, set ``time_scale=None`` to only advance simulated time
+explicitly using :meth:`SimulatedNode.advance`, e.g., for deterministic tests.
+
+.. versionadded:: 1.74.0
+'''
+from __future__ import absolute_import, division, print_function
+import collections
+import logging
+import threading
+import time
+
+import blinker
+import numpy as np
+import six
+
+from .binary_events import EVENT_TYPES, BinaryEventDispatcher, encode_records
+from .core import NOMINAL_ON_BOARD_CALIBRATION_CAPACITORS
+from .neighbours import NO_NEIGHBOUR, PACKED_NO_NEIGHBOUR, pack_neighbours
+
+logger = logging.getLogger(__name__)
+
+#: Period of firmware capacitance measurement timer.
+CAPACITANCE_TIMER_MS = 25
+#: Default capacitance threshold used for drop detection (see ``Node.h``).
+DEFAULT_DROP_CAPACITANCE_THRESHOLD = 3e-12
+#: Maximum number of actuation program steps (see ``Node.h``).
+MAX_ACTUATION_PROGRAM_STEPS = 64
+#: Number of capacitance readings kept for steady-state checks (see
+#: ``SteadyStateWindow`` in ``steady_state.h``).
+STEADY_STATE_WINDOW_SIZE = 64
+#: Number of capacitance readings kept for ``capacitance-steady`` events (see
+#: ``Node.h``).
+CAPACITANCE_STEADY_WINDOW_SIZE = 128
+#: Longest supported ``steady_state_window_ms`` state value.
+MAX_STEADY_STATE_WINDOW_MS = (CAPACITANCE_STEADY_WINDOW_SIZE - 1) * \
+    CAPACITANCE_TIMER_MS
+
+# Keep in sync with event mask flags in `proxy_py2`.
+_EVENT_CHANNELS_UPDATED = (1 << 30)
+_EVENT_DROPS_DETECTED = (1 << 27)
+_EVENT_CHANNELS_SCANNED = (1 << 26)
+_EVENT_ENABLE = (1 << 0)
+# Events sent as binary records if `binary_events` state field is set.
+_BINARY_EVENT_NAMES = frozenset(EVENT_TYPES.values())
+
+
+def grid_neighbours(shape):
+    '''
+    Compute neighbours of electrodes arranged in a regular grid.
+
+    Channels are numbered in row-major order.
+
+    Parameters
+    ----------
+    shape : tuple[int, int]
+        Number of rows and columns in grid.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape ``(rows * cols, 4)`` containing the ``up``, ``down``,
+        ``left`` and ``right`` neighbour of each channel, respectively, or
+        :data:`dropbot.neighbours.NO_NEIGHBOUR` where no neighbour exists.
+    '''
+    rows, cols = shape
+    channels = np.arange(rows * cols).reshape(rows, cols)
+    neighbours = np.full((rows, cols, 4), NO_NEIGHBOUR, dtype=int)
+    neighbours[1:, :, 0] = channels[:-1]
+    neighbours[:-1, :, 1] = channels[1:]
+    neighbours[:, 1:, 2] = channels[:, :-1]
+    neighbours[:, :-1, 3] = channels[:, 1:]
+    return neighbours.reshape(-1, 4)
+
+
+def pack_channels(states):
+    '''
+    Pack one state per channel into bytes (8 channels per byte).
+
+    Bit ``j`` of byte ``i`` corresponds to channel ``8 * i + j``, matching the
+    firmware ``state_of_channels`` format.
+    '''
+    return np.packbits(np.asarray(states, dtype=int)[::-1])[::-1]
+
+
+def unpack_channels(packed):
+    '''
+    Inverse of :func:`pack_channels`.
+    '''
+    return np.unpackbits(np.asarray(packed, dtype='uint8')[::-1])[::-1]
+
+
+def steady_state_rel_std(readings, duration_ms, min_mean=0):
+    '''
+    Relative standard deviation of capacitance readings within the specified
+    duration of the most recent reading (see ``SteadyStateWindow`` in
+    ``steady_state.h``).
+
+    Parameters
+    ----------
+    readings : list[tuple[int, float]]
+        Millisecond counter and capacitance of each reading, oldest first.
+    duration_ms : int
+        Window duration.
+    min_mean : float, optional
+        Minimum mean of readings within window.
+
+    Returns
+    -------
+    float
+        Relative standard deviation, or -1 if the readings span less than
+        :data:`duration_ms` (or the mean is not positive or is less than
+        :data:`min_mean`).
+    '''
+    if len(readings) < 2:
+        return -1
+    times_ms, values = map(np.asarray, zip(*readings))
+    if times_ms[-1] - times_ms[0] < duration_ms:
+        return -1
+    values = values[times_ms[-1] - times_ms <= duration_ms]
+    mean = values.mean()
+    if values.size < 2 or mean <= 0 or mean < min_mean:
+        return -1
+    return values.std(ddof=1) / mean
+
+
+class DropletModel(object):
+    '''
+    Electrode/droplet physics model.
+
+    Each drop is represented by a *coverage* vector with one entry per
+    channel, where each entry is the fraction of the respective electrode
+    covered by the drop.  The sum of a drop's coverage vector (i.e., its volume
+    in units of electrodes) is conserved.
+
+    Drops are pulled toward actuated electrodes that are either covered by the
+    drop or adjacent to an electrode covered by the drop.  Coverage relaxes
+    exponentially toward an even spread over the pulling electrodes with time
+    constant :attr:`transit_time_s`.  A drop with no pulling electrodes does
+    not move.
+
+    The capacitance of each electrode is proportional to electrode area and
+    covered fraction, using the specific capacitance of liquid for the covered
+    fraction and of the filler media for the remainder.
+
+    Parameters
+    ----------
+    neighbours : array-like, optional
+        Neighbour table of shape ``(N, 4)`` (see :func:`grid_neighbours`).  By
+        default, a 10 x 12 grid (i.e., 120 channels) is used.
+    electrode_area : float or array-like, optional
+        Area of each electrode (in square metres).
+    c_liquid : float, optional
+        Specific capacitance of liquid (in farads per square metre).
+    c_filler : float, optional
+        Specific capacitance of filler media (in farads per square metre).
+    transit_time_s : float, optional
+        Time constant for a drop to move onto an actuated electrode.
+    '''
+    def __init__(self, neighbours=None, electrode_area=6.25e-6,
+                 c_liquid=2e-6, c_filler=2e-8, transit_time_s=.1):
+        if neighbours is None:
+            neighbours = grid_neighbours((10, 12))
+        self.neighbours = np.asarray(neighbours, dtype=int)
+        self.number_of_channels = self.neighbours.shape[0]
+        self.electrode_area = (np.zeros(self.number_of_channels) +
+                               electrode_area)
+        self.c_liquid = c_liquid
+        self.c_filler = c_filler
+        self.transit_time_s = transit_time_s
+        self.coverage = np.zeros((0, self.number_of_channels))
+        # Neighbour table with sentinel (-1) mapped to a padding column.
+        self._neighbours_padded = np.where(self.neighbours < 0,
+                                           self.number_of_channels,
+                                           self.neighbours)
+
+    def add_drop(self, channels, volume=None):
+        '''
+        Add drop covering specified channels.
+
+        Parameters
+        ----------
+        channels : list-like
+            Channels covered by drop.
+        volume : float, optional
+            Drop volume in units of electrodes.  By default, the volume is
+            equal to the number of covered channels.
+
+        Returns
+        -------
+        int
+            Index of added drop.
+        '''
+        channels = np.asarray(channels, dtype=int)
+        if volume is None:
+            volume = float(channels.size)
+        coverage = np.zeros(self.number_of_channels)
+        coverage[channels] = volume / channels.size
+        self.coverage = np.vstack([self.coverage, coverage])
+        return self.coverage.shape[0] - 1
+
+    def clear_drops(self):
+        self.coverage = np.zeros((0, self.number_of_channels))
+
+    def drop_channels(self, threshold=.5):
+        '''
+        Returns
+        -------
+        list[numpy.ndarray]
+            Channels where coverage of each drop is at least
+            :data:`threshold`.
+        '''
+        return [np.flatnonzero(c >= threshold) for c in self.coverage]
+
+    def step(self, duration_s, actuated):
+        '''
+        Advance model by specified duration with constant actuation.
+
+        Parameters
+        ----------
+        duration_s : float
+            Duration in seconds.
+        actuated : numpy.ndarray
+            Boolean actuation state of each channel.
+        '''
+        if not self.coverage.shape[0] or duration_s <= 0:
+            return
+        actuated = np.asarray(actuated, dtype=bool)
+        covered = self.coverage > 1e-3
+        # Pad with a "no neighbour" column, which is never covered.
+        padded = np.hstack([covered, np.zeros((covered.shape[0], 1),
+                                              dtype=bool)])
+        frontier = covered | padded[:, self._neighbours_padded].any(axis=-1)
+        pulling = frontier & actuated
+        n_pulling = pulling.sum(axis=1)
+        moving = n_pulling > 0
+        if not moving.any():
+            return
+        volume = self.coverage[moving].sum(axis=1)
+        target = (pulling[moving] * (volume / n_pulling[moving])[:, None])
+        alpha = 1 - np.exp(-duration_s / self.transit_time_s)
+        self.coverage[moving] += alpha * (target - self.coverage[moving])
+
+    def channel_capacitances(self):
+        '''
+        Returns
+        -------
+        numpy.ndarray
+            Capacitance (in farads) of each channel electrode.
+        '''
+        coverage = np.clip(self.coverage.sum(axis=0), 0, 1)
+        return self.electrode_area * (self.c_liquid * coverage +
+                                      self.c_filler * (1 - coverage))
+
+
+class I2cEeprom(object):
+    '''
+    Simulated ``CAT24Cxx`` I2C EEPROM.
+
+    Like the real device, a write wraps around to the start of the page
+    rather than crossing a page boundary.
+
+    Parameters
+    ----------
+    size : int, optional
+        EEPROM size in bytes.
+    page_size : int, optional
+        Page (i.e., write buffer) size in bytes.
+    '''
+    def __init__(self, size=256, page_size=16):
+        self.data = np.full(size, 0xFF, dtype='uint8')
+        self.page_size = page_size
+        self.address = 0
+        #: Number of write cycles, i.e., page writes.
+        self.write_count = 0
+
+    def write(self, data):
+        '''
+        Handle I2C write, i.e., set address and (optionally) write data.
+        '''
+        data = np.atleast_1d(np.asarray(data, dtype='uint8'))
+        self.address = int(data[0]) % self.data.size
+        if data.size > 1:
+            page_start = self.address - self.address % self.page_size
+            offsets = (self.address - page_start +
+                       np.arange(data.size - 1)) % self.page_size
+            self.data[page_start + offsets] = data[1:]
+            self.write_count += 1
+
+    def read(self, count):
+        addresses = (self.address + np.arange(count)) % self.data.size
+        self.address = int(addresses[-1] + 1) % self.data.size
+        return self.data[addresses]
+
+
+class _PacketQueueManager(object):
+    '''
+    Stand-in for the ``base_node_rpc`` packet queue manager, which dispatches
+    event stream packets to :attr:`signals`.
+    '''
+    def __init__(self):
+        self.signals = blinker.Namespace()
+
+
+class SimulatedNode(object):
+    '''
+    Emulation of the low-level DropBot firmware RPC interface.
+
+    Method names, arguments and return types match the respective methods of
+    the generated ``node.Proxy`` class (i.e., the methods of ``Node`` in
+    ``src/Node.h``).
+
+    Parameters
+    ----------
+    physics : DropletModel, optional
+        Electrode/droplet physics model.  A default :class:`DropletModel` is
+        used if not specified.
+    time_scale : float, optional
+        Ratio of simulated time to real time, e.g., ``10`` simulates ten
+        seconds per second of real time.  If ``None``, simulated time is only
+        advanced by explicit calls to :meth:`advance`.
+    powered : bool, optional
+        If ``False``, simulate a board with no 12V power supply connected.
+    noise : float, optional
+        Relative standard deviation of simulated capacitance measurements.
+    seed : int, optional
+        Random number generator seed.
+    time_us_offset : int, optional
+        Initial value of the device microsecond counter (which wraps around
+        at ``2 ** 32``).
+    tick_s : float, optional
+        Real-time period of simulation thread (only used if
+        :data:`time_scale` is not ``None``).
+    max_step_s : float, optional
+        Maximum simulated duration of a single physics model step.
+
+    Attributes
+    ----------
+    eeproms : dict
+        Simulated I2C EEPROMs (e.g., :class:`I2cEeprom`), keyed by I2C
+        address.
+    '''
+    def __init__(self, physics=None, time_scale=1., powered=True, noise=.005,
+                 seed=None, time_us_offset=0, tick_s=.005,
+                 max_step_s=CAPACITANCE_TIMER_MS * 1e-3, **kwargs):
+        # `ProxyMixin` passes its `ignore` argument along.
+        kwargs.pop('ignore', None)
+        if kwargs:
+            raise TypeError('Unexpected keyword argument(s): %s' %
+                            ', '.join(sorted(kwargs)))
+        from .config import Config
+        from .state import State
+
+        self.physics = DropletModel() if physics is None else physics
+        self.time_scale = time_scale
+        self.powered = powered
+        self.noise = noise
+        self.tick_s = tick_s
+        self.max_step_s = max_step_s
+        self.random = np.random.RandomState(seed)
+        self._packet_queue_manager = _PacketQueueManager()
+        self._binary_event_dispatcher = \
+            BinaryEventDispatcher(self._packet_queue_manager.signals)
+        self._event_queue = collections.deque()
+        self._lock = threading.RLock()
+
+        N = self.physics.number_of_channels
+        self._channel_states = np.zeros(N, dtype=bool)
+        self._disabled_channels = np.zeros(N, dtype=bool)
+        self._channel_scan_mask = np.ones(N, dtype=bool)
+        # Pre-assign firmware neighbours table to match chip layout.
+        self._channel_neighbours = pack_neighbours(self.physics.neighbours)
+        self._drops = np.zeros(0, dtype='uint8')
+        self._test_capacitor = 0.
+        self._shorts = []
+        self.eeproms = {}
+
+        self._Config = Config
+        self._State = State
+        self._config = Config(i2c_address=10)
+        self._saved_config = Config()
+        self._saved_config.CopyFrom(self._config)
+        self._state = State()
+        self._state.channel_count = N
+
+        self._time_us_offset = time_us_offset
+        self._time_s = 0.
+        self._wall_time_offset = time.time()
+        self._capacitance_timer_ms = 0
+        self._capacitance_timestamp_ms = 0
+        self._target_count = 0
+        self._actuation_program = []
+        self._actuation_step = -1
+        self._actuation_step_start_ms = 0
+        self._actuation_step_readings = \
+            collections.deque(maxlen=STEADY_STATE_WINDOW_SIZE)
+        self._steady_state_readings = \
+            collections.deque(maxlen=CAPACITANCE_STEADY_WINDOW_SIZE)
+        self._channel_scan_timestamp_ms = 0
+
+        self._stop_event = threading.Event()
+        self._thread = None
+        if self.time_scale is not None:
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+
+    # ## Simulation control ##
+    def _run(self):
+        previous = time.time()
+        while not self._stop_event.wait(self.tick_s):
+            now = time.time()
+            self.advance((now - previous) * self.time_scale)
+            previous = now
+
+    def advance(self, duration_s):
+        '''
+        Advance simulated time, stepping the physics model and running
+        periodic firmware tasks (e.g., capacitance measurement events).
+
+        Parameters
+        ----------
+        duration_s : float
+            Simulated duration in seconds.
+        '''
+        with self._lock:
+            end_s = self._time_s + duration_s
+            while True:
+                next_timer_s = (self._capacitance_timer_ms +
+                                CAPACITANCE_TIMER_MS) * 1e-3
+                step_end_s = min(end_s, next_timer_s,
+                                 self._time_s + self.max_step_s)
+                self.physics.step(step_end_s - self._time_s,
+                                  self._actuated_channels())
+                self._time_s = step_end_s
+                if step_end_s >= next_timer_s:
+                    self._capacitance_timer_ms += CAPACITANCE_TIMER_MS
+                    self._on_capacitance_timer()
+                    self._update_channel_scan()
+                if step_end_s >= end_s:
+                    break
+        self._flush_events()
+
+    def _on_capacitance_timer(self):
+        # See `signal_timer_ms_` capacitance callback in `Node.h`.
+        if not (self._state.hv_output_enabled and
+                self._state.hv_output_selected):
+            return
+        n_samples = self._config.capacitance_n_samples
+        value = self.capacitance(n_samples)
+        actuation_voltage = self._actuation_voltage()
+        time_us = self.microseconds()
+
+        if self._state.target_capacitance > 0:
+            if value >= self._state.target_capacitance:
+                self._target_count += 1
+                if self._target_count >= self._state.target_count:
+                    message = {'event': 'capacitance-exceeded',
+                               'new_value': value,
+                               'target': self._state.target_capacitance,
+                               'time_us': time_us, 'n_samples': n_samples,
+                               'count': self._target_count,
+                               'V_a': actuation_voltage}
+                    # Reset target capacitance.
+                    self._state.target_capacitance = 0
+                    self._send_event(message)
+            else:
+                self._target_count = 0
+
+        if self._state.steady_state_rel_std > 0:
+            self._update_steady_state(value, time_us, n_samples,
+                                      actuation_voltage)
+
+        now = self.millis()
+        interval_ms = self._state.capacitance_update_interval_ms
+        if interval_ms > 0 and interval_ms < now - \
+                self._capacitance_timestamp_ms:
+            self._send_event({'event': 'capacitance-updated',
+                              'new_value': value, 'time_us': time_us,
+                              'n_samples': n_samples,
+                              'V_a': actuation_voltage})
+            self._capacitance_timestamp_ms = now
+
+        if self._actuation_step >= 0:
+            self._update_actuation_program(value, actuation_voltage)
+
+    def _update_channel_scan(self):
+        # See periodic channel scan in `loop()` in `Node.h`.
+        interval_ms = self._state.channel_scan_interval_ms
+        now = self.millis()
+        if interval_ms > 0 and interval_ms < now - \
+                self._channel_scan_timestamp_ms and \
+                self._event_enabled(_EVENT_CHANNELS_SCANNED) and \
+                self._actuation_step < 0:
+            self._scan_channels()
+            self._channel_scan_timestamp_ms = self.millis()
+
+    def _scan_channels(self):
+        # See `scan_channels()` in `Node.h`.
+        channels = np.flatnonzero(self._channel_scan_mask)
+        if not channels.size:
+            return 0
+        start = self.microseconds()
+        capacitances = SimulatedNode.channel_capacitances(self, channels)
+        if self._event_enabled(_EVENT_CHANNELS_SCANNED):
+            self._send_event({'event': 'channels-scanned',
+                              'channels': channels.tolist(),
+                              'capacitances': capacitances.tolist(),
+                              'n_samples':
+                              self._config.capacitance_n_samples,
+                              'time_us': start,
+                              'duration_us': self.microseconds() - start})
+        return channels.size
+
+    def _update_steady_state(self, value, time_us, n_samples,
+                             actuation_voltage):
+        # See `capacitance-steady` event in `Node.h`.
+        state = self._state
+        self._steady_state_readings.append((self.millis(), value))
+        rel_std = steady_state_rel_std(self._steady_state_readings,
+                                       state.steady_state_window_ms,
+                                       state.steady_state_threshold)
+        if 0 <= rel_std <= state.steady_state_rel_std:
+            message = {'event': 'capacitance-steady', 'new_value': value,
+                       'rel_std': rel_std,
+                       'window_ms': state.steady_state_window_ms,
+                       'time_us': time_us, 'n_samples': n_samples,
+                       'V_a': actuation_voltage}
+            # Reset steady state criteria.
+            state.steady_state_rel_std = 0
+            self._send_event(message)
+
+    def _start_actuation_step(self, index):
+        # See `_start_actuation_step()` in `Node.h`.
+        if index >= len(self._actuation_program):
+            self._stop_actuation_program()
+            return
+        self._actuation_step = index
+        start = self.microseconds()
+        self._channel_states = \
+            self._actuation_program[index]['channel_states'].copy()
+        self._send_channels_updated(start, self.microseconds())
+        self._actuation_step_start_ms = self.millis()
+        self._actuation_step_readings.clear()
+
+    def _stop_actuation_program(self):
+        running = self._actuation_step >= 0
+        self._actuation_step = -1
+        self._actuation_program = []
+        return running
+
+    def _update_actuation_program(self, capacitance, actuation_voltage):
+        # See `_update_actuation_program()` in `Node.h`.
+        step = self._actuation_program[self._actuation_step]
+        now = self.millis()
+        duration_ms = now - self._actuation_step_start_ms
+        self._actuation_step_readings.append((now, capacitance))
+
+        completed = duration_ms >= step['min_duration_ms']
+        if completed and step['target_capacitance'] > 0:
+            completed = capacitance >= step['target_capacitance']
+        if completed and step['steady_state_rel_std'] > 0:
+            rel_std = steady_state_rel_std(self._actuation_step_readings,
+                                           step['min_duration_ms'])
+            completed = 0 <= rel_std <= step['steady_state_rel_std']
+
+        message = {'step': self._actuation_step, 'new_value': capacitance,
+                   'time_us': self.microseconds(), 'duration_ms': duration_ms,
+                   'V_a': actuation_voltage}
+        if completed:
+            self._send_event(dict(message, event='actuation-step-completed'))
+            self._start_actuation_step(self._actuation_step + 1)
+        elif step['timeout_ms'] > 0 and duration_ms >= step['timeout_ms']:
+            self._send_event(dict(message, event='actuation-step-timeout'))
+            self._stop_actuation_program()
+
+    def _send_event(self, message):
+        # Events are queued and only sent by `_flush_events()` (i.e., after
+        # releasing the simulation lock) to allow receivers to call back into
+        # the simulator from any thread.
+        if self._state.binary_events and \
+                message['event'] in _BINARY_EVENT_NAMES:
+            # See `_send_capacitance_record()` in `Node.h`.
+            message = encode_records([message])
+        self._event_queue.append(message)
+
+    def _flush_events(self):
+        # Consecutive binary event records are published as a batch.
+        payloads = []
+        while True:
+            try:
+                message = self._event_queue.popleft()
+            except IndexError:
+                break
+            if isinstance(message, bytes):
+                payloads.append(message)
+                continue
+            if payloads:
+                self._publish_records(payloads)
+                payloads = []
+            self._publish(message)
+        if payloads:
+            self._publish_records(payloads)
+
+    def _publish(self, message):
+        '''
+        Dispatch event message to receivers of the respective signal.
+
+        Sub-classes may override this method to publish events elsewhere
+        (e.g., as event stream packets over a serial link).
+        '''
+        self._packet_queue_manager.signals.signal(message['event'])\
+            .send(message)
+
+    def _publish_records(self, payloads):
+        '''
+        Dispatch binary event record packet payloads (see
+        :mod:`dropbot.binary_events`).
+
+        Sub-classes may override this method to publish records elsewhere
+        (e.g., as stream packets over a serial link).
+        '''
+        self._binary_event_dispatcher.dispatch(payloads)
+
+    def _event_enabled(self, event):
+        mask = event | _EVENT_ENABLE
+        return (self._state.event_mask & mask) == mask
+
+    def _actuated_channels(self):
+        return self._channel_states & ~self._disabled_channels
+
+    def _actuation_voltage(self):
+        if self.powered and self._state.hv_output_enabled:
+            return self._state.voltage
+        return 0.
+
+    def _measure(self, capacitances):
+        capacitances = np.asarray(capacitances, dtype=float)
+        return capacitances * (1 + self.noise *
+                               self.random.standard_normal(capacitances
+                                                           .shape))
+
+    def simulate_halt(self, error='output-current-exceeded', **kwargs):
+        '''
+        Simulate firmware halt (e.g., due to output current limit being
+        exceeded) and send ``halted`` event.
+        '''
+        with self._lock:
+            self.halt()
+            self._send_event({'event': 'halted',
+                              'wall_time': SimulatedNode.wall_time(self),
+                              'error': dict(name=error, **kwargs)})
+        self._flush_events()
+
+    def terminate(self):
+        self._stop_event.set()
+        if (self._thread is not None and self._thread is not
+                threading.current_thread()):
+            self._thread.join()
+        self._thread = None
+
+    def __del__(self):
+        self.terminate()
+
+    @property
+    def signals(self):
+        return self._packet_queue_manager.signals
+
+    # ## Generated proxy RPC methods ##
+    def _connect(self, *args, **kwargs):
+        pass
+
+    def microseconds(self):
+        return (int(round(self._time_s * 1e6)) + self._time_us_offset) & \
+            0xFFFFFFFF
+
+    def millis(self):
+        return int(self._time_s * 1e3)
+
+    def sync_time(self, utc_timestamp):
+        with self._lock:
+            self._wall_time_offset = utc_timestamp - self._time_s
+            return self.millis()
+
+    def wall_time(self):
+        return self._wall_time_offset + self._time_s
+
+    def serialize_state(self):
+        return np.frombuffer(self._state.SerializeToString(), dtype='uint8')
+
+    def update_state(self, state):
+        '''
+        Merge fields set in :data:`state` into device state.
+
+        Returns ``False`` (and leaves device state unchanged) if any field
+        value is rejected.
+        '''
+        if not isinstance(state, self._State):
+            state = self._State.FromString(_to_bytes(state))
+        with self._lock:
+            for field, value in state.ListFields():
+                if not self._validate_state_field(field.name, value):
+                    return False
+            if state.HasField('target_capacitance'):
+                # See `on_state_target_capacitance_changed` in `Node.h`.
+                self._target_count = 0
+            if state.HasField('steady_state_rel_std') or \
+                    state.HasField('steady_state_window_ms'):
+                # See `on_state_steady_state_rel_std_changed` in `Node.h`.
+                self._steady_state_readings.clear()
+            self._state.MergeFrom(state)
+        return True
+
+    def _validate_state_field(self, name, value):
+        if name == 'voltage':
+            return value <= self._config.max_voltage
+        elif name == 'frequency':
+            return (self._config.min_frequency <= value <=
+                    self._config.max_frequency)
+        elif name == 'channel_count':
+            # Read-only.
+            return False
+        elif name == 'steady_state_window_ms':
+            return value <= MAX_STEADY_STATE_WINDOW_MS
+        return True
+
+    def serialize_config(self):
+        return np.frombuffer(self._config.SerializeToString(), dtype='uint8')
+
+    def update_config(self, config):
+        if not isinstance(config, self._Config):
+            config = self._Config.FromString(_to_bytes(config))
+        with self._lock:
+            self._config.MergeFrom(config)
+        return True
+
+    def save_config(self):
+        self._saved_config.CopyFrom(self._config)
+
+    def load_config(self):
+        self._config.CopyFrom(self._saved_config)
+
+    def reset_config(self):
+        self._config.Clear()
+
+    def set_id(self, id):
+        self._config.id = id
+
+    def _uuid(self):
+        return np.arange(16, dtype='uint8')
+
+    def hardware_version(self):
+        return np.frombuffer(b'simulator', dtype='uint8')
+
+    def min_waveform_voltage(self):
+        # Boost converter output with digital potentiometer at maximum.
+        return 1.5 / 2.0 * (2e6 / (self._config.R7 + self._config.pot_max) +
+                            1)
+
+    def initialize_switching_boards(self):
+        return self.physics.number_of_channels
+
+    def number_of_channels(self):
+        return self.physics.number_of_channels
+
+    def state_of_channels(self):
+        with self._lock:
+            # Firmware reads the switching board outputs (i.e., excluding
+            # disabled channels) back into the requested channel states.
+            self._channel_states = self._actuated_channels()
+            return pack_channels(self._channel_states)
+
+    def set_state_of_channels(self, channel_states):
+        channel_states = np.asarray(channel_states, dtype='uint8')
+        with self._lock:
+            N = self.physics.number_of_channels
+            if channel_states.size != N // 8:
+                return False
+            start = self.microseconds()
+            self._channel_states = unpack_channels(channel_states)[:N] \
+                .astype(bool)
+            self._send_channels_updated(start, self.microseconds())
+        self._flush_events()
+        return True
+
+    def update_channels(self, on, off):
+        on = np.asarray(on, dtype=int)
+        off = np.asarray(off, dtype=int)
+        with self._lock:
+            N = self.physics.number_of_channels
+            if (on >= N).any() or (off >= N).any():
+                return -1
+            start = self.microseconds()
+            before = pack_channels(self._actuated_channels())
+            self._channel_states[off] = False
+            self._channel_states[on] = True
+            # Number of switching board output registers written.
+            write_count = int((pack_channels(self._actuated_channels()) !=
+                               before).sum())
+            self._send_channels_updated(start, self.microseconds())
+        self._flush_events()
+        return write_count
+
+    def _send_channels_updated(self, start, end):
+        if self._event_enabled(_EVENT_CHANNELS_UPDATED):
+            actuated = np.flatnonzero(self._actuated_channels())
+            self._send_event({'event': 'channels-updated',
+                              'actuated': actuated.tolist(),
+                              'start': start, 'end': end,
+                              'n': actuated.size})
+
+    def run_actuation_program(self, channel_states, min_durations_ms,
+                              timeouts_ms, target_capacitances,
+                              steady_state_rel_stds):
+        channel_states = np.asarray(channel_states, dtype='uint8')
+        columns = [np.asarray(values) for values in
+                   (min_durations_ms, timeouts_ms, target_capacitances,
+                    steady_state_rel_stds)]
+        step_count = columns[0].size
+        with self._lock:
+            N = self.physics.number_of_channels
+            if step_count > MAX_ACTUATION_PROGRAM_STEPS or \
+                    channel_states.size != step_count * (N // 8) or \
+                    any(values.size != step_count for values in columns):
+                return -1
+            packed = channel_states.reshape(step_count, N // 8)
+            self._actuation_program = \
+                [{'channel_states': unpack_channels(packed[i])[:N]
+                  .astype(bool),
+                  'min_duration_ms': int(columns[0][i]),
+                  'timeout_ms': int(columns[1][i]),
+                  'target_capacitance': float(columns[2][i]),
+                  'steady_state_rel_std': float(columns[3][i])}
+                 for i in range(step_count)]
+            self._start_actuation_step(0)
+        self._flush_events()
+        return step_count
+
+    def stop_actuation_program(self):
+        with self._lock:
+            return self._stop_actuation_program()
+
+    def actuation_step(self):
+        return self._actuation_step
+
+    def turn_off_all_channels(self):
+        with self._lock:
+            self._channel_states[:] = False
+
+    def disabled_channels_mask(self):
+        return pack_channels(self._disabled_channels)
+
+    def set_disabled_channels_mask(self, mask):
+        with self._lock:
+            N = self.physics.number_of_channels
+            mask = np.asarray(mask, dtype='uint8')
+            if mask.size == N // 8:
+                self._disabled_channels = unpack_channels(mask)[:N]\
+                    .astype(bool)
+
+    def channel_scan_mask(self):
+        return pack_channels(self._channel_scan_mask)
+
+    def set_channel_scan_mask(self, mask):
+        with self._lock:
+            N = self.physics.number_of_channels
+            mask = np.asarray(mask, dtype='uint8')
+            if mask.size != N // 8:
+                return False
+            self._channel_scan_mask = unpack_channels(mask)[:N].astype(bool)
+            return True
+
+    def scan_channels(self):
+        with self._lock:
+            count = self._scan_channels()
+        self._flush_events()
+        return count
+
+    def halt(self):
+        with self._lock:
+            self._state.hv_output_enabled = False
+            # Firmware disables (rather than turns off) all channels.
+            self._disabled_channels[:] = True
+
+    def enable_event(self, event):
+        with self._lock:
+            self._state.event_mask |= event
+
+    def disable_event(self, event):
+        with self._lock:
+            enabled = bool(self._state.event_mask & event)
+            self._state.event_mask &= ~event & 0xFFFFFFFF
+            return enabled
+
+    def enable_events(self):
+        self.enable_event(_EVENT_ENABLE)
+
+    def disable_events(self):
+        return self.disable_event(_EVENT_ENABLE)
+
+    def select_on_board_test_capacitor(self, index):
+        # Index -1 selects no test capacitor.
+        self._test_capacitor = NOMINAL_ON_BOARD_CALIBRATION_CAPACITORS\
+            .values[index + 1]
+        return self._test_capacitor
+
+    def detect_shorts(self, delay_ms):
+        return np.array(self._shorts, dtype='uint8')
+
+    def capacitance(self, n_samples):
+        '''
+        Measured capacitance (in farads) of actuated channels.
+        '''
+        with self._lock:
+            C = self.physics.channel_capacitances()
+            load = C[self._actuated_channels()].sum() + self._test_capacitor
+            return float(self._measure(load))
+
+    def channel_capacitances(self, channels):
+        channels = np.asarray(channels, dtype=int)
+        with self._lock:
+            C = self.physics.channel_capacitances()
+            return self._measure(C[channels]).astype('float32')
+
+    def all_channel_capacitances(self):
+        return SimulatedNode.channel_capacitances(
+            self, np.arange(self.physics.number_of_channels))
+
+    def analog_read(self, pin):
+        if pin == 1:
+            # High voltage feedback (see `ProxyMixin.measure_voltage()`).
+            voltage = self._state.voltage if self.powered else 0
+            value = voltage * 2 * 20e3 / 2e6 / 3.3 * 2 ** 16
+            return int(np.clip(value, 0, 2 ** 16 - 1))
+        return 0
+
+    def analog_reads_simple(self, pin, n_samples):
+        '''
+        Simulate analog reads.
+
+        Pin 11 reads the chip load feedback signal, i.e., a square wave
+        centered at mid-scale with an amplitude consistent with the actuated
+        capacitance (see :meth:`ProxyMixin.measure_capacitance`).
+        '''
+        with self._lock:
+            if pin == 1:
+                values = np.full(n_samples, self.analog_read(1), dtype=float)
+            elif pin == 11:
+                voltage = (self._state.voltage if self.powered else 0)
+                C = self.capacitance(0)
+                amplitude = (C * voltage / self._config.C16 if voltage > 0
+                             else 0)
+                phase = self.random.randint(2)
+                signs = np.where((np.arange(n_samples) + phase) % 2, 1, -1)
+                values = (1.65 + signs * amplitude +
+                          self.random.normal(0, 1e-3, n_samples))
+                values *= 2 ** 16 / 3.3
+            else:
+                values = np.zeros(n_samples)
+        return np.clip(values, 0, 2 ** 16 - 1).astype('uint16')
+
+    def chip_load_feedback(self, n_samples, reduce):
+        with self._lock:
+            time_us = self.microseconds()
+            if reduce:
+                feedback = [self.u16_percentile_diff(11, n_samples, 25, 75)]
+            else:
+                feedback = self.analog_reads_simple(11, n_samples)
+            header = [time_us & 0xFFFF, time_us >> 16, self.analog_read(1)]
+        return np.concatenate([header, feedback]).astype('uint16')
+
+    def u16_percentile_diff(self, pin, n_samples, low_percentile,
+                            high_percentile):
+        values = np.sort(self.analog_reads_simple(pin, n_samples))
+        # Same (nearest rank) percentile indices as the firmware.
+        high_i, low_i = [min(int(round(p / 100. * n_samples)), n_samples - 1)
+                         for p in (high_percentile, low_percentile)]
+        return int(values[high_i]) - int(values[low_i])
+
+    def i2c_write(self, address, data):
+        if address not in self.eeproms:
+            raise IOError('No I2C device at address 0x%02x.' % address)
+        self.eeproms[address].write(data)
+
+    def i2c_read(self, address, n_bytes_to_read):
+        if address not in self.eeproms:
+            raise IOError('No I2C device at address 0x%02x.' % address)
+        return self.eeproms[address].read(n_bytes_to_read)
+
+    def i2c_eeprom_write_page(self, i2c_address, eeprom_address, data,
+                              timeout_ms):
+        if i2c_address not in self.eeproms:
+            return -1
+        self.eeproms[i2c_address].write(np.concatenate([[eeprom_address],
+                                                        data]))
+        # Write cycle completes before first acknowledge poll.
+        return 1
+
+    def neighbours(self):
+        return self._channel_neighbours.copy()
+
+    def clear_neighbours(self):
+        self._channel_neighbours[:] = PACKED_NO_NEIGHBOUR
+
+    def assign_neighbours(self, packed_channel_neighbours):
+        packed = np.asarray(packed_channel_neighbours, dtype='uint8')
+        if packed.size != self._channel_neighbours.size:
+            return -1
+        elif ((packed >= self.physics.number_of_channels) &
+              (packed != PACKED_NO_NEIGHBOUR)).any():
+            return -2
+        self._channel_neighbours[:] = packed
+        return 0
+
+    def _get_drops(self, channels, c_threshold):
+        if not c_threshold:
+            c_threshold = DEFAULT_DROP_CAPACITANCE_THRESHOLD
+        start = self.microseconds()
+        capacitances = SimulatedNode.channel_capacitances(self, channels)
+        end = self.microseconds()
+        liquid = set(int(c) for c, C in zip(channels, capacitances)
+                     if C >= c_threshold)
+        neighbours = self._channel_neighbours.reshape(-1, 4)
+        drops = []
+        # Group channels connected through neighbours into drops.
+        while liquid:
+            pending = [min(liquid)]
+            liquid.remove(pending[0])
+            drop = []
+            while pending:
+                channel = pending.pop()
+                drop.append(channel)
+                for neighbour in neighbours[channel]:
+                    if neighbour in liquid:
+                        liquid.remove(neighbour)
+                        pending.append(neighbour)
+            drops.append(sorted(drop))
+        self._drops = np.array([v for drop in drops
+                                for v in [len(drop)] + drop], dtype='uint8')
+        if self._event_enabled(_EVENT_DROPS_DETECTED):
+            C = dict(zip(map(int, channels), capacitances.tolist()))
+            self._send_event({'event': 'drops-detected',
+                              'drops': {'channels': drops,
+                                        'capacitances': [[C[c] for c in d]
+                                                         for d in drops]},
+                              'start': start, 'end': end})
+        self._flush_events()
+        return self._drops
+
+    def get_all_drops(self, c_threshold):
+        return self._get_drops(np.arange(self.physics.number_of_channels),
+                               c_threshold)
+
+    def get_channels_drops(self, channels, c_threshold):
+        return self._get_drops(np.asarray(channels, dtype=int), c_threshold)
+
+    def drops(self):
+        return self._drops.copy()
+
+    def ram_free(self):
+        return 0
+
+
+def _to_bytes(data):
+    if isinstance(data, six.binary_type):
+        return data
+    return np.asarray(data, dtype='uint8').tobytes()
+
+
+try:
+    from .proxy_py2 import ProxyMixin
+
+    class SimulatedProxy(ProxyMixin, SimulatedNode):
+        '''
+        DropBot proxy backed by a :class:`SimulatedNode`.
+
+        Accepts the same keyword arguments as :class:`SimulatedNode`, in
+        addition to the :class:`ProxyMixin` ``ignore`` argument.
+        '''
+        device_name = 'dropbot'
+
+        def init_dma(self):
+            # No DMA on a simulated device.
+            pass
+except (ImportError, TypeError):
+    SimulatedProxy = None
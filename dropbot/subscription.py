@@ -0,0 +1,227 @@
+'''
+Scoped subscriptions to DropBot signals (e.g., ``capacitance-updated``).
+
+Receivers connected directly to a ``blinker`` signal stay connected until
+explicitly disconnected, so each coroutine that connects a receiver without
+disconnecting it adds to the cost of dispatching every subsequent event.  A
+:class:`Subscription` connects a receiver only for the duration of a ``with``
+block.
+
+.. versionadded:: 1.74.0
+
+Example
+-------
+
+    >>> with subscribe(proxy.signals.signal('channels-updated')) as updates:
+    ...     proxy.set_state_of_channels(pd.Series(1, index=[5]), append=False)
+    ...     message = yield asyncio.From(updates.get())
+'''
+from __future__ import absolute_import, division, print_function
+import collections
+import threading
+
+import trollius as asyncio
+
+__all__ = ['MessageStream', 'STREAM_POLICIES', 'Subscription', 'subscribe']
+
+#: Policies for handling messages received while a :class:`MessageStream`
+#: is full.
+STREAM_POLICIES = ('drop-oldest', 'block')
+
+
+class Subscription(object):
+    '''
+    Connection of a receiver to a ``blinker`` signal, which is disconnected
+    upon exiting the ``with`` block (or calling :meth:`close`).
+
+    Parameters
+    ----------
+    signal : blinker.Signal
+        Signal to subscribe to.
+    receiver : callable, optional
+        Function called with each message sent by :data:`signal`.  If not
+        specified, messages are queued and may be retrieved (in the event loop
+        thread) using the :meth:`get` coroutine.
+    loop : asyncio.BaseEventLoop, optional
+        Event loop that :meth:`get` runs in.  Default is the current event
+        loop.
+
+    Attributes
+    ----------
+    signal : blinker.Signal
+    receiver : callable
+        Receiver connected to :attr:`signal`.
+    '''
+    def __init__(self, signal, receiver=None, loop=None):
+        self.signal = signal
+        self._queue = None
+        if receiver is None:
+            self._loop = loop or asyncio.get_event_loop()
+            self._queue = asyncio.Queue(loop=self._loop)
+            receiver = self._enqueue
+        self.receiver = receiver
+        self.connected = False
+
+    def _enqueue(self, message):
+        # Messages are sent from the serial thread.
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, message)
+
+    def open(self):
+        '''
+        Connect receiver to signal.
+
+        The signal holds a strong reference to the receiver until
+        :meth:`close` is called.
+        '''
+        if not self.connected:
+            self.signal.connect(self.receiver, weak=False)
+            self.connected = True
+        return self
+
+    def close(self):
+        '''
+        Disconnect receiver from signal.
+        '''
+        if self.connected:
+            self.signal.disconnect(self.receiver)
+            self.connected = False
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *args):
+        self.close()
+
+    @asyncio.coroutine
+    def get(self):
+        '''
+        Wait for next message sent by signal.
+
+        Only available if no :data:`receiver` was specified.
+
+        Returns
+        -------
+        dict
+            Signal message.
+        '''
+        if self._queue is None:
+            raise RuntimeError('Messages are passed to `%s`.' % self.receiver)
+        message = yield asyncio.From(self._queue.get())
+        raise asyncio.Return(message)
+
+
+class MessageStream(Subscription):
+    '''
+    Bounded stream of messages sent by a ``blinker`` signal.
+
+    Messages are buffered as they are sent (e.g., from the serial thread)
+    and read in batches using the :meth:`read` coroutine.  The event loop is
+    only woken once per batch, i.e., not once per message, and a consumer
+    that falls behind receives all buffered messages in the next batch.
+
+    Parameters
+    ----------
+    signal : blinker.Signal
+        Signal to subscribe to.
+    maxlen : int, optional
+        Maximum number of buffered messages.
+    policy : str, optional
+        Handling of messages sent while :data:`maxlen` messages are buffered:
+
+         - ``"drop-oldest"``: discard the oldest buffered message.
+         - ``"block"``: block the sending thread until the next
+           :meth:`read`.  Must **not** be used if messages are sent from the
+           event loop thread.
+    loop : asyncio.BaseEventLoop, optional
+        Event loop that :meth:`read` runs in.  Default is the current event
+        loop.
+
+    Attributes
+    ----------
+    dropped : int
+        Number of messages discarded by the ``"drop-oldest"`` policy.
+
+    Example
+    -------
+
+        >>> with MessageStream(proxy.signals.signal('capacitance-updated'),
+        ...                    maxlen=100) as stream:
+        ...     while True:
+        ...         messages = yield asyncio.From(stream.read())
+        ...         ...
+    '''
+    def __init__(self, signal, maxlen=100, policy='drop-oldest', loop=None):
+        if policy not in STREAM_POLICIES:
+            raise ValueError('Policy must be one of: %s' %
+                             ', '.join(STREAM_POLICIES))
+        if maxlen < 1:
+            raise ValueError('`maxlen` must be at least 1.')
+        super(MessageStream, self).__init__(signal, receiver=self._push)
+        self._loop = loop or asyncio.get_event_loop()
+        self.maxlen = maxlen
+        self.policy = policy
+        self.dropped = 0
+        self._messages = collections.deque()
+        self._condition = threading.Condition()
+        self._ready = asyncio.Event(loop=self._loop)
+        self._wake_scheduled = False
+
+    def __len__(self):
+        return len(self._messages)
+
+    def _push(self, message):
+        with self._condition:
+            if self.policy == 'block':
+                while len(self._messages) >= self.maxlen and self.connected:
+                    self._condition.wait()
+            elif len(self._messages) >= self.maxlen:
+                self._messages.popleft()
+                self.dropped += 1
+            self._messages.append(message)
+            wake = not self._wake_scheduled
+            self._wake_scheduled = True
+        if wake:
+            self._loop.call_soon_threadsafe(self._ready.set)
+
+    def close(self):
+        super(MessageStream, self).close()
+        with self._condition:
+            # Release blocked senders.
+            self._condition.notify_all()
+
+    @asyncio.coroutine
+    def read(self):
+        '''
+        Wait for at least one message.
+
+        Returns
+        -------
+        list
+            All buffered messages, oldest first (at most :attr:`maxlen`).
+        '''
+        while True:
+            with self._condition:
+                if self._messages:
+                    messages = list(self._messages)
+                    self._messages.clear()
+                    self._wake_scheduled = False
+                    self._condition.notify_all()
+                    break
+                # Discard any wake up scheduled before the last batch.
+                self._ready.clear()
+            yield asyncio.From(self._ready.wait())
+        raise asyncio.Return(messages)
+
+
+def subscribe(signal, receiver=None, loop=None):
+    '''
+    Subscribe to signal for the duration of a ``with`` block.
+
+    See :class:`Subscription` for parameters.
+
+    Returns
+    -------
+    Subscription
+        Subscription context manager.
+    '''
+    return Subscription(signal, receiver=receiver, loop=loop)
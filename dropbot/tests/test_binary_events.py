@@ -0,0 +1,119 @@
+from __future__ import absolute_import, division
+
+import blinker
+import numpy as np
+import pandas as pd
+import pytest
+
+import dropbot.binary_events as be
+import dropbot.simulator as sim
+from dropbot.recorder import CapacitanceRecorder
+
+
+def _messages(count, event='capacitance-updated'):
+    return [{'event': event, 'new_value': 10e-12 + i * 1e-12,
+             'time_us': ((1 << 32) - 2 + i) % (1 << 32), 'n_samples': 50,
+             'V_a': 100.}
+            for i in range(count)]
+
+
+def test_encode_decode():
+    assert be.RECORD_DTYPE.itemsize == 16
+    messages = _messages(3) + _messages(1, 'capacitance-steady')
+    payload = be.encode_records(messages)
+    assert len(payload) == 4 * 16
+    records = be.decode_records(payload)
+    assert records['type'].tolist() == [1, 1, 1, 3]
+    # Microsecond counter wraps around.
+    assert records['time_us'].tolist() == [(1 << 32) - 2, (1 << 32) - 1, 0,
+                                           (1 << 32) - 2]
+    decoded = be.records_to_messages(records)
+    assert [m['event'] for m in decoded] == [m['event'] for m in messages]
+    assert np.allclose([m['new_value'] for m in decoded],
+                       [m['new_value'] for m in messages])
+    # Records from several packets are decoded as a single batch.
+    assert be.decode_records([payload[:16], payload[16:]]).tolist() == \
+        records.tolist()
+    with pytest.raises(ValueError):
+        be.decode_records(payload[:20])
+
+
+@pytest.mark.parametrize('messages', [True, False])
+def test_dispatcher(messages):
+    signals = blinker.Namespace()
+    batches = []
+    updated = []
+    signals.signal('capacitance-records').connect(batches.append, weak=False)
+    signals.signal('capacitance-updated').connect(updated.append, weak=False)
+    dispatcher = be.BinaryEventDispatcher(signals, messages=messages)
+    payloads = [be.encode_records([m]) for m in _messages(5)]
+    dispatcher.dispatch(payloads)
+    assert [b.size for b in batches] == [5]
+    assert dispatcher.decoded == 5
+    assert len(updated) == (5 if messages else 0)
+
+
+def test_simulator_binary_events():
+    node = sim.SimulatedNode(time_scale=None, seed=0)
+    recorder = CapacitanceRecorder()
+    batches = []
+    signals = node._packet_queue_manager.signals
+    signals.signal('capacitance-records').connect(batches.append, weak=False)
+    signals.signal('capacitance-records').connect(recorder.extend,
+                                                  weak=False)
+    exceeded = []
+    signals.signal('capacitance-exceeded').connect(exceeded.append,
+                                                   weak=False)
+    node.physics.add_drop([0])
+    node.update_state(node._State(hv_output_enabled=True,
+                                  capacitance_update_interval_ms=20,
+                                  target_capacitance=5e-12,
+                                  target_count=3, binary_events=True))
+    states = np.zeros(node.number_of_channels(), dtype=int)
+    states[1] = 1
+    node.set_state_of_channels(sim.pack_channels(states))
+    node.advance(1.)
+
+    # Records are dispatched in one batch per call to `advance()`.
+    assert len(batches) == 1
+    records = batches[0]
+    names = [be.EVENT_TYPES[t] for t in records['type']]
+    assert names.count('capacitance-updated') == 40
+    assert names.count('capacitance-exceeded') == 1
+    # Exceeded records are also sent as event messages.
+    assert len(exceeded) == 1
+    assert len(recorder) == 41
+    assert np.array_equal(recorder.arrays()['time_us'], records['time_us'])
+
+
+def test_simulated_proxy_binary_events():
+    if sim.SimulatedProxy is None:
+        pytest.skip('`ProxyMixin` is not available.')
+    proxy = sim.SimulatedProxy(time_scale=None)
+    try:
+        batches = []
+        updated = []
+        proxy.signals.signal('capacitance-records')\
+            .connect(batches.append, weak=False)
+        proxy.signals.signal('capacitance-updated')\
+            .connect(updated.append, weak=False)
+        proxy.physics.add_drop([0])
+        proxy.update_state(hv_output_enabled=True,
+                           capacitance_update_interval_ms=10,
+                           target_capacitance=1e-12, target_count=1)
+        proxy.set_state_of_channels(pd.Series(1, index=[0]), append=False)
+        assert proxy.enable_binary_events(messages=False)
+        proxy.advance(.1)
+        records = np.concatenate(batches)
+        assert [be.EVENT_TYPES[t] for t in records['type']] == \
+            ['capacitance-exceeded'] + 4 * ['capacitance-updated']
+        assert not updated
+        # Cached state is updated from exceeded record.
+        assert proxy.state.target_capacitance == 0
+
+        assert proxy.disable_binary_events()
+        proxy.advance(.1)
+        assert sum(b.size for b in batches) == 5
+        assert len(updated) == 4
+    finally:
+        proxy.terminate()
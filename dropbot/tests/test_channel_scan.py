@@ -0,0 +1,54 @@
+from __future__ import absolute_import, division
+
+import numpy as np
+import pytest
+
+from dropbot.channel_scan import ChannelScanBuffer
+
+
+def _scan(i, channels=(0, 1, 2)):
+    return {'event': 'channels-scanned', 'channels': list(channels),
+            'capacitances': [i + c * 1e-3 for c in channels],
+            'n_samples': 50, 'time_us': 1000 * i, 'duration_us': 10}
+
+
+def test_channel_scan_buffer():
+    scans = ChannelScanBuffer(4, capacity=3)
+    assert len(scans) == 0
+    assert scans.arrays()['capacitances'].shape == (0, 4)
+    with pytest.raises(IndexError):
+        scans.latest()
+
+    scans(_scan(0))
+    scans.append(_scan(1, channels=[3]))
+    assert len(scans) == 2
+    arrays = scans.arrays()
+    assert arrays['time_us'].tolist() == [0, 1000]
+    assert np.isnan(arrays['capacitances'][1, :3]).all()
+    assert arrays['capacitances'][1, 3] == 1.003
+
+    for i in range(2, 7):
+        scans.append(_scan(i))
+    assert scans.total == 7
+    assert len(scans) == 3
+    # Most recent scans, in chronological order.
+    arrays = scans.arrays()
+    assert arrays['time_us'].tolist() == [4000, 5000, 6000]
+    assert np.allclose(arrays['capacitances'][:, 0], [4, 5, 6])
+    assert scans.arrays(2)['time_us'].tolist() == [5000, 6000]
+    assert np.allclose(scans.latest()[:3], [6, 6.001, 6.002])
+
+    # Views share memory with buffer (i.e., no copies).
+    assert np.shares_memory(arrays['capacitances'], scans._capacitances)
+    assert arrays['capacitances'].flags['C_CONTIGUOUS']
+
+    df = scans.to_frame()
+    assert df.index.tolist() == [4000, 5000, 6000]
+    assert df.columns.tolist() == [0, 1, 2, 3]
+    assert np.allclose(df[0], [4, 5, 6])
+
+    scans.clear()
+    assert len(scans) == 0
+
+    with pytest.raises(IndexError):
+        scans.append(_scan(0, channels=[4]))
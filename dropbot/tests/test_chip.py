@@ -1,6 +1,10 @@
 import nose.tools
+import pandas as pd
 
-from dropbot.chip import get_all_intersections, draw, get_channel_neighbours
+from dropbot.chip import (get_all_intersections, draw, get_channel_neighbours,
+                          get_neighbours_array, _get_all_intersections_loop,
+                          synthetic_grid_shapes)
+from dropbot.simulator import grid_neighbours
 from dropbot import DATA_DIR
 import svg_model
 
@@ -44,3 +48,41 @@ def test_get_channel_neighbours():
     counts = channel_neighbours.fillna(-1).groupby(level='channel').count()
     nose.tools.eq_(4, counts.min())
     nose.tools.eq_(4, counts.max())
+
+
+def test_intersections_match_loop():
+    # Grid index must find exactly the same intersections (in the same order)
+    # as testing each segment against every other segment.
+    df_shapes = svg_model.svg_shapes_to_df(SVG_PATH)
+    pd.testing.assert_frame_equal(_get_all_intersections_loop(df_shapes),
+                                  get_all_intersections(df_shapes))
+
+
+def test_intersections_synthetic_grid():
+    for electrode_count, jitter in ((25, 0.), (49, .05), (64, .3)):
+        df_shapes = synthetic_grid_shapes(electrode_count, jitter=jitter,
+                                          seed=0)
+        df_intersections = get_all_intersections(df_shapes)
+        nose.tools.assert_greater(df_intersections.shape[0], 0)
+        pd.testing.assert_frame_equal(_get_all_intersections_loop(df_shapes),
+                                      df_intersections)
+
+
+def test_intersections_synthetic_grid_gap():
+    # Electrodes further apart than the distance threshold are not neighbours.
+    df_shapes = synthetic_grid_shapes(4, gap=1.)
+    nose.tools.eq_(0, get_all_intersections(df_shapes).shape[0])
+
+
+def test_neighbours_array_synthetic_grid():
+    # 240 channels (i.e., 15 rows of 16 electrodes).
+    df_shapes = synthetic_grid_shapes(240, jitter=.05, seed=0)
+    neighbours = get_neighbours_array(df_shapes)
+    nose.tools.eq_((240, 4), neighbours.shape)
+    nose.tools.ok_((neighbours == grid_neighbours((15, 16))).all())
+
+    channel_neighbours = get_channel_neighbours(df_shapes,
+                                                channel_count=256)
+    nose.tools.eq_(256 * 4, channel_neighbours.shape[0])
+    nose.tools.eq_(1, channel_neighbours.loc[(17, 'up')])
+    nose.tools.ok_(channel_neighbours.loc[240:].isnull().all())
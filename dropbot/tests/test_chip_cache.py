@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+
+import nose.tools
+import pandas as pd
+
+from dropbot import DATA_DIR
+from dropbot.chip import (chip_info, get_channel_neighbours, get_segments,
+                          ureg)
+from dropbot.chip_cache import ChipCache
+
+
+SVG_PATH = DATA_DIR.joinpath('SCI-BOTS 90-pin array', 'device.svg')
+
+
+def _cache_dir(function):
+    def _wrapped():
+        cache_dir = tempfile.mkdtemp(prefix='dropbot-chip-cache')
+        try:
+            function(cache_dir)
+        finally:
+            shutil.rmtree(cache_dir)
+    _wrapped.__name__ = function.__name__
+    return _wrapped
+
+
+@_cache_dir
+def test_chip_info_cached(cache_dir):
+    cache = ChipCache(cache_dir)
+    expected = chip_info(SVG_PATH)
+    for i in range(2):
+        # First call populates cache, second call reads from cache.
+        info = chip_info(SVG_PATH, cache=cache)
+        pd.testing.assert_frame_equal(expected['electrode_shapes'],
+                                      info['electrode_shapes'])
+        for key in ('electrode_channels', 'channel_electrodes'):
+            pd.testing.assert_series_equal(expected[key], info[key])
+    nose.tools.eq_(1, len(os.listdir(cache_dir)))
+
+
+@_cache_dir
+def test_segments_distance_threshold(cache_dir):
+    cache = ChipCache(cache_dir)
+    for distance_threshold in (0.1 * ureg.mm, 0.5 * ureg.mm, 0.1 * ureg.mm):
+        pd.testing.assert_frame_equal(get_segments(SVG_PATH,
+                                                   distance_threshold),
+                                      get_segments(SVG_PATH,
+                                                   distance_threshold,
+                                                   cache=cache))
+
+
+@_cache_dir
+def test_channel_neighbours_cached(cache_dir):
+    cache = ChipCache(cache_dir)
+    expected = get_channel_neighbours(SVG_PATH)
+    for i in range(2):
+        pd.testing.assert_series_equal(expected,
+                                       get_channel_neighbours(SVG_PATH,
+                                                              cache=cache))
+
+
+@_cache_dir
+def test_evict_least_recently_used(cache_dir):
+    with open(SVG_PATH, 'rb') as input_:
+        data = input_.read()
+    svg_paths = []
+    for i in range(3):
+        # Each copy has a different content hash.
+        svg_paths.append(os.path.join(cache_dir, 'device-%d.svg' % i))
+        with open(svg_paths[-1], 'wb') as output:
+            output.write(data + ('<!-- %d -->' % i).encode('utf8'))
+    cache = ChipCache(os.path.join(cache_dir, 'cache'), max_entries=2)
+    cache.chip_info(svg_paths[0])
+    cache.chip_info(svg_paths[1])
+    # Mark second chip as least recently used.
+    os.utime(cache._entry_dir(cache._read_source(svg_paths[1])[0]), (0, 0))
+    cache.chip_info(svg_paths[2])
+    keys = [cache._read_source(svg_path)[0] for svg_path in svg_paths]
+    nose.tools.eq_(sorted([keys[0], keys[2]]),
+                   sorted(os.listdir(cache.cache_dir)))
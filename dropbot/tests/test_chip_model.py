@@ -0,0 +1,52 @@
+from __future__ import absolute_import
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dropbot.chip_model import ChipModel
+
+
+def _chip_info():
+    # Electrodes `electrode003` and `electrode004` share channel 3; channel 5
+    # is not connected to any electrode.
+    ids = ['electrode%03d' % i for i in range(6)]
+    electrode_shapes = pd.DataFrame({'area': [1., 2., 3., 4., 5., 6.]},
+                                    index=pd.Index(ids, name='id'))
+    electrode_channels = pd.Series([0, 1, 2, 3, 3, 4], index=ids,
+                                   name='channel')
+    channel_electrodes = pd.Series(electrode_channels.index,
+                                   index=electrode_channels.values)
+    return {'electrode_shapes': electrode_shapes,
+            'electrode_channels': electrode_channels,
+            'channel_electrodes': channel_electrodes}
+
+
+def test_chip_model_tables():
+    chip_info_ = _chip_info()
+    chip_model = ChipModel.from_chip_info(chip_info_, channel_count=8)
+    assert chip_model.channel_count == 8
+    assert chip_model.channel_areas.tolist() == [1, 2, 3, 9, 6, 0, 0, 0]
+    assert chip_model.channel_electrodes.tolist() == [0, 1, 2, 3, 5, -1, -1,
+                                                      -1]
+
+    channels = [1, 3, 4]
+    # Matches `pandas` lookups used prior to `ChipModel`.
+    electrodes = chip_info_['channel_electrodes'].loc[channels]
+    assert chip_model.actuated_area(channels) == \
+        chip_info_['electrode_shapes']['area'].loc[electrodes].sum()
+    assert (chip_model.electrode_ids_of(channels).tolist() ==
+            electrodes.tolist())
+    assert np.isclose(chip_model.target_capacitance(channels, 2e-6, .5),
+                      .5 * 17 * 2e-6)
+
+
+def test_chip_model_to_channels():
+    chip_model = ChipModel.from_chip_info(_chip_info())
+    assert chip_model.to_channels([4, 0]).tolist() == [4, 0]
+    assert chip_model.to_channels(np.array([4, 0], dtype='uint8')).tolist() \
+        == [4, 0]
+    assert chip_model.to_channels(['electrode004',
+                                   'electrode001']).tolist() == [3, 1]
+    with pytest.raises(KeyError):
+        chip_model.to_channels(['electrode010'])
@@ -0,0 +1,72 @@
+from __future__ import absolute_import, division
+
+import numpy as np
+import pytest
+
+import dropbot.simulator as sim
+from dropbot.clock import COUNTER_PERIOD_US, DeviceClock, unwrap_time_us
+
+
+def test_unwrap_time_us():
+    time_us = np.array([COUNTER_PERIOD_US - 20, COUNTER_PERIOD_US - 10, 0, 10])
+    assert unwrap_time_us(time_us).tolist() == [0, 10, 20, 30]
+    assert unwrap_time_us([]).tolist() == []
+
+
+def test_device_clock_unwrap():
+    clock = DeviceClock()
+    start_us = COUNTER_PERIOD_US - 100
+    assert clock.unwrap(start_us) == start_us
+    assert clock.unwrap(50) == COUNTER_PERIOD_US + 50
+    # Values slightly older than most recent value are not treated as wrap
+    # around.
+    assert clock.unwrap(COUNTER_PERIOD_US - 10) == COUNTER_PERIOD_US - 10
+    assert clock.unwrap(60) == COUNTER_PERIOD_US + 60
+    clock.reset()
+    assert clock.unwrap(60) == 60
+
+
+def test_device_clock_drift():
+    clock = DeviceClock()
+    assert clock.host_time(0) is None
+    # Device clock runs 50 ppm fast and wraps around during the samples.
+    rate = 1 / (1 + 50e-6)
+    host_0 = 1.5e9
+    start_us = COUNTER_PERIOD_US - 30 * 10 ** 6
+    random = np.random.RandomState(0)
+    for i in range(8):
+        device_s = 10. * i
+        # Sample host time with up to 100 us (symmetric) latency jitter.
+        host_time = host_0 + rate * device_s + random.uniform(-1e-4, 1e-4)
+        clock.add_sample(host_time,
+                         int(start_us + device_s * 1e6) % COUNTER_PERIOD_US)
+    assert clock.sample_count == 8
+    assert np.isclose(clock.drift, rate - 1, atol=5e-6)
+    time_us = int(start_us + 75e6) % COUNTER_PERIOD_US
+    assert abs(clock.host_time(time_us) - (host_0 + rate * 75.)) < 1e-4
+
+
+def test_simulated_proxy_host_time():
+    if sim.SimulatedProxy is None:
+        pytest.skip('`ProxyMixin` is not available.')
+    proxy = sim.SimulatedProxy(time_scale=None,
+                               time_us_offset=COUNTER_PERIOD_US - 500000,
+                               clock_refresh_interval_s=None)
+    try:
+        # Device clock is sampled upon connection.
+        assert proxy.clock.sample_count == 1
+        messages = []
+        proxy.signals.signal('capacitance-updated').connect(messages.append,
+                                                            weak=False)
+        proxy.update_state(hv_output_enabled=True,
+                           capacitance_update_interval_ms=20)
+        proxy.advance(1.)
+        time_us = [m['time_us'] for m in messages]
+        host_time = np.array([m['host_time'] for m in messages])
+        # Device counter wraps around, but host time is monotonic.
+        assert (np.diff(time_us) < 0).any()
+        assert np.allclose(np.diff(host_time), .025)
+        assert np.allclose(host_time - host_time[0],
+                           unwrap_time_us(time_us) * 1e-6)
+    finally:
+        proxy.terminate()
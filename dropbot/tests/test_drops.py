@@ -0,0 +1,68 @@
+from __future__ import absolute_import
+import numpy as np
+import pytest
+
+from dropbot.drops import (Drops, benchmark_unpack_drops, decode_drops,
+                           synthetic_packed_drops, unpack_drops)
+
+
+def test_decode_drops():
+    offsets, channels = decode_drops(np.array([2, 0, 1, 1, 50],
+                                              dtype='uint8'))
+    assert offsets.tolist() == [0, 2, 3]
+    assert channels.tolist() == [0, 1, 50]
+
+    offsets, channels = decode_drops(np.zeros(0, dtype='uint8'))
+    assert offsets.tolist() == [0]
+    assert channels.tolist() == []
+
+    # Last drop is truncated.
+    offsets, channels = decode_drops(np.array([1, 0, 3, 1, 2],
+                                              dtype='uint8'))
+    assert offsets.tolist() == [0, 1, 3]
+    assert channels.tolist() == [0, 1, 2]
+
+
+def test_unpack_drops():
+    packed = np.array([2, 0, 1, 1, 50], dtype='uint8')
+    drops = unpack_drops(packed)
+    assert isinstance(drops, list)
+    assert [d.tolist() for d in drops] == [[0, 1], [50]]
+
+
+def test_drops_sequence():
+    drops = Drops(*decode_drops(np.array([2, 0, 1, 1, 50], dtype='uint8')))
+    assert len(drops) == 2
+    assert drops[-1].tolist() == [50]
+    assert drops.sizes.tolist() == [2, 1]
+    assert [d.tolist() for d in drops] == [[0, 1], [50]]
+    assert drops.tolist() == [[0, 1], [50]]
+    with pytest.raises(IndexError):
+        drops[2]
+    # Drops are views into concatenated channels array.
+    assert drops[0].base is drops.channels
+
+
+@pytest.mark.parametrize('channel_count,drop_count', [(120, 10), (1024, 100),
+                                                      (16384, 2000)])
+def test_synthetic_packed_drops(channel_count, drop_count):
+    packed = synthetic_packed_drops(channel_count, drop_count, seed=0)
+    drops = unpack_drops(packed)
+    # Reference decoding, one drop at a time.
+    expected = []
+    i = 0
+    while i < packed.shape[0]:
+        expected.append(packed[i + 1:i + 1 + packed[i]].tolist())
+        i += packed[i] + 1
+    assert isinstance(drops, list)
+    assert [d.tolist() for d in drops] == expected
+    offsets, channels = decode_drops(packed)
+    assert Drops(offsets, channels).tolist() == expected
+    assert len(set(channels.tolist())) == channels.shape[0]
+
+
+def test_benchmark_unpack_drops():
+    results = benchmark_unpack_drops({'120 channels':
+                                      dict(channel_count=120)}, number=10)
+    assert results.index.tolist() == ['120 channels']
+    assert (results > 0).all().all()
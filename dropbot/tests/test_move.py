@@ -0,0 +1,167 @@
+from __future__ import absolute_import, division
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dropbot.simulator as sim
+
+move = pytest.importorskip('dropbot.move')
+
+
+def _test_steady_state(messages, std_error=.02, min_duration=.3,
+                       threshold=10e-12):
+    # Reference `DataFrame`-based implementation (prior to 1.74.0).
+    df = pd.DataFrame(messages[-100:])
+    df['time'] = df.time_us * 1e-6
+    df['time'] -= df.time.iloc[0]
+    df.set_index('time', inplace=True)
+    if (df.index.values[-1] - df.index.values[0]) < min_duration:
+        return False
+    start = df.index.values[-1] - min_duration
+    d = df.new_value.loc[start:].describe()
+    result = (d['std'] / d['50%']) < std_error
+    return result and (d['50%'] >= threshold)
+
+
+def _messages(count, interval_us=9973, seed=0, time_us=0):
+    random = np.random.RandomState(seed)
+    # Capacitance rises, then settles with decreasing noise.
+    #
+    # XXX Interval does not evenly divide `min_duration` to avoid time window
+    # boundary rounding differences.
+    t = np.arange(count) * interval_us
+    C = 20e-12 * (1 - np.exp(-t / .3e6))
+    C *= 1 + random.normal(scale=.05, size=count) * np.exp(-t / .5e6)
+    return [{'event': 'capacitance-updated', 'new_value': C_i,
+             'time_us': int(time_us + t_i) % (1 << 32)}
+            for t_i, C_i in zip(t, C)]
+
+
+@pytest.mark.parametrize('min_duration,threshold', [(.3, 10e-12),
+                                                    (.05, 10e-12),
+                                                    (.3, 30e-12),
+                                                    (2., 10e-12)])
+def test_steady_state_detector(min_duration, threshold):
+    messages = _messages(400)
+    detector = move.SteadyStateDetector(min_duration=min_duration,
+                                        threshold=threshold)
+    received = []
+    for message in messages:
+        received.append(message)
+        assert detector(received) == \
+            bool(_test_steady_state(received, min_duration=min_duration,
+                                    threshold=threshold))
+
+
+def test_steady_state_detector_time_wrap():
+    messages = _messages(200, time_us=(1 << 32) - 500000)
+    detector = move.SteadyStateDetector()
+    unwrapped = [dict(m, time_us=m['time_us'] + (1 << 32)
+                      if m['time_us'] < (1 << 31) else m['time_us'])
+                 for m in messages]
+    results = [detector.update(m) for m in messages]
+    assert any(results)
+    assert results == [bool(_test_steady_state(unwrapped[:i + 1]))
+                       for i in range(len(messages))]
+
+
+def test_steady_state_detector_new_messages_list():
+    messages = _messages(300)
+    detector = move.SteadyStateDetector()
+    assert detector(messages)
+    # A new actuation starts with a new list of messages.
+    assert not detector(messages[:5])
+    assert not detector(list(messages[:5]))
+
+
+@pytest.mark.parametrize('device_steady_state', [True, False])
+def test_actuate_steady_state(device_steady_state):
+    if sim.SimulatedProxy is None:
+        pytest.skip('`ProxyMixin` is not available.')
+    asyncio = move.asyncio
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    # Simulate 20x faster than real-time.
+    proxy = sim.SimulatedProxy(time_scale=20, seed=0)
+    try:
+        proxy.physics.add_drop([0])
+        proxy.voltage = 100
+        proxy.enable_events()
+        # Capacitance updates are only required to check steady state on the
+        # host.
+        proxy.update_state(capacitance_update_interval_ms=0 if
+                           device_steady_state else 20)
+        messages = loop.run_until_complete(move.actuate(
+            proxy, [1], move.SteadyStateDetector(min_duration=.2),
+            device_steady_state=device_steady_state))
+        if device_steady_state:
+            assert [m['event'] for m in messages] == ['capacitance-steady']
+            assert proxy.state.steady_state_rel_std == 0
+        else:
+            assert set(m['event'] for m in messages) == \
+                {'capacitance-updated'}
+        assert messages[-1]['new_value'] >= 10e-12
+        assert [d.tolist() for d in proxy.get_drops()] == [[1]]
+    finally:
+        proxy.terminate()
+        loop.close()
+
+
+def test_move_drops():
+    if sim.SimulatedProxy is None:
+        pytest.skip('`ProxyMixin` is not available.')
+    from dropbot.routing import RoutePlanner, plan_routes
+
+    asyncio = move.asyncio
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    # Simulate 20x faster than real-time.
+    proxy = sim.SimulatedProxy(time_scale=20, seed=0)
+    try:
+        for channel in (0, 11, 108):
+            proxy.physics.add_drop([channel])
+        proxy.voltage = 100
+        proxy.enable_events()
+        planner = RoutePlanner(proxy.physics.neighbours)
+        schedule = plan_routes(planner, [0, 11, 108], [2, 9, 110])
+        task = move.move_drops(proxy, schedule, min_duration=.05,
+                               wrapper=move.ft.partial(asyncio.wait_for,
+                                                       timeout=5))
+        results = loop.run_until_complete(task)
+        # Two combined actuations per step.
+        assert len(results) == 2 * (schedule.shape[0] - 1)
+        assert sorted(d.tolist() for d in proxy.get_drops()) == \
+            [[2], [9], [110]]
+    finally:
+        proxy.terminate()
+        loop.close()
+
+
+def test_run_program():
+    if sim.SimulatedProxy is None:
+        pytest.skip('`ProxyMixin` is not available.')
+    asyncio = move.asyncio
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    # Simulate 20x faster than real-time.
+    proxy = sim.SimulatedProxy(time_scale=20, seed=0)
+    try:
+        proxy.physics.add_drop([0])
+        proxy.voltage = 100
+        steps = move.route_program([0, 1, 2, 14], min_duration=.1)
+        assert steps.channels.tolist() == [[0, 1], [1], [1, 2], [2], [2, 14],
+                                           [14]]
+        messages = loop.run_until_complete(move.run_program(proxy, steps))
+        assert [m['step'] for m in messages] == list(range(6))
+        assert [d.tolist() for d in proxy.get_drops()] == [[14]]
+
+        # Channel 30 is not next to the drop.
+        steps = [{'channels': [30], 'min_duration': .1,
+                  'target_capacitance': 10e-12, 'timeout': .5}]
+        with pytest.raises(move.MoveTimeout) as exception:
+            loop.run_until_complete(move.run_program(proxy, steps))
+        assert exception.value.route_i == (30, )
+    finally:
+        proxy.terminate()
+        loop.close()
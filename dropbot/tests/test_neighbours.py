@@ -0,0 +1,47 @@
+from __future__ import absolute_import
+
+import numpy as np
+import pytest
+
+from dropbot.neighbours import (NO_NEIGHBOUR, PACKED_NO_NEIGHBOUR,
+                                neighbours_to_series, pack_neighbours,
+                                resize_neighbours, series_to_neighbours,
+                                unpack_neighbours)
+from dropbot.simulator import grid_neighbours
+
+
+def test_pack_neighbours():
+    # 240 channels, i.e., 6 switching boards.
+    neighbours = grid_neighbours((12, 20))
+    packed = pack_neighbours(neighbours)
+    assert packed.dtype == np.uint8
+    assert packed.shape == (240 * 4, )
+    assert packed[:4].tolist() == [PACKED_NO_NEIGHBOUR, 20,
+                                   PACKED_NO_NEIGHBOUR, 1]
+    assert (unpack_neighbours(packed) == neighbours).all()
+
+
+def test_pack_neighbours_too_many_channels():
+    with pytest.raises(ValueError):
+        pack_neighbours(grid_neighbours((16, 16)))
+
+
+def test_neighbours_series():
+    neighbours = grid_neighbours((3, 4))
+    channel_neighbours = neighbours_to_series(neighbours)
+    assert channel_neighbours.loc[(5, 'up')] == 1
+    assert np.isnan(channel_neighbours.loc[(0, 'left')])
+    assert (series_to_neighbours(channel_neighbours) == neighbours).all()
+    # Missing entries are treated as no neighbour.
+    resized = series_to_neighbours(channel_neighbours.dropna(), 16)
+    assert (resized[:12] == neighbours).all()
+    assert (resized[12:] == NO_NEIGHBOUR).all()
+
+
+def test_resize_neighbours():
+    neighbours = grid_neighbours((3, 4))
+    resized = resize_neighbours(neighbours, 240)
+    assert resized.shape == (240, 4)
+    assert (resize_neighbours(resized, 12) == neighbours).all()
+    with pytest.raises(ValueError):
+        resize_neighbours(neighbours, 8)
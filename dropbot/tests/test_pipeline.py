@@ -0,0 +1,108 @@
+from __future__ import absolute_import, division
+import threading
+import time
+
+import pytest
+
+from dropbot.pipeline import PipelineClosed, PipelinedCaller, RequestPipeline
+
+
+class Packet(object):
+    def __init__(self, data=b'', iuid=0):
+        self._data = data
+        self.iuid = iuid
+
+    def data(self):
+        return self._data
+
+    def tostring(self):
+        # Fake devices need the `iuid` to respond.
+        return self.iuid, self._data
+
+
+class Device(object):
+    '''
+    Fake device which echoes each request after a fixed latency.
+    '''
+    def __init__(self, latency_s=0):
+        self.latency_s = latency_s
+        self.pipeline = None
+        self.requests = []
+
+    def write(self, request):
+        iuid, data = request
+        self.requests.append(data)
+        timer = threading.Timer(self.latency_s, self.pipeline.dispatch,
+                                args=(Packet(data, iuid), ))
+        timer.start()
+
+
+class Proxy(object):
+    def __init__(self, caller):
+        self.caller = caller
+
+    def echo(self, data):
+        return self.caller.send(Packet(data), timeout=1).data()
+
+
+def _proxy(depth, latency_s):
+    device = Device(latency_s)
+    device.pipeline = RequestPipeline(device.write, depth=depth)
+    proxy = Proxy(None)
+    proxy.caller = PipelinedCaller(proxy, device.pipeline)
+    return proxy, device
+
+
+def test_responses_matched_by_iuid():
+    pipeline = RequestPipeline(lambda data: None, depth=4)
+    packets = [Packet(b'%d' % i) for i in range(4)]
+    futures = [pipeline.send(p) for p in packets]
+    assert [p.iuid for p in packets] == [1, 2, 3, 4]
+    assert pipeline.pending == 4
+
+    # Respond out of order.
+    for packet in reversed(packets):
+        assert pipeline.dispatch(Packet(b'response ' + packet.data(),
+                                        packet.iuid))
+    assert [f.result(0).data() for f in futures] == [b'response 0',
+                                                     b'response 1',
+                                                     b'response 2',
+                                                     b'response 3']
+    assert pipeline.pending == 0
+    # Unknown `iuid`.
+    assert not pipeline.dispatch(Packet(b'', 99))
+
+
+def test_close_fails_pending():
+    pipeline = RequestPipeline(lambda data: None, depth=2)
+    future = pipeline.send(Packet())
+    pipeline.close()
+    with pytest.raises(PipelineClosed):
+        future.result(0)
+    with pytest.raises(PipelineClosed):
+        pipeline.send(Packet())
+
+
+def test_submit_preserves_order_and_overlaps():
+    latency_s = .02
+    proxy, device = _proxy(depth=8, latency_s=latency_s)
+    start = time.time()
+    futures = [proxy.caller.submit('echo', b'%d' % i) for i in range(32)]
+    results = [f.result(timeout=5) for f in futures]
+    duration = time.time() - start
+    proxy.caller.shutdown()
+
+    assert results == [b'%d' % i for i in range(32)]
+    assert device.requests == results
+    # Sequential requests would take at least `32 * latency_s`.
+    assert duration < .5 * 32 * latency_s
+
+
+def test_timeout_frees_slot():
+    pipeline = RequestPipeline(lambda data: None, depth=1)
+    caller = PipelinedCaller(None, pipeline)
+    with pytest.raises(IOError):
+        caller.send(Packet(), timeout=.01)
+    assert pipeline.pending == 0
+    # Slot is available again.
+    pipeline.send(Packet())
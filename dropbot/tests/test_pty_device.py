@@ -0,0 +1,138 @@
+from __future__ import absolute_import, division
+import json
+import os
+import select
+import struct
+import time
+
+import numpy as np
+import pytest
+
+import dropbot.pty_device as ptd
+import dropbot.simulator as sim
+
+COMMAND_CODES = {i: name for i, name in enumerate(ptd.RPC_SIGNATURES)}
+COMMANDS = {name: i for i, name in COMMAND_CODES.items()}
+
+
+def _request(name, *arrays_and_scalars):
+    '''
+    Pack request payload the same way as a generated ``node.Proxy`` method.
+    '''
+    signature, _ = ptd.RPC_SIGNATURES[name]
+    fields = []
+    values = []
+    array_data = b''
+    struct_size = sum(8 if t.endswith('[]') else np.dtype(t).itemsize
+                      for _, t in signature)
+    for (arg_name, type_), value in zip(signature, arrays_and_scalars):
+        if type_.endswith('[]'):
+            value = np.ascontiguousarray(value, dtype=type_[:-2])
+            fields += [(arg_name + '_length', 'uint32'),
+                       (arg_name + '_data', 'uint32')]
+            values += [value.shape[0], struct_size + len(array_data)]
+            array_data += value.tobytes()
+        else:
+            fields.append((arg_name, type_))
+            values.append(value)
+    payload = np.array([tuple(values)], dtype=fields).tobytes() if fields \
+        else b''
+    return struct.pack('<H', COMMANDS[name]) + payload + array_data
+
+
+def test_crc16():
+    # CRC-16/ARC check value.
+    assert ptd.crc16(b'123456789') == 0xBB3D
+
+
+def test_parser_resynchronizes():
+    parser = ptd.PacketParser()
+    data = (b'garbage' + ptd.encode_packet(b'hello', iuid=7) +
+            ptd.encode_packet(iuid=8, type_=ptd.PACKET_TYPE_ACK))
+    # Feed one byte at a time.
+    packets = sum((parser.feed(data[i:i + 1]) for i in range(len(data))), [])
+    assert packets == [ptd.Packet(7, ptd.PACKET_TYPE_DATA, b'hello'),
+                       ptd.Packet(8, ptd.PACKET_TYPE_ACK, b'')]
+
+    corrupt = bytearray(ptd.encode_packet(b'hello', iuid=9))
+    corrupt[-1] ^= 0xFF
+    assert parser.feed(bytes(corrupt)) == []
+
+
+def test_decode_arguments():
+    payload = _request('get_channels_drops', [1, 2, 3], 5e-12)
+    signature, _ = ptd.RPC_SIGNATURES['get_channels_drops']
+    channels, c_threshold = ptd.decode_arguments(signature, payload[2:])
+    assert channels.tolist() == [1, 2, 3]
+    assert np.isclose(c_threshold, 5e-12)
+
+
+def test_handle_packet():
+    node = sim.SimulatedNode(time_scale=None)
+    device = ptd.PtyDevice(node=node, command_codes=COMMAND_CODES)
+    response = device.handle_packet(ptd.Packet(3, ptd.PACKET_TYPE_DATA,
+                                                _request('analog_reads_simple',
+                                                         11, 10)))
+    packet, = ptd.PacketParser().feed(response)
+    assert packet.iuid == 3
+    assert np.frombuffer(packet.payload, dtype='uint16').shape == (10, )
+
+
+@pytest.mark.skipif(not hasattr(os, 'openpty'), reason='Requires pty.')
+def test_pty_round_trip():
+    node = sim.SimulatedNode(time_scale=None)
+    with ptd.PtyDevice(node=node, command_codes=COMMAND_CODES) as device:
+        fd = os.open(device.port, os.O_RDWR | os.O_NOCTTY)
+        try:
+            os.write(fd, ptd.encode_packet(_request('number_of_channels'),
+                                           iuid=1))
+            node.physics.add_drop([0])
+            node.update_state(node._State(hv_output_enabled=True,
+                                          capacitance_update_interval_ms=10))
+            node.advance(.03)
+
+            parser = ptd.PacketParser()
+            packets = []
+            start = time.time()
+            while len(packets) < 2 and time.time() - start < 5:
+                if select.select([fd], [], [], .1)[0]:
+                    packets += parser.feed(os.read(fd, 1024))
+        finally:
+            os.close(fd)
+
+    by_type = {p.type: p for p in packets}
+    response = by_type[ptd.PACKET_TYPE_DATA]
+    assert response.iuid == 1
+    assert struct.unpack('<H', response.payload)[0] == 120
+    event = json.loads(by_type[ptd.PACKET_TYPE_STREAM].payload.decode('utf8'))
+    assert event['event'] == 'capacitance-updated'
+
+
+def test_pty_binary_events():
+    from dropbot.binary_events import BINARY_EVENTS_STREAM_ID, decode_records
+
+    node = sim.SimulatedNode(time_scale=None)
+    with ptd.PtyDevice(node=node, command_codes=COMMAND_CODES) as device:
+        fd = os.open(device.port, os.O_RDWR | os.O_NOCTTY)
+        try:
+            node.update_state(node._State(hv_output_enabled=True,
+                                          capacitance_update_interval_ms=10,
+                                          binary_events=True))
+            node.advance(.1)
+
+            parser = ptd.PacketParser()
+            packets = []
+            start = time.time()
+            while len(packets) < 4 and time.time() - start < 5:
+                if select.select([fd], [], [], .1)[0]:
+                    packets += parser.feed(os.read(fd, 1024))
+        finally:
+            os.close(fd)
+
+    # One stream packet per record, like the firmware.
+    assert len(packets) == 4
+    assert all(p.type == ptd.PACKET_TYPE_STREAM and
+               p.iuid == BINARY_EVENTS_STREAM_ID for p in packets)
+    records = decode_records([p.payload for p in packets])
+    assert records['type'].tolist() == 4 * [1]
+    assert np.diff(records['time_us']).tolist() == 3 * [25000]
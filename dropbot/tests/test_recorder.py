@@ -0,0 +1,84 @@
+from __future__ import absolute_import, division
+
+import numpy as np
+import pytest
+
+import dropbot.simulator as sim
+from dropbot.recorder import CapacitanceRecorder
+
+
+def _messages(count, start=0):
+    return [{'event': 'capacitance-updated', 'time_us': 25000 * i,
+             'new_value': 1e-12 * i, 'V_a': 100., 'n_samples': 50}
+            for i in range(start, start + count)]
+
+
+def test_recorder_grows_by_chunks():
+    recorder = CapacitanceRecorder(chunk_size=8)
+    messages = _messages(30)
+    for message in messages[:5]:
+        recorder(message)
+    assert recorder.capacity == 8
+    recorder.new_step(channels=[1, 2])
+    recorder.extend(messages[5:])
+    assert len(recorder) == 30
+    assert recorder.capacity == 32
+
+    arrays = recorder.arrays()
+    assert arrays['time_us'].dtype == np.uint32
+    assert arrays['time_us'].tolist() == [m['time_us'] for m in messages]
+    assert arrays['step'].tolist() == 5 * [0] + 25 * [1]
+    assert recorder.steps[1] == {'channels': [1, 2]}
+    assert recorder.message(7) == dict(messages[7], step=1)
+
+
+def test_recorder_views():
+    recorder = CapacitanceRecorder()
+    recorder.extend(_messages(10))
+    df = recorder.to_frame(2, 6)
+    assert df.index.tolist() == [2, 3, 4, 5]
+    assert df.columns.tolist() == ['time_us', 'new_value', 'V_a', 'n_samples',
+                                   'step']
+    # Views share recorded data.
+    assert np.shares_memory(recorder.arrays()['new_value'],
+                            df['new_value'].values)
+
+    view = recorder.messages()
+    assert len(view) == 0
+    recorder.extend(_messages(3, start=10))
+    assert [m['time_us'] for m in view] == [250000, 275000, 300000]
+    assert view[-1] == recorder.message(12)
+    view.close()
+    recorder.extend(_messages(3, start=13))
+    assert len(view) == 3
+    assert view.to_frame().index.tolist() == [10, 11, 12]
+
+
+def test_wait_on_capacitance_recorder():
+    move = pytest.importorskip('dropbot.move')
+    if sim.SimulatedProxy is None:
+        pytest.skip('`ProxyMixin` is not available.')
+    asyncio = move.asyncio
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    proxy = sim.SimulatedProxy(time_scale=None)
+    try:
+        proxy.update_state(hv_output_enabled=True,
+                           capacitance_update_interval_ms=20)
+        recorder = CapacitanceRecorder(chunk_size=16)
+
+        def _done(messages):
+            return len(messages) >= 20
+
+        task = loop.create_task(move.wait_on_capacitance(proxy, _done,
+                                                         recorder=recorder))
+        # Advance simulation once task has subscribed to updates.
+        loop.call_soon(proxy.advance, 1.)
+        messages = loop.run_until_complete(task)
+        # One update per 25 ms firmware capacitance timer tick.
+        assert len(messages) == len(recorder) == 40
+        assert messages.to_frame()['time_us'].diff().iloc[1:].eq(25000).all()
+        assert messages[0]['event'] == 'capacitance-updated'
+    finally:
+        proxy.terminate()
+        loop.close()
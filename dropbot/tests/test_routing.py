@@ -0,0 +1,151 @@
+from __future__ import absolute_import
+
+import collections
+
+import numpy as np
+import pytest
+
+import dropbot.simulator as sim
+from dropbot.routing import NoRouteError, RoutePlanner, plan_routes
+
+
+def _distances(neighbours, blocked):
+    # Reference breadth-first search from each channel.
+    count = neighbours.shape[0]
+    distance = np.full((count, count), -1, dtype=int)
+    for source in np.flatnonzero(~blocked):
+        distance[source, source] = 0
+        queue = collections.deque([source])
+        while queue:
+            channel = queue.popleft()
+            for neighbour in neighbours[channel]:
+                if neighbour >= 0 and not blocked[neighbour] and \
+                        distance[source, neighbour] < 0:
+                    distance[source, neighbour] = distance[source, channel] + 1
+                    queue.append(neighbour)
+    return distance
+
+
+def _check_routes(planner, neighbours):
+    distance = _distances(neighbours, planner.blocked)
+    assert (planner.distance == distance).all()
+    for source, target in np.argwhere(distance > 0)[::37]:
+        route = planner.route(source, target)
+        assert len(route) == distance[source, target] + 1
+        assert route[0] == source and route[-1] == target
+        for channel, next_channel in zip(route[:-1], route[1:]):
+            assert next_channel in neighbours[channel]
+            assert not planner.blocked[next_channel]
+
+
+def test_route_planner():
+    # 240 channels, with some (one-way) connections removed.
+    neighbours = sim.grid_neighbours((12, 20))
+    random = np.random.RandomState(0)
+    neighbours[random.rand(*neighbours.shape) < .1] = -1
+    planner = RoutePlanner(neighbours)
+    _check_routes(planner, neighbours)
+
+    for i in range(10):
+        planner.block(random.choice(240, size=3, replace=False))
+        _check_routes(planner, neighbours)
+    for i in range(10):
+        planner.unblock(np.flatnonzero(planner.blocked)[:3])
+        _check_routes(planner, neighbours)
+    assert not planner.blocked.any()
+
+
+def test_route_planner_blocked():
+    planner = RoutePlanner(sim.grid_neighbours((3, 4)))
+    assert planner.route(0, 3) == [0, 1, 2, 3]
+    # Block middle row, except for last column.
+    planner.block([4, 5, 6])
+    assert planner.route(0, 8) == [0, 1, 2, 3, 7, 11, 10, 9, 8]
+    assert planner.route_through([8, 0, 3]) == [8, 9, 10, 11, 7, 3, 2, 1, 0,
+                                                1, 2, 3]
+    planner.block([7])
+    with pytest.raises(NoRouteError):
+        planner.route(0, 8)
+    planner.unblock([5])
+    assert planner.route(0, 8) == [0, 1, 5, 9, 8]
+
+
+def _check_schedule(schedule, neighbours, sources, targets):
+    assert schedule[0].tolist() == list(sources)
+    assert schedule[-1].tolist() == list(targets)
+    # Channels within one move of each channel.
+    near = np.eye(neighbours.shape[0], dtype=bool)
+    for channel, neighbours_i in enumerate(neighbours):
+        near[channel, neighbours_i[neighbours_i >= 0]] = True
+        near[neighbours_i[neighbours_i >= 0], channel] = True
+    for previous, next_ in zip(schedule[:-1], schedule[1:]):
+        for i, (a, b) in enumerate(zip(previous, next_)):
+            assert a == b or b in neighbours[a]
+            for j in range(schedule.shape[1]):
+                if j == i:
+                    continue
+                merged = targets[i] == targets[j] and \
+                    targets[i] in (b, next_[j], previous[j])
+                # Next channel of each drop is apart from all other drops,
+                # both before and after the step.
+                assert merged or not (near[b, next_[j]] or
+                                      near[b, previous[j]])
+
+
+def test_plan_routes():
+    neighbours = sim.grid_neighbours((10, 12))
+    planner = RoutePlanner(neighbours)
+    # Drops in each corner move to the opposite corner.
+    sources = [0, 11, 108, 119]
+    targets = [119, 108, 11, 0]
+    schedule = plan_routes(planner, sources, targets)
+    _check_schedule(schedule, neighbours, sources, targets)
+    # Drops move at the same time, i.e., much faster than one at a time.
+    assert schedule.shape[0] - 1 < .5 * sum(planner.distance[sources,
+                                                             targets])
+
+    with pytest.raises(ValueError):
+        plan_routes(planner, [0, 1], [10, 30])
+
+
+def test_plan_routes_gather():
+    neighbours = sim.grid_neighbours((10, 12))
+    planner = RoutePlanner(neighbours)
+    sources = [5, 60, 0, 11, 108, 119]
+    schedule = plan_routes(planner, sources, [65] * 6)
+    _check_schedule(schedule, neighbours, sources, [65] * 6)
+    assert schedule.shape[0] - 1 < .5 * planner.distance[sources, 65].sum()
+
+
+def test_plan_routes_blocked():
+    planner = RoutePlanner(sim.grid_neighbours((3, 4)), blocked=[5, 6])
+    schedule = plan_routes(planner, [0, 11], [3, 8])
+    assert not planner.blocked[schedule].any()
+    # Block middle row.
+    planner.block([4, 7])
+    with pytest.raises(NoRouteError):
+        plan_routes(planner, [0, 11], [8, 3])
+
+
+def test_move_liquid_planner(monkeypatch):
+    move = pytest.importorskip('dropbot.move')
+    asyncio = move.asyncio
+    actuated = []
+
+    @asyncio.coroutine
+    def _actuate(proxy, channels, callback, **kwargs):
+        actuated.append(tuple(channels))
+        yield asyncio.From(asyncio.sleep(0))
+        raise asyncio.Return([])
+
+    monkeypatch.setattr(move, 'actuate', _actuate)
+    planner = RoutePlanner(sim.grid_neighbours((3, 4)), blocked=[1])
+    loop = asyncio.new_event_loop()
+    try:
+        results = loop.run_until_complete(move.move_liquid(None, [0, 2],
+                                                           planner=planner))
+    finally:
+        loop.close()
+    # Route avoids blocked channel 1.
+    assert actuated[::2] == [(0, 4), (4, 5), (5, 6), (6, 2)]
+    assert [r['channels'] for r in results] == actuated
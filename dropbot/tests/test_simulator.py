@@ -0,0 +1,454 @@
+from __future__ import absolute_import, division
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dropbot.simulator as sim
+
+
+@pytest.fixture
+def node():
+    node_ = sim.SimulatedNode(time_scale=None, seed=0)
+    yield node_
+    node_.terminate()
+
+
+def _record(node, *names):
+    messages = []
+    for name in names:
+        node.signals.signal(name).connect(messages.append, weak=False)
+    return messages
+
+
+def test_grid_neighbours():
+    neighbours = sim.grid_neighbours((2, 3))
+    # Up, down, left, right.
+    assert neighbours[0].tolist() == [-1, 3, -1, 1]
+    assert neighbours[4].tolist() == [1, -1, 3, 5]
+
+
+def test_pack_channels_round_trip():
+    states = np.zeros(120, dtype=int)
+    states[[0, 9, 119]] = 1
+    packed = sim.pack_channels(states)
+    assert packed.tolist()[:2] == [1, 2]
+    assert (sim.unpack_channels(packed) == states).all()
+
+
+def test_drop_moves_to_actuated_neighbour():
+    physics = sim.DropletModel(transit_time_s=.1)
+    physics.add_drop([0])
+    actuated = np.zeros(physics.number_of_channels, dtype=bool)
+    actuated[1] = True
+    for i in range(40):
+        physics.step(.025, actuated)
+    assert [c.tolist() for c in physics.drop_channels()] == [[1]]
+    # Volume is conserved.
+    assert np.isclose(physics.coverage.sum(), 1)
+
+    # Channel 3 is not adjacent to the drop, so the drop does not move.
+    actuated[:] = False
+    actuated[3] = True
+    physics.step(1., actuated)
+    assert [c.tolist() for c in physics.drop_channels()] == [[1]]
+
+
+def test_set_state_of_channels(node):
+    messages = _record(node, 'channels-updated')
+    N = node.number_of_channels()
+    assert not node.set_state_of_channels(np.zeros(1, dtype='uint8'))
+    states = np.zeros(N, dtype=int)
+    states[[3, 5]] = 1
+    assert node.set_state_of_channels(sim.pack_channels(states))
+    assert (sim.unpack_channels(node.state_of_channels()) == states).all()
+    # `channels-updated` event is disabled by default.
+    assert not messages
+
+    node.update_state(node._State(event_mask=sim._EVENT_CHANNELS_UPDATED |
+                                  sim._EVENT_ENABLE))
+    node.set_state_of_channels(sim.pack_channels(states))
+    assert messages[-1]['actuated'] == [3, 5]
+
+
+def test_capacitance_events(node):
+    messages = _record(node, 'capacitance-updated', 'capacitance-exceeded')
+    node.physics.add_drop([0])
+    node.update_state(node._State(hv_output_enabled=True,
+                                  capacitance_update_interval_ms=20,
+                                  target_capacitance=5e-12, target_count=3))
+    states = np.zeros(node.number_of_channels(), dtype=int)
+    states[1] = 1
+    node.set_state_of_channels(sim.pack_channels(states))
+    node.advance(1.)
+
+    updated = [m for m in messages if m['event'] == 'capacitance-updated']
+    exceeded = [m for m in messages if m['event'] == 'capacitance-exceeded']
+    # One update per 25 ms firmware capacitance timer tick.
+    assert len(updated) == 40
+    assert np.diff([m['time_us'] for m in updated]).tolist() == 39 * [25000]
+    # Capacitance increases as drop moves onto actuated electrode.
+    assert updated[0]['new_value'] < 5e-12 < updated[-1]['new_value']
+    assert len(exceeded) == 1
+    assert exceeded[0]['count'] == 3
+    # Target capacitance is reset once exceeded.
+    assert node._state.target_capacitance == 0
+
+
+def test_capacitance_steady_event(node):
+    messages = _record(node, 'capacitance-steady')
+    node.physics.add_drop([0])
+    node.update_state(node._State(hv_output_enabled=True))
+    states = np.zeros(node.number_of_channels(), dtype=int)
+    states[1] = 1
+    node.set_state_of_channels(sim.pack_channels(states))
+    # Window too long to fit in firmware steady state window.
+    assert not node.update_state(node._State(steady_state_window_ms=
+                                             sim.MAX_STEADY_STATE_WINDOW_MS +
+                                             1))
+    node.update_state(node._State(steady_state_rel_std=.02,
+                                  steady_state_window_ms=300,
+                                  steady_state_threshold=5e-12))
+    node.advance(3.)
+
+    assert len(messages) == 1
+    assert messages[0]['rel_std'] <= .02
+    assert messages[0]['new_value'] > 5e-12
+    # Drop has settled on actuated electrode.
+    assert [c.tolist() for c in node.physics.drop_channels()] == [[1]]
+    # Steady state criteria are reset once steady.
+    assert node._state.steady_state_rel_std == 0
+
+    # Threshold is never reached.
+    node.update_state(node._State(steady_state_rel_std=.02,
+                                  steady_state_threshold=1e-9))
+    node.advance(1.)
+    assert len(messages) == 1
+
+
+def test_channel_scan(node):
+    messages = _record(node, 'channels-scanned')
+    node.physics.add_drop([2])
+    node.enable_events()
+    mask = np.zeros(node.number_of_channels(), dtype=int)
+    mask[[1, 2, 3]] = 1
+    assert node.set_channel_scan_mask(sim.pack_channels(mask))
+    assert not node.set_channel_scan_mask([0xFF])
+    assert (sim.unpack_channels(node.channel_scan_mask()) == mask).all()
+    node.update_state(node._State(channel_scan_interval_ms=100))
+    node.advance(1.)
+
+    # Scans are 125 ms apart (i.e., interval rounded up to capacitance
+    # timer period).
+    assert 7 <= len(messages) <= 8
+    assert all(m['channels'] == [1, 2, 3] for m in messages)
+    C = np.array([m['capacitances'] for m in messages])
+    assert (C[:, 1] > 5e-12).all() and (C[:, [0, 2]] < 5e-12).all()
+    assert np.diff([m['time_us'] for m in messages]).min() >= 100e3
+
+    # Scan is stopped by disabling the event or resetting the interval.
+    count = len(messages)
+    node.disable_event(sim._EVENT_CHANNELS_SCANNED)
+    node.advance(.5)
+    assert len(messages) == count
+    node.enable_event(sim._EVENT_CHANNELS_SCANNED)
+    node.update_state(node._State(channel_scan_interval_ms=0))
+    node.advance(.5)
+    assert len(messages) == count
+    # Single scan on request.
+    assert node.scan_channels() == 3
+    assert len(messages) == count + 1
+
+
+def test_get_all_drops(node):
+    node.physics.add_drop([0, 1])
+    node.physics.add_drop([50])
+    packed = node.get_all_drops(0)
+    assert packed.tolist() == [2, 0, 1, 1, 50]
+
+
+def test_chip_load_feedback(node):
+    node.update_state(node._State(hv_output_enabled=True, voltage=100))
+    node.advance(.1)
+    data = node.chip_load_feedback(10, False)
+    assert data.dtype == np.uint16
+    assert data.shape == (13, )
+    assert (data[0] | data[1].astype(int) << 16) == node.microseconds()
+    assert data[2] == node.analog_read(1)
+    reduced = node.chip_load_feedback(10, True)
+    assert reduced.shape == (4, )
+    assert abs(int(reduced[3]) - int(data[3:].max() - data[3:].min())) < 100
+
+
+def test_time_us_wraps():
+    node = sim.SimulatedNode(time_scale=None, time_us_offset=2 ** 32 - 10000)
+    node.advance(.025)
+    assert node.microseconds() == 15000
+
+
+def test_simulated_proxy():
+    if sim.SimulatedProxy is None:
+        pytest.skip('`ProxyMixin` is not available.')
+    proxy = sim.SimulatedProxy(time_scale=None, seed=0)
+    try:
+        proxy.physics.add_drop([0])
+        proxy.voltage = 100
+        assert proxy.hv_output_enabled
+        assert np.isclose(proxy.measure_voltage(), 100, rtol=1e-3)
+        proxy.set_state_of_channels(pd.Series(1, index=[1]), append=False)
+        proxy.advance(1.)
+        assert proxy.state_of_channels[1]
+        assert [d.tolist() for d in proxy.get_drops()] == [[1]]
+        C = proxy.channel_capacitances([0, 1])
+        assert C[1] > 5e-12 > C[0]
+        assert np.isclose(proxy.measure_capacitance(),
+                          proxy.capacitance(0), rtol=.1)
+        # All amplitude methods are computed from the same measurements.
+        C = proxy.measure_capacitance(amplitude=['filtered_mean',
+                                                 'percentile_difference'],
+                                      voltage=100)
+        assert C.index.tolist() == ['filtered_mean', 'percentile_difference']
+        assert np.allclose(C, proxy.capacitance(0), rtol=.1)
+        assert np.isclose(proxy.measure_capacitance(amplitude=
+                                                    'percentile_difference',
+                                                    on_device=True),
+                          proxy.capacitance(0), rtol=.1)
+        with pytest.raises(ValueError):
+            proxy.measure_capacitance(on_device=True)
+
+        result = proxy.measure_capacitance_voltage(n_samples=20, raw=True)
+        assert np.isclose(result['voltage'], 100, rtol=1e-3)
+        assert np.isclose(result['capacitance'], proxy.capacitance(0),
+                          rtol=.1)
+        assert result['time_us'] == proxy.microseconds()
+        assert result['samples'].shape == (20, )
+    finally:
+        proxy.terminate()
+
+
+def test_simulated_proxy_state_cache():
+    if sim.SimulatedProxy is None:
+        pytest.skip('`ProxyMixin` is not available.')
+    proxy = sim.SimulatedProxy(time_scale=None)
+    try:
+        reads = []
+        serialize_state = proxy.serialize_state
+
+        def _serialize_state():
+            reads.append(None)
+            return serialize_state()
+
+        proxy.serialize_state = _serialize_state
+        proxy.invalidate_cache()
+        proxy.voltage = 90
+        assert proxy.voltage == 90
+        assert proxy.hv_output_enabled
+        assert proxy.frequency == proxy.state.frequency
+        # State is only read from the device once.
+        assert len(reads) == 1
+
+        # Firmware disables high voltage output when halted.
+        proxy.simulate_halt()
+        assert not proxy.hv_output_enabled
+        assert len(reads) == 1
+        proxy.invalidate_cache()
+        assert not proxy.hv_output_enabled
+        assert len(reads) == 2
+    finally:
+        proxy.terminate()
+
+
+def test_simulated_proxy_channel_states_cache():
+    if sim.SimulatedProxy is None:
+        pytest.skip('`ProxyMixin` is not available.')
+    proxy = sim.SimulatedProxy(time_scale=None)
+    try:
+        reads = []
+        state_of_channels = proxy._state_of_channels
+
+        def _state_of_channels():
+            reads.append(None)
+            return state_of_channels()
+
+        proxy._state_of_channels = _state_of_channels
+        proxy.set_state_of_channels(pd.Series(1, index=[1, 2]), append=False)
+        proxy.set_state_of_channels(pd.Series([0, 1], index=[2, 10]))
+        assert proxy.state_of_channels[proxy.state_of_channels > 0]\
+            .index.tolist() == [1, 10]
+        # Appended states are applied to cached channel states.
+        assert not reads
+        assert (sim.unpack_channels(sim.SimulatedNode
+                                    .state_of_channels(proxy)) ==
+                proxy.state_of_channels.values).all()
+
+        # Cached states are updated by `channels-updated` events.
+        proxy._channel_states_cache = None
+        proxy.enable_event(sim._EVENT_CHANNELS_UPDATED | sim._EVENT_ENABLE)
+        states = np.zeros(proxy.number_of_channels, dtype=int)
+        states[5] = 1
+        sim.SimulatedNode.set_state_of_channels(proxy,
+                                                sim.pack_channels(states))
+        assert proxy.state_of_channels[proxy.state_of_channels > 0]\
+            .index.tolist() == [5]
+
+        assert proxy.update_channels(on=[6, 7], off=[5]) == 1
+        assert proxy.update_channels() == 0
+        assert proxy.state_of_channels[proxy.state_of_channels > 0]\
+            .index.tolist() == [6, 7]
+        with pytest.raises(ValueError):
+            proxy.update_channels(on=[proxy.number_of_channels])
+
+        proxy.turn_off_all_channels()
+        assert not proxy.state_of_channels.any()
+        assert not reads
+
+        # Disabled channels are reported as off, like the device outputs.
+        proxy.set_state_of_channels(pd.Series(1, index=[1, 2]), append=False)
+        mask = np.zeros(proxy.number_of_channels, dtype=int)
+        mask[1] = 1
+        proxy.disabled_channels_mask = mask
+        assert proxy.state_of_channels[proxy.state_of_channels > 0]\
+            .index.tolist() == [2]
+        # Firmware disables all channels when halted.
+        proxy.simulate_halt()
+        assert not proxy.state_of_channels.any()
+    finally:
+        proxy.terminate()
+
+
+def test_update_channels(node):
+    messages = _record(node, 'channels-updated')
+    node.enable_event(sim._EVENT_CHANNELS_UPDATED | sim._EVENT_ENABLE)
+    assert node.update_channels([1, 2], []) == 1
+    # Channel 3 is on the same switching board port as channel 2.
+    assert node.update_channels([3, 9], [2]) == 2
+    assert messages[-1]['actuated'] == [1, 3, 9]
+    # Channels listed as both on and off are turned on.
+    assert node.update_channels([9], [9]) == 0
+    assert node.update_channels([120], []) == -1
+    assert np.flatnonzero(sim.unpack_channels(node.state_of_channels()))\
+        .tolist() == [1, 3, 9]
+
+
+
+def test_actuation_program(node):
+    messages = _record(node, 'actuation-step-completed',
+                       'actuation-step-timeout', 'channels-updated')
+    node.enable_event(sim._EVENT_CHANNELS_UPDATED | sim._EVENT_ENABLE)
+    node.physics.add_drop([0])
+    node.update_state(node._State(hv_output_enabled=True))
+    N = node.number_of_channels()
+    steps = [[0, 1], [1], [5]]
+    states = np.zeros((len(steps), N), dtype=int)
+    for i, channels in enumerate(steps):
+        states[i, channels] = 1
+    channel_states = np.concatenate([sim.pack_channels(s) for s in states])
+    # Array lengths must match number of steps.
+    assert node.run_actuation_program(channel_states, [100] * 3, [0] * 3,
+                                      [0] * 3, [.02] * 2) == -1
+
+    # Last step never reaches target capacitance (i.e., channel 5 is not
+    # next to drop).
+    assert node.run_actuation_program(channel_states, [100, 100, 100],
+                                      [0, 0, 500], [0, 10e-12, 10e-12],
+                                      [.02, .02, 0]) == 3
+    assert node.actuation_step() == 0
+    node.advance(3.)
+    completed = [m for m in messages
+                 if m['event'] == 'actuation-step-completed']
+    timeouts = [m for m in messages if m['event'] == 'actuation-step-timeout']
+    actuated = [m['actuated'] for m in messages
+                if m['event'] == 'channels-updated']
+    assert [m['step'] for m in completed] == [0, 1]
+    assert all(m['duration_ms'] >= 100 for m in completed)
+    assert completed[1]['new_value'] >= 10e-12
+    assert [m['step'] for m in timeouts] == [2]
+    assert timeouts[0]['duration_ms'] >= 500
+    assert actuated == steps
+    # Program is stopped on timeout.
+    assert node.actuation_step() == -1
+    assert not node.stop_actuation_program()
+    assert [c.tolist() for c in node.physics.drop_channels()] == [[1]]
+
+
+def test_simulated_proxy_actuation_program():
+    if sim.SimulatedProxy is None:
+        pytest.skip('`ProxyMixin` is not available.')
+    proxy = sim.SimulatedProxy(time_scale=None)
+    try:
+        messages = []
+        proxy.signals.signal('actuation-step-completed')\
+            .connect(messages.append, weak=False)
+        proxy.physics.add_drop([0])
+        proxy.update_state(hv_output_enabled=True)
+        proxy.set_state_of_channels(pd.Series(1, index=[3]), append=False)
+        assert proxy.run_actuation_program([{'channels': [0, 1],
+                                             'min_duration': .1},
+                                            {'channels': [1, 2],
+                                             'min_duration': .1,
+                                             'steady_state_rel_std': .02,
+                                             'timeout': 2.}]) == 2
+        proxy.advance(2.)
+        assert [m['step'] for m in messages] == [0, 1]
+        # Events are timestamped with host time.
+        assert all('host_time' in m for m in messages)
+        # Cached channel states are invalidated by actuation program.
+        assert proxy.state_of_channels[proxy.state_of_channels > 0]\
+            .index.tolist() == [1, 2]
+        with pytest.raises(ValueError):
+            proxy.run_actuation_program([{'channels': [0],
+                                          'min_duration': .1}] *
+                                        (sim.MAX_ACTUATION_PROGRAM_STEPS + 1))
+    finally:
+        proxy.terminate()
+
+
+def test_simulated_proxy_channel_scan():
+    if sim.SimulatedProxy is None:
+        pytest.skip('`ProxyMixin` is not available.')
+    from dropbot.channel_scan import ChannelScanBuffer
+
+    proxy = sim.SimulatedProxy(time_scale=None, seed=0)
+    try:
+        scans = ChannelScanBuffer(proxy.number_of_channels, capacity=4)
+        proxy.signals.signal('channels-scanned').connect(scans, weak=False)
+        proxy.physics.add_drop([5])
+        proxy.enable_events()
+        assert proxy.start_channel_scan(200, channels=[4, 5, 6])
+        assert proxy.channel_scan_mask[[4, 5, 6]].tolist() == [1, 1, 1]
+        assert proxy.channel_scan_mask.sum() == 3
+        proxy.advance(2.)
+        assert scans.total >= 8
+        assert len(scans) == 4
+        # Events are timestamped with host time.
+        assert not np.isnan(scans.arrays()['host_time']).any()
+        C = scans.latest()
+        assert C[5] > 5e-12 > C[4]
+        assert np.isnan(C[7])
+
+        assert proxy.stop_channel_scan()
+        total = scans.total
+        proxy.advance(1.)
+        assert scans.total == total
+        with pytest.raises(ValueError):
+            proxy.set_channel_scan_mask([1, 0])
+    finally:
+        proxy.terminate()
+
+
+def test_i2c_eeprom_write():
+    if sim.SimulatedProxy is None:
+        pytest.skip('`ProxyMixin` is not available.')
+    proxy = sim.SimulatedProxy(time_scale=None)
+    try:
+        eeprom = proxy.eeproms[0x50] = sim.I2cEeprom(page_size=16)
+        data = np.arange(40, dtype='uint8')
+        proxy.i2c_eeprom_write(0x50, 10, data, verify=True)
+        # Chunks are aligned to page boundaries: 10-15, 16-31, 32-47, 48-49.
+        assert eeprom.write_count == 4
+        assert (eeprom.data[10:50] == data).all()
+        assert (proxy.i2c_eeprom_read(0x50, 10, 40) == data).all()
+        with pytest.raises(IOError):
+            proxy.i2c_eeprom_write(0x51, 0, data)
+    finally:
+        proxy.terminate()
@@ -0,0 +1,143 @@
+from __future__ import absolute_import, division
+import threading
+
+import blinker
+import pytest
+
+import dropbot.simulator as sim
+
+subscription = pytest.importorskip('dropbot.subscription')
+asyncio = pytest.importorskip('trollius')
+
+
+@pytest.fixture
+def node():
+    node_ = sim.SimulatedNode(time_scale=None, seed=0)
+    node_.enable_event(sim._EVENT_CHANNELS_UPDATED | sim._EVENT_ENABLE)
+    yield node_
+    node_.terminate()
+
+
+@pytest.fixture
+def loop():
+    loop_ = asyncio.new_event_loop()
+    yield loop_
+    loop_.close()
+
+
+def test_subscription_disconnects(node):
+    signal = node.signals.signal('channels-updated')
+    messages = []
+    with subscription.subscribe(signal, messages.append) as subscription_:
+        assert subscription_.connected
+        node.update_channels([1], [])
+    node.update_channels([2], [])
+    assert [m['actuated'] for m in messages] == [[1]]
+    assert not signal.receivers
+
+    # Receiver is disconnected if an exception is raised.
+    with pytest.raises(RuntimeError):
+        with subscription.subscribe(signal, messages.append):
+            raise RuntimeError()
+    assert not signal.receivers
+
+
+def test_receivers_released(node):
+    signal = node.signals.signal('channels-updated')
+    N = node.number_of_channels()
+    messages = []
+    for i in range(1000):
+        with subscription.subscribe(signal, messages.append):
+            node.update_channels([i % N], [(i - 1) % N])
+    assert len(messages) == 1000
+    # No receivers are left behind, i.e., dispatch cost does not grow with
+    # the number of previous actuations.
+    assert not signal.receivers
+
+
+def test_actuate_channels_receivers_released(loop):
+    if sim.SimulatedProxy is None:
+        pytest.skip('`ProxyMixin` is not available.')
+    move = pytest.importorskip('dropbot.move')
+    threshold = pytest.importorskip('dropbot.threshold')
+    proxy = sim.SimulatedProxy(time_scale=None)
+    try:
+        signal = proxy.signals.signal('channels-updated')
+        # Receivers connected by the proxy itself (e.g., state caches).
+        receiver_count = len(signal.receivers)
+        for i in range(20):
+            assert loop.run_until_complete(move.actuate_channels(proxy,
+                                                                 [i])) == [i]
+            assert threshold.actuate_channels(proxy, [i + 1]) == [i + 1]
+        assert len(signal.receivers) == receiver_count
+    finally:
+        proxy.terminate()
+
+
+def test_subscription_get(node, loop):
+    signal = node.signals.signal('channels-updated')
+    with subscription.subscribe(signal, loop=loop) as updates:
+        node.update_channels([1], [])
+        message = loop.run_until_complete(updates.get())
+    assert message['actuated'] == [1]
+    assert not signal.receivers
+
+
+def test_message_stream_drop_oldest(loop):
+    signal = blinker.Signal()
+    with subscription.MessageStream(signal, maxlen=5, loop=loop) as stream:
+        for i in range(12):
+            signal.send({'i': i})
+        assert len(stream) == 5
+        messages = loop.run_until_complete(stream.read())
+    assert [m['i'] for m in messages] == list(range(7, 12))
+    assert stream.dropped == 7
+    assert not signal.receivers
+
+    with pytest.raises(ValueError):
+        subscription.MessageStream(signal, policy='drop-newest', loop=loop)
+
+
+def test_message_stream_block(loop):
+    signal = blinker.Signal()
+    received = []
+    batch_sizes = []
+
+    @asyncio.coroutine
+    def _consume(stream):
+        while len(received) < 100:
+            messages = yield asyncio.From(stream.read())
+            batch_sizes.append(len(messages))
+            received.extend(messages)
+            # Slow consumer.
+            yield asyncio.From(asyncio.sleep(.002))
+
+    with subscription.MessageStream(signal, maxlen=4, policy='block',
+                                    loop=loop) as stream:
+        thread = threading.Thread(target=lambda: [signal.send(i)
+                                                  for i in range(100)])
+        thread.start()
+        loop.run_until_complete(_consume(stream))
+        thread.join()
+    # No messages are dropped; sender is blocked while stream is full.
+    assert received == list(range(100))
+    assert stream.dropped == 0
+    assert max(batch_sizes) == 4
+
+
+def test_capacitance_stream(loop):
+    if sim.SimulatedProxy is None:
+        pytest.skip('`ProxyMixin` is not available.')
+    proxy = sim.SimulatedProxy(time_scale=None)
+    try:
+        proxy.update_state(hv_output_enabled=True,
+                           capacitance_update_interval_ms=20)
+        with proxy.capacitance_stream(maxlen=10, loop=loop) as stream:
+            # One update per 25 ms firmware capacitance timer tick.
+            proxy.advance(1.)
+            messages = loop.run_until_complete(stream.read())
+        assert len(messages) == 10
+        assert stream.dropped == 30
+        assert all(m['event'] == 'capacitance-updated' for m in messages)
+    finally:
+        proxy.terminate()
@@ -4,7 +4,6 @@
 from __future__ import division, print_function, unicode_literals
 import datetime as dt
 import threading
-import types
 import uuid
 
 from asyncio_helpers import ensure_event_loop
@@ -13,6 +12,9 @@ import dropbot.proxy
 import pandas as pd
 import trollius as asyncio
 
+from .chip_model import ChipModel
+from .subscription import subscribe
+
 
 def actuate_channels(self, channels, timeout=None, allow_disabled=True):
     '''
@@ -59,9 +61,8 @@ def actuate_channels(self, channels, timeout=None, allow_disabled=True):
                           db.proxy.EVENT_CHANNELS_UPDATED |
                           db.proxy.EVENT_ENABLE)
         # Request to be notified when the set of actuated channels changes.
-        signal = self.signals.signal('channels-updated')
-        signal.connect(_on_channels_updated)
-        try:
+        with subscribe(self.signals.signal('channels-updated'),
+                       _on_channels_updated):
             # Request actuation of the specified channels.
             self.set_state_of_channels(pd.Series(1, index=channels),
                                        append=False)
@@ -79,8 +80,6 @@ def actuate_channels(self, channels, timeout=None, allow_disabled=True):
                 raise RuntimeError('Actuated channels `%s` are not included in'
                                    ' expected channels `%s`' %
                                    (channels_updated.actuated, channels))
-        finally:
-            signal.disconnect(_on_channels_updated)
         return channels_updated.actuated
 
     with self.transaction_lock:
@@ -89,7 +88,7 @@ def actuate_channels(self, channels, timeout=None, allow_disabled=True):
 
 @asyncio.coroutine
 def co_target_capacitance(self, channels, target_capacitance, count=3,
-                          **kwargs):
+                          recorder=None, **kwargs):
     '''
     XXX Coroutine XXX
 
@@ -103,6 +102,12 @@ def co_target_capacitance(self, channels, target_capacitance, count=3,
         Target capacitance value.
     count : optional, int
         Number of required consecutive readings above target capacitance.
+    recorder : dropbot.recorder.CapacitanceRecorder, optional
+        If specified, record ``capacitance-updated`` messages using
+        :data:`recorder`, as a new step with ``actuation_uuid1`` and
+        ``actuated_channels`` step information.
+
+        .. versionadded:: 1.74.0
 
     Returns
     -------
@@ -112,6 +117,11 @@ def co_target_capacitance(self, channels, target_capacitance, count=3,
          - ``start``: time channels were actuated (`datetime.datetime`).
          - ``end``: time target capacitance was reached (`datetime.datetime`).
          - ``actuated_channels``: actuated channels (`list`).
+         - ``capacitance_updates``: ``capacitance-updated`` messages
+           (:class:`dropbot.recorder.RecordedMessages` if :data:`recorder` is
+           specified).
+         - ``step``: recorder step number (only if :data:`recorder` is
+           specified).
     '''
     actuation_uuid1 = uuid.uuid1()
     with self.transaction_lock:
@@ -127,7 +137,7 @@ def co_target_capacitance(self, channels, target_capacitance, count=3,
             message['start'] = start
             message['actuated_channels'] = actuated_channels
             threshold_reached.result = message
-            self.signals.signal('capacitance-exceeded').disconnect(_on_done)
+            exceeded.close()
             loop.call_soon_threadsafe(threshold_reached.set)
 
         threshold_reached = asyncio.Event()
@@ -136,38 +146,43 @@ def co_target_capacitance(self, channels, target_capacitance, count=3,
         # Perform actuation and wait until actuation has been applied.
         actuated_channels = actuate_channels(self, channels, **kwargs)
 
+        if recorder is not None:
+            step = recorder.new_step(actuation_uuid1=actuation_uuid1,
+                                     actuated_channels=actuated_channels)
+            capacitance_messages = recorder.messages()
+            _on_capacitance = recorder.append
+
         # Connect to capacitance exceeded DropBot events, i.e., when specified
         # target capacitance has been exceeded.
-        self.signals.signal('capacitance-exceeded').connect(_on_done)
-
-        # Record timestamp where actuation has been verified as applied.
-        start = dt.datetime.now()
-
+        exceeded = subscribe(self.signals.signal('capacitance-exceeded'),
+                             _on_done)
         # Connect to `capacitance-updated` signal to record capacitance values
         # measured during actuation.
-        self.signals.signal('capacitance-updated').connect(_on_capacitance)
+        updated = subscribe(self.signals.signal('capacitance-updated'),
+                            _on_capacitance)
+        with exceeded, updated:
+            # Record timestamp where actuation has been verified as applied.
+            start = dt.datetime.now()
+
+            # Set `target_capacitance` to non-zero value to enable DropBot
+            # `capacitance-exceeded` event once target capacitance is reached
+            # and sustained for `target_count` consecutive readings.
+            self.update_state(target_capacitance=target_capacitance,
+                              target_count=count)
 
-        # Set `target_capacitance` to non-zero value to enable DropBot
-        # `capacitance-exceeded` event once target capacitance is reached and
-        # sustained for `target_count` consecutive readings.
-        self.update_state(target_capacitance=target_capacitance,
-                          target_count=count)
-
-        try:
             yield asyncio.From(threshold_reached.wait())
-            # Attach list of capacitance update messages recorded during
-            # actuation to result.
-            threshold_reached.result['capacitance_updates'] = \
-                capacitance_messages
-            raise asyncio.Return(threshold_reached.result)
-        finally:
-            self.signals.signal('capacitance-updated')\
-                .disconnect(_on_capacitance)
-            self.signals.signal('capacitance-exceeded').disconnect(_on_done)
+        # Attach list of capacitance update messages recorded during
+        # actuation to result.
+        threshold_reached.result['capacitance_updates'] = capacitance_messages
+        if recorder is not None:
+            capacitance_messages.close()
+            threshold_reached.result['step'] = step
+        raise asyncio.Return(threshold_reached.result)
 
 
 def execute_actuation(self, chip_info_, specific_capacitance, channels,
-                      duration_s=1.5, volume_threshold=None, **kwargs):
+                      duration_s=1.5, volume_threshold=None, recorder=None,
+                      **kwargs):
     '''
     XXX Coroutine XXX
 
@@ -180,8 +195,13 @@ def execute_actuation(self, chip_info_, specific_capacitance, channels,
 
     Parameters
     ----------
-    chip_info_ : dict
-        Chip information, as returned by :func:`dropbot.chip.chip_info`.
+    chip_info_ : dict or dropbot.chip_model.ChipModel
+        Chip information, as returned by :func:`dropbot.chip.chip_info`, or
+        chip model.  Pass a chip model (built once per chip) to avoid
+        compiling chip lookup tables on every call.
+
+        .. versionchanged:: 1.74.0
+            Accept :class:`dropbot.chip_model.ChipModel`.
     specific_capacitance : float
         Specific capacitance, i.e., capacitance per unit area.
     channels : `list`-like
@@ -189,6 +209,12 @@ def execute_actuation(self, chip_info_, specific_capacitance, channels,
         ...`).
     duration_s : float
         Time to wait for execution.
+    recorder : dropbot.recorder.CapacitanceRecorder, optional
+        If specified, record ``capacitance-updated`` messages using
+        :data:`recorder`, as a new step with ``actuated_channels`` and
+        ``actuated_area`` step information.
+
+        .. versionadded:: 1.74.0
 
     Returns
     -------
@@ -199,6 +225,12 @@ def execute_actuation(self, chip_info_, specific_capacitance, channels,
         - ``end``: timestamp after operation is completed (datetime.datetime).
         - ``actuated_area``: actuated electrode area (float).
         - ``actuated_channels``: actuated channel numbers (list).
+        - ``actuated_electrodes``: IDs of electrodes connected to actuated
+          channels (numpy.ndarray).
+
+          .. versionchanged:: 1.74.0
+              Array of electrode IDs (rather than ``pandas.Series`` indexed
+              by channel).
 
         If :data:`volume_threshold` was specified, _at least_ the following
         ``capacitance-exceeded`` DropBot event message fields are also
@@ -213,20 +245,18 @@ def execute_actuation(self, chip_info_, specific_capacitance, channels,
     RuntimeError
         If target capacitance was not reached after specified timeout.
     '''
-    if isinstance(channels[0], types.IntType):
-        # Channels were specified.
-        electrodes = chip_info_['channel_electrodes'].loc[channels]
+    if isinstance(chip_info_, ChipModel):
+        chip_model = chip_info_
     else:
-        # Assume electrode IDs (e.g., `"electrode001", ...`) were specified.
-        electrodes = channels
-        channels = chip_info_['electrode_channels'].loc[electrodes].astype(int)
+        chip_model = ChipModel.from_chip_info(chip_info_)
+    # Channel numbers or electrode IDs (e.g., `"electrode001", ...`) may be
+    # specified.
+    channels = chip_model.to_channels(channels).tolist()
 
     def _actuated_result_info(actuated_channels):
-        actuated_electrodes = (chip_info_['channel_electrodes']
-                               .loc[actuated_channels])
-        return {'actuated_area': (chip_info_['electrode_shapes']['area']
-                                  .loc[actuated_electrodes]).sum(),
-                'actuated_electrodes': actuated_electrodes,
+        return {'actuated_area': chip_model.actuated_area(actuated_channels),
+                'actuated_electrodes':
+                chip_model.electrode_ids_of(actuated_channels),
                 'actuated_channels': actuated_channels}
 
     with self.transaction_lock:
@@ -235,9 +265,9 @@ def execute_actuation(self, chip_info_, specific_capacitance, channels,
             capacitance_messages = []
             result = {}
 
-            def _on_capacitance_updated(self, message):
-                message['actuated_channels'] = self.actuated_channels
-                message['actuated_area'] = self.actuated_area
+            def _on_capacitance_updated(message):
+                message['actuated_channels'] = result['actuated_channels']
+                message['actuated_area'] = result['actuated_area']
                 capacitance_messages.append(message)
 
             #  1. Set control board state of channels according to requested
@@ -246,18 +276,18 @@ def execute_actuation(self, chip_info_, specific_capacitance, channels,
             actuated_channels = actuate_channels(self, channels,
                                                  timeout=duration_s)
             result['start'] = dt.datetime.now()
+            result.update(_actuated_result_info(actuated_channels))
+            if recorder is not None:
+                recorder.new_step(actuated_channels=actuated_channels,
+                                  actuated_area=result['actuated_area'])
+                _on_capacitance_updated = recorder.append
             #  3. Connect to `capacitance-updated` signal to record capacitance
             #     values measured during the step.
-            (self.signals.signal('capacitance-updated')
-                .connect(_on_capacitance_updated))
-            #  4. Delay for specified duration.
-            try:
+            with subscribe(self.signals.signal('capacitance-updated'),
+                           _on_capacitance_updated):
+                #  4. Delay for specified duration.
                 yield asyncio.From(asyncio.sleep(duration_s))
-                result['end'] = dt.datetime.now()
-                result.update(_actuated_result_info(actuated_channels))
-            finally:
-                (self.signals.signal('capacitance-updated')
-                 .disconnect(_on_capacitance_updated))
+            result['end'] = dt.datetime.now()
         else:
             # ## Case 2: volume threshold specified.
             #
@@ -269,15 +299,16 @@ def execute_actuation(self, chip_info_, specific_capacitance, channels,
             # capacitance*, i.e., has units of $F/mm^2$.
             result = _actuated_result_info(channels)
 
-            target_capacitance = (volume_threshold * result['actuated_area'] *
-                                  specific_capacitance)
+            target_capacitance = chip_model.target_capacitance(
+                channels, specific_capacitance, volume_threshold)
 
             # Wait for target capacitance to be reached in background thread,
             # timing out if the specified duration is exceeded.
             co_future = co_target_capacitance(self, channels,
                                               target_capacitance,
                                               allow_disabled=False,
-                                              timeout=duration_s, **kwargs)
+                                              timeout=duration_s,
+                                              recorder=recorder, **kwargs)
             try:
                 dropbot_event = yield asyncio.From(asyncio
                                                    .wait_for(co_future,
@@ -287,8 +318,13 @@ def execute_actuation(self, chip_info_, specific_capacitance, channels,
             except asyncio.TimeoutError:
                 raise RuntimeError('Timed out waiting for target capacitance.')
 
-            # Add actuated area to capacitance update messages.
-            for capacitance_i in capacitance_messages:
-                capacitance_i['acuated_area'] = result['actuated_area']
+            if recorder is not None:
+                # Add actuated area to recorded step information.
+                recorder.steps[dropbot_event['step']]['actuated_area'] = \
+                    result['actuated_area']
+            else:
+                # Add actuated area to capacitance update messages.
+                for capacitance_i in capacitance_messages:
+                    capacitance_i['acuated_area'] = result['actuated_area']
 
         raise asyncio.Return(result)
@@ -47,6 +47,7 @@
 #include "analog.h"
 #include "channels.h"
 #include "drops.h"
+#include "steady_state.h"
 #include "format.h"
 #include "voltage_source.h"
 #include "Time.h"
@@ -95,8 +96,71 @@ const uint32_t EVENT_ACTUATED_CHANNEL_CAPACITANCES = (1 << 31);
 const uint32_t EVENT_CHANNELS_UPDATED              = (1 << 30);
 const uint32_t EVENT_SHORTS_DETECTED               = (1 << 28);
 const uint32_t EVENT_DROPS_DETECTED                = (1 << 27);
+//: .. versionadded:: 1.74.0
+const uint32_t EVENT_CHANNELS_SCANNED              = (1 << 26);
 const uint32_t EVENT_ENABLE                        = (1 << 0);
 
+//: .. versionadded:: 1.74.0
+//
+// Maximum number of steps in an actuation program.
+const uint16_t MAX_ACTUATION_PROGRAM_STEPS = 64;
+//: .. versionadded:: 1.74.0
+//
+// Number of capacitance readings kept for `capacitance-steady` events and
+// longest supported steady state window (capacitance is measured every 25 ms).
+const size_t CAPACITANCE_STEADY_WINDOW_SIZE = 128;
+const uint32_t MAX_STEADY_STATE_WINDOW_MS =
+  (CAPACITANCE_STEADY_WINDOW_SIZE - 1) * 25;
+
+//: .. versionadded:: 1.74.0
+//
+// Stream packet identifier of binary capacitance event records (see
+// `state_._.binary_events`).
+const uint16_t BINARY_EVENTS_STREAM_ID = 0xFFFF;
+// Capacitance event record types.
+const uint8_t CAPACITANCE_RECORD_UPDATED  = 1;
+const uint8_t CAPACITANCE_RECORD_EXCEEDED = 2;
+const uint8_t CAPACITANCE_RECORD_STEADY   = 3;
+
+/**
+ * @brief Binary (little-endian) capacitance event record, i.e., compact
+ * alternative to `capacitance-updated`, `capacitance-exceeded` and
+ * `capacitance-steady` JSON events.
+ *
+ * \version added: 1.74.0
+ */
+struct __attribute__((packed)) CapacitanceRecord {
+  // Event type (e.g., `CAPACITANCE_RECORD_UPDATED`).
+  uint8_t type;
+  uint8_t reserved;
+  // Number of analog samples.
+  uint16_t n_samples;
+  // Microsecond counter at time of reading.
+  uint32_t time_us;
+  float capacitance;
+  // Actuation voltage.
+  float V_a;
+};
+
+/**
+ * @brief Step of an actuation program (see `Node::run_actuation_program()`).
+ *
+ * \version added: 1.74.0
+ */
+struct ActuationStep {
+  // Bit-packed states of channels to actuate.
+  std::array<uint8_t, MAX_NUMBER_OF_CHANNELS / 8> channel_states;
+  // Minimum step duration.
+  uint32_t min_duration_ms;
+  // Maximum step duration (0 == no timeout).
+  uint32_t timeout_ms;
+  // Capacitance to reach before completing step (0 == disabled).
+  float target_capacitance;
+  // Maximum relative standard deviation of capacitance readings within
+  // `min_duration_ms` before completing step (0 == disabled).
+  float steady_state_rel_std;
+};
+
 // Define the array that holds the conversions here.
 // The buffer is stored with the correct alignment in the DMAMEM section
 // the +0 in the aligned attribute is necessary b/c of a bug in gcc.
@@ -238,6 +302,26 @@ public:
   //
   // Time of most recent drops detection.
   uint32_t drops_timestamp_ms_;
+  //: .. versionadded:: 1.74.0
+  //
+  // Actuation program (see `run_actuation_program()`).
+  std::vector<ActuationStep> actuation_program_;
+  // Index of current actuation program step (-1 if no program is running).
+  int16_t actuation_step_;
+  // Time current actuation program step started.
+  uint32_t actuation_step_start_ms_;
+  // Capacitance readings during current actuation program step.
+  SteadyStateWindow<64> actuation_step_window_;
+  //: .. versionadded:: 1.74.0
+  //
+  // Capacitance readings since `state_._.steady_state_rel_std` was set.
+  SteadyStateWindow<CAPACITANCE_STEADY_WINDOW_SIZE> steady_state_window_;
+  //: .. versionadded:: 1.74.0
+  //
+  // Time of most recent periodic channel capacitance scan.
+  uint32_t channel_scan_timestamp_ms_;
+  // Channels included in periodic scan (bit-packed).
+  Channels::packed_channels_t channel_scan_mask_;
 
   /**
   * @brief Chip status changed event.
@@ -331,10 +415,13 @@ public:
                                InputDebounce::PinInMode::PIM_EXT_PULL_UP_RES,
                                0),
            capacitance_timestamp_ms_(0), target_count_(0),
-           drops_timestamp_ms_(0) {
+           drops_timestamp_ms_(0), actuation_step_(-1),
+           actuation_step_start_ms_(0), channel_scan_timestamp_ms_(0) {
     pinMode(LED_BUILTIN, OUTPUT);
     dma_data_ = UInt8Array_init_default();
     clear_neighbours();
+    // Scan all channels by default.
+    channel_scan_mask_.fill(0xFF);
 
     // Send `output_enabled`/`output_disabled` event when change in chip status
     // occurs.
@@ -390,6 +477,13 @@ public:
 
         if (target_count_ >= state_._.target_count) {
           // Target capacitance has been met.
+          if (state_._.binary_events) {
+            // Reset target capacitance.
+            state_._.target_capacitance = 0;
+            _send_capacitance_record(CAPACITANCE_RECORD_EXCEEDED, capacitance,
+                                     actuation_voltage, time_us);
+            return;
+          }
 
           // Stream "capacitance-updated" event to serial interface.
           result.length =
@@ -430,6 +524,13 @@ public:
 
         uint32_t time_us = microseconds();
 
+        if (state_._.binary_events) {
+          _send_capacitance_record(CAPACITANCE_RECORD_UPDATED, capacitance,
+                                   actuation_voltage, time_us);
+          capacitance_timestamp_ms_ = millis();
+          return;
+        }
+
         // Stream "capacitance-updated" event to serial interface.
         sprintf((char *)result.data,
                 "{\"event\": \"capacitance-updated\", "
@@ -452,6 +553,63 @@ public:
       }
     });
 
+    capacitance_measured_.connect([&] (float capacitance,
+                                       float actuation_voltage) {
+      // Send event if steady state relative standard deviation has been set
+      // and capacitance has settled.
+      if (state_._.steady_state_rel_std <= 0) { return; }
+      steady_state_window_.add(millis(), capacitance);
+      const float rel_std =
+        steady_state_window_.rel_std(state_._.steady_state_window_ms,
+                                     state_._.steady_state_threshold);
+      if ((rel_std < 0) || (rel_std > state_._.steady_state_rel_std)) {
+        return;
+      }
+
+      uint32_t time_us = microseconds();
+      if (state_._.binary_events) {
+        // Reset steady state criteria.
+        state_._.steady_state_rel_std = 0;
+        _send_capacitance_record(CAPACITANCE_RECORD_STEADY, capacitance,
+                                 actuation_voltage, time_us);
+        return;
+      }
+
+      UInt8Array result = get_buffer();
+
+      // Stream "capacitance-steady" event to serial interface.
+      result.length =
+        sprintf((char *)result.data,
+                "{\"event\": \"capacitance-steady\", "
+                "\"new_value\": %g, "  // Capacitance value
+                "\"rel_std\": %g, "  // Relative standard deviation
+                "\"window_ms\": %lu, "  // Steady state window duration
+                "\"time_us\": %lu, "  // end times in us
+                "\"n_samples\": %lu, "  // # of analog samples
+                "\"V_a\": %g}",  // Actuation voltage
+                capacitance, rel_std, state_._.steady_state_window_ms,
+                time_us, config_._.capacitance_n_samples,
+                actuation_voltage);
+
+      // Reset steady state criteria.
+      state_._.steady_state_rel_std = 0;
+
+      {
+        PacketStream output;
+        output.start(Serial, result.length);
+        output.write(Serial, (char *)result.data, result.length);
+        output.end(Serial);
+      }
+    });
+
+    // Advance actuation program (if running) on each capacitance reading.
+    capacitance_measured_.connect([&] (float capacitance,
+                                       float actuation_voltage) {
+      if (actuation_step_ >= 0) {
+        _update_actuation_program(capacitance, actuation_voltage);
+      }
+    });
+
     // XXX Connect periodic callback to check output current.
     signal_timer_ms_.connect([&] (auto now) {
       const float output_current = analog::measure_output_current_rms(20);
@@ -748,6 +906,48 @@ public:
     return output;
   }
 
+  /**
+  * @brief Sample chip load feedback signal together with the high-voltage
+  * feedback signal in a single acquisition.
+  *
+  * The high-voltage feedback (`A1`) is read immediately after the chip load
+  * feedback (`A11`) samples, such that both correspond to the same actuation.
+  *
+  * Output array layout (all values `uint16_t`):
+  *
+  *  - `[0:2]`: microsecond counter at start of acquisition (low word first).
+  *  - `[2]`: high-voltage feedback analog reading.
+  *  - `[3:]`: if \p reduce is `false`, \p n_samples chip load feedback
+  *    analog readings.  Otherwise, difference between the 75th and 25th
+  *    percentiles of the chip load feedback analog readings.
+  *
+  * \version added: 1.74.0
+  *
+  * @param n_samples  Number of chip load feedback analog samples.
+  * @param reduce  If `true`, return percentile difference rather than raw chip
+  *   load feedback analog readings.
+  *
+  * @return  Timestamp, high-voltage reading, and chip load feedback.
+  */
+  UInt16Array chip_load_feedback(uint16_t n_samples, bool reduce) {
+    UInt16Array output;
+    output.data = reinterpret_cast<uint16_t *>(get_buffer().data);
+
+    const uint32_t time_us = microseconds();
+    output.data[0] = time_us & 0xFFFF;
+    output.data[1] = time_us >> 16;
+    if (reduce) {
+      output.data[3] = analog::u16_percentile_diff(11, n_samples, 25, 75);
+      output.length = 4;
+    } else {
+      std::generate(output.data + 3, output.data + 3 + n_samples,
+                    [&] () { return analogRead(11); });
+      output.length = 3 + n_samples;
+    }
+    output.data[2] = analogRead(1);
+    return output;
+  }
+
   /**
   * @brief Read samples from differential pair of pins as fast as possible.
   *
@@ -822,6 +1022,45 @@ public:
     output.length = count;
     return output;
   }
+
+  /**
+  * @brief Write data within a single page of an I2C EEPROM (e.g., `CAT24Cxx`)
+  * and wait for the internal write cycle to complete.
+  *
+  * Completion of the write cycle is detected by *acknowledge polling*, i.e.,
+  * the EEPROM does not acknowledge its address until the write cycle has
+  * completed.
+  *
+  * @warning Data **MUST NOT** cross a page boundary, since the EEPROM wraps
+  *   the address around to the start of the page.
+  *
+  * \version added: 1.74.0
+  *
+  * @param i2c_address  Address of EEPROM on I2C bus.
+  * @param eeprom_address  Address to write data to in EEPROM.
+  * @param data  Bytes to write.
+  * @param timeout_ms  Maximum time to wait for write cycle to complete.
+  *
+  * @return  Number of acknowledge polls before write cycle completed, -1 if
+  *   EEPROM did not acknowledge the write, or -2 if write cycle did not
+  *   complete within \p timeout_ms.
+  */
+  int16_t i2c_eeprom_write_page(uint8_t i2c_address, uint8_t eeprom_address,
+                                UInt8Array data, uint8_t timeout_ms) {
+    Wire.beginTransmission(i2c_address);
+    Wire.write(eeprom_address);
+    Wire.write(data.data, data.length);
+    if (Wire.endTransmission() != 0) { return -1; }
+
+    const unsigned long start = millis();
+    for (int16_t polls = 1; ; polls++) {
+      Wire.beginTransmission(i2c_address);
+      if (Wire.endTransmission() == 0) { return polls; }
+      if (millis() - start > timeout_ms) { return -2; }
+      delayMicroseconds(100);
+    }
+  }
+
   uint16_t number_of_channels() const { return state_._.channel_count; }
   UInt8Array hardware_version() { return UInt8Array_init(strlen(HARDWARE_VERSION_),
                       (uint8_t *)&HARDWARE_VERSION_[0]); }
@@ -982,6 +1221,38 @@ public:
     return true;
   }
 
+  /**
+  * @brief Callback function called when `state_._.steady_state_rel_std` has
+  * been changed.
+  *
+  * Discard capacitance readings, i.e., only readings measured after the
+  * steady state criteria were set are considered.
+  *
+  * \version added: 1.74.0
+  *
+  * @param steady_state_rel_std
+  *
+  * @return
+  */
+  bool on_state_steady_state_rel_std_changed(float steady_state_rel_std) {
+    steady_state_window_.reset();
+    return true;
+  }
+
+  /**
+  * @param steady_state_window_ms  Steady state window duration.
+  *
+  * @return  `true` if readings spanning the window duration fit in the
+  *   steady state window, i.e., `CAPACITANCE_STEADY_WINDOW_SIZE` readings.
+  *
+  * \version added: 1.74.0
+  */
+  bool on_state_steady_state_window_ms_changed(uint32_t
+                                               steady_state_window_ms) {
+    steady_state_window_.reset();
+    return (steady_state_window_ms <= MAX_STEADY_STATE_WINDOW_MS);
+  }
+
   /**
   * @param frequency  Target actuation frequency.
   *
@@ -1154,6 +1425,21 @@ public:
   * \version 1.57
   *     Update `signal_timer_ms_` with current time, triggering any waiting
   *     callbacks with expired intervals.
+  *
+  * \version 1.74.0
+  *     If steady state relative standard deviation state field is non-zero,
+  *     stream `"capacitance-steady"` event packet to serial interface once the
+  *     relative standard deviation of capacitance readings over the last
+  *     `state_._.steady_state_window_ms` is at most
+  *     `state_._.steady_state_rel_std`.
+  *
+  *     If binary events state field is set, stream capacitance events as
+  *     binary `CapacitanceRecord` packets (instead of formatting JSON).
+  *
+  *     If channel scan interval state field is non-zero, periodically measure
+  *     the capacitance of each channel in the channel scan mask and stream
+  *     `"channels-scanned"` event packet to serial interface (see
+  *     `scan_channels()`).
   */
   void loop() {
     unsigned long now = millis();
@@ -1176,6 +1462,15 @@ public:
       refresh_drops(0);
       drops_timestamp_ms_ = millis();
     }
+    if (state_._.channel_scan_interval_ms > 0 &&
+        (state_._.channel_scan_interval_ms <
+         now - channel_scan_timestamp_ms_) &&
+        event_enabled(EVENT_CHANNELS_SCANNED) && actuation_step_ < 0) {
+      // Scan is skipped while an actuation program is running, since each
+      // channel is actuated in turn during the scan.
+      scan_channels();
+      channel_scan_timestamp_ms_ = millis();
+    }
     if (dma_channel_done_ >= 0) {
       // DMA channel has completed.
       last_dma_channel_done_ = dma_channel_done_;
@@ -2272,6 +2567,97 @@ public:
     return output;
   }
 
+  /**
+   * @brief Set channels included in periodic channel capacitance scan (see
+   * `scan_channels()` and `state_._.channel_scan_interval_ms`).
+   *
+   * By default, all channels are scanned.
+   *
+   * \version added: 1.74.0
+   *
+   * @param channel_scan_mask  Bit-packed array, one bit per channel (same
+   *     format as `state_of_channels`).
+   *
+   * @return  `false` if the mask length does not match the number of
+   *     channels.
+   */
+  bool set_channel_scan_mask(UInt8Array channel_scan_mask) {
+    if (channel_scan_mask.length != channels_.channel_count_ / 8) {
+      return false;
+    }
+    std::copy(channel_scan_mask.data, channel_scan_mask.data +
+              channel_scan_mask.length, channel_scan_mask_.begin());
+    return true;
+  }
+
+  /**
+   * @brief Get channels included in periodic channel capacitance scan.
+   *
+   * \version added: 1.74.0
+   *
+   * @return  Channel scan mask as a bit-packed array.
+   */
+  UInt8Array channel_scan_mask() {
+    UInt8Array output = get_buffer();
+    output.length = channels_.channel_count_ / 8;
+    std::copy(channel_scan_mask_.begin(), channel_scan_mask_.begin() +
+              output.length, output.data);
+    return output;
+  }
+
+  /**
+   * @brief Measure capacitance of each channel in the channel scan mask.
+   *
+   * If `EVENT_CHANNELS_SCANNED` is enabled in event mask, send
+   * `channels-scanned` event stream packet containing:
+   *
+   *  - `channels`: scanned channels.
+   *  - `capacitances`: capacitance of each scanned channel.
+   *  - `n_samples`: number of analog samples per capacitance reading.
+   *  - `time_us`: microseconds counter at start of scan.
+   *  - `duration_us`: duration of scan in microseconds.
+   *
+   * Called by `loop()` every `state_._.channel_scan_interval_ms`
+   * milliseconds (if non-zero), i.e., without blocking the host for the
+   * duration of the scan.
+   *
+   * \version added: 1.74.0
+   *
+   * @return  Number of channels scanned.
+   */
+  uint16_t scan_channels() {
+    std::vector<uint8_t> channels;
+    for (auto channel_i : unpack_channels(channel_scan_mask_)) {
+      if (channel_i < channels_.channel_count_) {
+        channels.push_back(channel_i);
+      }
+    }
+    if (channels.empty()) { return 0; }
+
+    const unsigned long start = microseconds();
+    FloatArray capacitances_array =
+      channel_capacitances(UInt8Array_init(channels.size(), &channels[0]));
+    // Copy capacitances out of the shared buffer before formatting event.
+    std::vector<float> capacitances(capacitances_array.data,
+                                    capacitances_array.data +
+                                    capacitances_array.length);
+    const unsigned long end = microseconds();
+
+    if (event_enabled(EVENT_CHANNELS_SCANNED)) {
+      UInt8Array buffer = UInt8Array_init(0, get_buffer().data);
+      sprintf_channels_scanned(channels, capacitances,
+                               config_._.capacitance_n_samples, start, end,
+                               buffer);
+
+      PacketStream output;
+      output.start(Serial, buffer.length);
+      output.write(Serial, reinterpret_cast<char *>(buffer.data),
+                   buffer.length);
+      output.end(Serial);
+    }
+    return channels.size();
+  }
+
   /**
    * @brief Set actuation state of switching board channels.
    *
@@ -2306,6 +2692,48 @@ public:
     }
     const unsigned long end = microseconds();
 
+    _send_channels_updated(start, end);
+    return true;
+  }
+
+  /**
+   * @brief Turn specified channels off and on, leaving the state of all other
+   * switching board channels unchanged.
+   *
+   * Only switching board output port registers with a changed output are
+   * written over i2c.
+   *
+   * If `EVENT_CHANNELS_UPDATED` is enabled in event mask, send
+   * `channels-updated` event stream packet (see `set_state_of_channels()`).
+   *
+   * \version added: 1.74.0
+   *
+   * @param on  Channels to turn on.
+   * @param off  Channels to turn off.  Channels listed in both \p on and
+   *   \p off are turned on.
+   *
+   * @return  Number of output port registers written, or -1 if any channel is
+   *   not less than the number of channels.
+   */
+  int16_t update_channels(UInt8Array on, UInt8Array off) {
+    const unsigned long start = microseconds();
+    const int16_t write_count = channels_.update_channels(on, off);
+    const unsigned long end = microseconds();
+
+    if (write_count >= 0) { _send_channels_updated(start, end); }
+    return write_count;
+  }
+
+  /**
+   * @brief Send `channels-updated` event stream packet (if
+   * `EVENT_CHANNELS_UPDATED` is enabled in event mask).
+   *
+   * \version added: 1.74.0
+   *
+   * @param start  Microsecond counter before setting channels.
+   * @param end  Microsecond counter after setting channels.
+   */
+  void _send_channels_updated(uint32_t start, uint32_t end) {
     if (event_enabled(EVENT_CHANNELS_UPDATED)) {
       // Stream `channels-updated` event packet.
       UInt8Array result = get_buffer();
@@ -2336,7 +2764,215 @@ public:
         output.end(Serial);
       }
     }
-    return true;
+  }
+
+  /**
+   * @brief Load and start an actuation program, i.e., a sequence of channel
+   * actuation steps run on the device, without a host request per step.
+   *
+   * Each step actuates the step channels (replacing any previously actuated
+   * channels) and completes once:
+   *
+   *  - at least `min_durations_ms[i]` have passed, **and**
+   *  - the capacitance reaches `target_capacitances[i]` (if non-zero),
+   *    **and**
+   *  - the relative standard deviation of capacitance readings within the
+   *    last `min_durations_ms[i]` is at most `steady_state_rel_stds[i]` (if
+   *    non-zero).
+   *
+   * Step criteria are evaluated on each periodic capacitance reading, i.e.,
+   * only while the high-voltage output is enabled and selected.
+   *
+   * An `actuation-step-completed` event stream packet is sent as each step
+   * completes, containing:
+   *      - `"step"`: index of step
+   *      - `"new_value"`: most recent capacitance reading
+   *      - `"time_us"`: microsecond counter at time of completion
+   *      - `"duration_ms"`: step duration
+   *      - `"V_a"`: actuation voltage
+   *
+   * If a step does not complete within `timeouts_ms[i]` (if non-zero), an
+   * `actuation-step-timeout` event stream packet (with the same fields) is
+   * sent instead, and the program is stopped (leaving the step channels
+   * actuated).
+   *
+   * Any running program is replaced.
+   *
+   * \version added: 1.74.0
+   *
+   * @param channel_states  Bit-packed channel states of each step,
+   *   concatenated.
+   * @param min_durations_ms  Minimum duration of each step.
+   * @param timeouts_ms  Maximum duration of each step (0 == no timeout).
+   * @param target_capacitances  Target capacitance of each step (0 ==
+   *   disabled).
+   * @param steady_state_rel_stds  Steady-state relative standard deviation of
+   *   each step (0 == disabled).
+   *
+   * @return  Number of steps, or -1 if array lengths do not match or the
+   *   number of steps exceeds `MAX_ACTUATION_PROGRAM_STEPS`.
+   */
+  int16_t run_actuation_program(UInt8Array channel_states,
+                                UInt32Array min_durations_ms,
+                                UInt32Array timeouts_ms,
+                                FloatArray target_capacitances,
+                                FloatArray steady_state_rel_stds) {
+    const uint16_t step_count = min_durations_ms.length;
+    const uint16_t packed_length = channels_.channel_count_ / 8;
+
+    if ((step_count > MAX_ACTUATION_PROGRAM_STEPS) ||
+        (channel_states.length != step_count * packed_length) ||
+        (timeouts_ms.length != step_count) ||
+        (target_capacitances.length != step_count) ||
+        (steady_state_rel_stds.length != step_count)) {
+      return -1;
+    }
+
+    // Copy program, since RPC arguments share the receive buffer.
+    actuation_program_.clear();
+    actuation_program_.resize(step_count);
+    for (uint16_t i = 0; i < step_count; i++) {
+      ActuationStep &step = actuation_program_[i];
+      step.channel_states.fill(0);
+      std::copy(channel_states.data + i * packed_length,
+                channel_states.data + (i + 1) * packed_length,
+                step.channel_states.begin());
+      step.min_duration_ms = min_durations_ms.data[i];
+      step.timeout_ms = timeouts_ms.data[i];
+      step.target_capacitance = target_capacitances.data[i];
+      step.steady_state_rel_std = steady_state_rel_stds.data[i];
+    }
+    _start_actuation_step(0);
+    return step_count;
+  }
+
+  /**
+   * @brief Stop running actuation program (if any), leaving the channels of
+   * the current step actuated.
+   *
+   * \version added: 1.74.0
+   *
+   * @return  `true` if a program was running.
+   */
+  bool stop_actuation_program() {
+    const bool running = (actuation_step_ >= 0);
+    actuation_step_ = -1;
+    actuation_program_.clear();
+    return running;
+  }
+
+  /**
+   * \version added: 1.74.0
+   *
+   * @return  Index of current actuation program step, or -1 if no program is
+   *   running.
+   */
+  int16_t actuation_step() const { return actuation_step_; }
+
+  /**
+   * @brief Actuate channels of specified actuation program step, or stop the
+   * program if there are no more steps.
+   *
+   * \version added: 1.74.0
+   */
+  void _start_actuation_step(int16_t index) {
+    if (index >= static_cast<int16_t>(actuation_program_.size())) {
+      stop_actuation_program();
+      return;
+    }
+    actuation_step_ = index;
+
+    const unsigned long start = microseconds();
+    channels_.set_state_of_channels(actuation_program_[index].channel_states);
+    const unsigned long end = microseconds();
+    _send_channels_updated(start, end);
+
+    actuation_step_start_ms_ = millis();
+    actuation_step_window_.reset();
+  }
+
+  /**
+   * @brief Evaluate completion criteria of current actuation program step
+   * given a new capacitance reading.
+   *
+   * \version added: 1.74.0
+   */
+  void _update_actuation_program(float capacitance, float actuation_voltage) {
+    const ActuationStep &step = actuation_program_[actuation_step_];
+    const uint32_t now = millis();
+    const uint32_t duration_ms = now - actuation_step_start_ms_;
+
+    actuation_step_window_.add(now, capacitance);
+
+    bool completed = (duration_ms >= step.min_duration_ms);
+    if (completed && (step.target_capacitance > 0)) {
+      completed = (capacitance >= step.target_capacitance);
+    }
+    if (completed && (step.steady_state_rel_std > 0)) {
+      const float rel_std =
+        actuation_step_window_.rel_std(step.min_duration_ms);
+      completed = (rel_std >= 0) && (rel_std <= step.steady_state_rel_std);
+    }
+
+    if (completed) {
+      _send_actuation_step_event("actuation-step-completed", capacitance,
+                                 duration_ms, actuation_voltage);
+      _start_actuation_step(actuation_step_ + 1);
+    } else if ((step.timeout_ms > 0) && (duration_ms >= step.timeout_ms)) {
+      _send_actuation_step_event("actuation-step-timeout", capacitance,
+                                 duration_ms, actuation_voltage);
+      stop_actuation_program();
+    }
+  }
+
+  /**
+   * @brief Send actuation program step event stream packet (see
+   * `run_actuation_program()`).
+   *
+   * \version added: 1.74.0
+   */
+  void _send_actuation_step_event(const char *event, float capacitance,
+                                  uint32_t duration_ms,
+                                  float actuation_voltage) {
+    UInt8Array result = get_buffer();
+    result.length = sprintf((char *)result.data,
+                            "{\"event\": \"%s\", "
+                            "\"step\": %d, "  // Index of step
+                            "\"new_value\": %g, "  // Capacitance value
+                            "\"time_us\": %lu, "  // Time in us
+                            "\"duration_ms\": %lu, "  // Step duration
+                            "\"V_a\": %g}",  // Actuation voltage
+                            event, actuation_step_, capacitance,
+                            microseconds(), duration_ms, actuation_voltage);
+    {
+      PacketStream output;
+      output.start(Serial, result.length);
+      output.write(Serial, (char *)result.data, result.length);
+      output.end(Serial);
+    }
+  }
+
+  /**
+   * @brief Send capacitance event as binary record stream packet (see
+   * `CapacitanceRecord` and `state_._.binary_events`).
+   *
+   * \version added: 1.74.0
+   */
+  void _send_capacitance_record(uint8_t type, float capacitance,
+                                float actuation_voltage, uint32_t time_us) {
+    CapacitanceRecord record;
+    record.type = type;
+    record.reserved = 0;
+    record.n_samples = config_._.capacitance_n_samples;
+    record.time_us = time_us;
+    record.capacitance = capacitance;
+    record.V_a = actuation_voltage;
+
+    PacketStream output;
+    output.start(Serial, sizeof(record), BINARY_EVENTS_STREAM_ID);
+    output.write(Serial, reinterpret_cast<stream_byte_type *>(&record),
+                 sizeof(record));
+    output.end(Serial);
   }
 
   float benchmark_analog_read(uint8_t pin, uint32_t n_samples) {
@@ -111,7 +111,6 @@ void Channels::_update_channels(bool force) {
   //
   // See https://gitlab.com/sci-bots/dropbot.py/issues/26
   Timer1.stop(); // stop the timer during i2c transmission
-  uint8_t data[2];
   // Each PCA9505 chip has 5 8-bit output registers for a total of 40 outputs
   // per chip. We can have up to 8 of these chips on an I2C bus, which means
   // we can control up to 320 channels.
@@ -121,19 +120,67 @@ void Channels::_update_channels(bool force) {
   const auto chip_count = channel_count_ / 40;  // # of detected boards
   for (uint8_t chip = 0; chip < chip_count; chip++) {
     for (uint8_t port = 0; port < 5; port++) {
-      data[0] = PCA9505_OUTPUT_PORT_REGISTER + port;
-      data[1] = ~(state_of_channels_[chip * 5 + port] &
-                  (force ? std::numeric_limits<uint8_t>::max() :
-                   ~disabled_channels_mask_[chip * 5 + port]));
-      Wire.beginTransmission(switching_board_i2c_address_ + chip);
-      Wire.write(data, sizeof(data));
-      Wire.endTransmission();
-      // XXX Need the following delay if we are operating with a 400kbps
-      // i2c clock.
-      delayMicroseconds(200);
+      _write_output_port(chip, port, force);
+    }
+  }
+  Timer1.restart();
+}
+
+
+void Channels::_write_output_port(uint8_t chip, uint8_t port, bool force) {
+  uint8_t data[2];
+  data[0] = PCA9505_OUTPUT_PORT_REGISTER + port;
+  data[1] = ~(state_of_channels_[chip * 5 + port] &
+              (force ? std::numeric_limits<uint8_t>::max() :
+               ~disabled_channels_mask_[chip * 5 + port]));
+  Wire.beginTransmission(switching_board_i2c_address_ + chip);
+  Wire.write(data, sizeof(data));
+  Wire.endTransmission();
+  // XXX Need the following delay if we are operating with a 400kbps
+  // i2c clock.
+  delayMicroseconds(200);
+}
+
+
+int16_t Channels::update_channels(UInt8Array const &on,
+                                  UInt8Array const &off) {
+  for (auto i = 0; i < on.length; i++) {
+    if (on.data[i] >= channel_count_) { return -1; }
+  }
+  for (auto i = 0; i < off.length; i++) {
+    if (off.data[i] >= channel_count_) { return -1; }
+  }
+
+  const packed_channels_t original_state_of_channels = state_of_channels_;
+
+  for (auto i = 0; i < off.length; i++) {
+    const uint8_t channel = off.data[i];
+    state_of_channels_[channel / 8] &= ~(1 << (channel % 8));
+  }
+  for (auto i = 0; i < on.length; i++) {
+    const uint8_t channel = on.data[i];
+    state_of_channels_[channel / 8] |= 1 << (channel % 8);
+  }
+
+  // XXX Stop the timer (which toggles the HV square-wave driver) during i2c
+  // communication.
+  //
+  // See https://gitlab.com/sci-bots/dropbot.py/issues/26
+  Timer1.stop(); // stop the timer during i2c transmission
+  int16_t write_count = 0;
+  const auto port_count = channel_count_ / 8;
+  for (uint8_t i = 0; i < port_count; i++) {
+    // Only write ports where the enabled (i.e., output) state changed.
+    const uint8_t changed = ((original_state_of_channels[i] ^
+                              state_of_channels_[i]) &
+                             ~disabled_channels_mask_[i]);
+    if (changed) {
+      _write_output_port(i / 5, i % 5);
+      write_count++;
     }
   }
   Timer1.restart();
+  return write_count;
 }
 
 
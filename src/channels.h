@@ -181,6 +181,35 @@ public:
    */
   void _update_channels(bool force=false);
 
+  /**
+   * @brief Turn specified channels off and on, leaving the state of all other
+   * channels unchanged.
+   *
+   * Only output port registers with a changed output are written to the
+   * switching boards.
+   *
+   * @param on  Channels to turn on.
+   * @param off  Channels to turn off.  Channels listed in both \p on and
+   *   \p off are turned on.
+   *
+   * @return  Number of output port registers written, or -1 if any channel is
+   *   not less than the channel count (no channels are updated in this case).
+   *
+   * \version added: 1.74.0
+   */
+  int16_t update_channels(UInt8Array const &on, UInt8Array const &off);
+
+  /**
+   * @brief Write output port register of a switching board.
+   *
+   * @param chip  Switching board index.
+   * @param port  Output port register index within switching board.
+   * @param force  If `true`, ignore the disabled channels mask.
+   *
+   * \version added: 1.74.0
+   */
+  void _write_output_port(uint8_t chip, uint8_t port, bool force=false);
+
   std::vector<Switch> actuated_switches() {
     const uint8_t port_count = channel_count_ / 8;
     std::vector<uint8_t> enabled_states(port_count);
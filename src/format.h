@@ -65,4 +65,43 @@ inline void sprintf_drops_detected(Capacitances const &capacitances,
 }
 
 
+/**
+ * @brief Format `channels-scanned` event message (see
+ * `Node::scan_channels()`).
+ *
+ * \version added: 1.74.0
+ */
+template <typename Channels, typename Capacitances>
+inline void sprintf_channels_scanned(Channels const &channels,
+                                     Capacitances const &capacitances,
+                                     uint16_t n_samples, unsigned long start,
+                                     unsigned long end, UInt8Array &buffer) {
+    char* const text = reinterpret_cast<char *>(buffer.data);
+
+    buffer.length += sprintf(&text[buffer.length], "{\"event\": "
+                             "\"channels-scanned\", \"channels\": [");
+    auto i = 0;
+    for (auto it = channels.begin(); it != channels.end(); it++, i++) {
+      if (i > 0) {
+        buffer.length += sprintf(&text[buffer.length], ", ");
+      }
+      buffer.length += sprintf(&text[buffer.length], "%d", *it);
+    }
+
+    buffer.length += sprintf(&text[buffer.length], "], \"capacitances\": [");
+    i = 0;
+    for (auto it = capacitances.begin(); it != capacitances.end(); it++,
+         i++) {
+      if (i > 0) {
+        buffer.length += sprintf(&text[buffer.length], ", ");
+      }
+      buffer.length += sprintf(&text[buffer.length], "%g", *it);
+    }
+
+    buffer.length += sprintf(&text[buffer.length], "], \"n_samples\": %d, "
+                             "\"time_us\": %lu, \"duration_us\": %lu}",
+                             n_samples, start, end - start);
+}
+
+
 #endif  // #ifndef ___DROPBOT__FORMAT__H___
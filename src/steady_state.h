@@ -0,0 +1,95 @@
+#ifndef ___DROPBOT__STEADY_STATE__H___
+#define ___DROPBOT__STEADY_STATE__H___
+
+#include <stdint.h>
+#include <math.h>
+#include <array>
+
+namespace dropbot {
+
+
+/**
+ * @brief Fixed-size window of the most recent timestamped capacitance
+ * readings, used to check whether capacitance has reached a steady state on
+ * the device (i.e., without streaming every reading to the host).
+ *
+ * \version added: 1.74.0
+ *
+ * @tparam N  Maximum number of readings kept.  At the 25 ms capacitance
+ *   measurement period, 64 readings span 1.6 seconds.
+ */
+template <size_t N>
+class SteadyStateWindow {
+public:
+  std::array<uint32_t, N> times_ms_;
+  std::array<float, N> values_;
+  // Number of readings in window.
+  size_t count_;
+  // Index of next reading to write.
+  size_t head_;
+
+  SteadyStateWindow() { reset(); }
+
+  /**
+   * @brief Discard all readings.
+   */
+  void reset() {
+    count_ = 0;
+    head_ = 0;
+  }
+
+  /**
+   * @brief Add reading, replacing the oldest reading if the window is full.
+   *
+   * @param time_ms  Millisecond counter at time of reading.
+   * @param value  Capacitance reading.
+   */
+  void add(uint32_t time_ms, float value) {
+    times_ms_[head_] = time_ms;
+    values_[head_] = value;
+    head_ = (head_ + 1) % N;
+    if (count_ < N) { count_++; }
+  }
+
+  /**
+   * @brief Relative standard deviation (i.e., standard deviation divided by
+   * mean) of readings within the specified duration of the most recent
+   * reading.
+   *
+   * @param duration_ms  Window duration.
+   * @param min_mean  Minimum mean of readings within window.
+   *
+   * @return  Relative standard deviation, or -1 if the readings in the window
+   *   span less than \p duration_ms (or the mean is not positive or is less
+   *   than \p min_mean).
+   */
+  float rel_std(uint32_t duration_ms, float min_mean=0) const {
+    if (count_ < 2) { return -1; }
+    const size_t newest = (head_ + N - 1) % N;
+    const size_t oldest = (head_ + N - count_) % N;
+    if (times_ms_[newest] - times_ms_[oldest] < duration_ms) { return -1; }
+
+    // Two passes over readings within window: mean, then variance.
+    float sum = 0;
+    size_t n = 0;
+    for (size_t i = 0; i < count_; i++) {
+      const size_t j = (newest + N - i) % N;
+      if (times_ms_[newest] - times_ms_[j] > duration_ms) { break; }
+      sum += values_[j];
+      n++;
+    }
+    const float mean = sum / n;
+    if (n < 2 || mean <= 0 || mean < min_mean) { return -1; }
+    float sum_squares = 0;
+    for (size_t i = 0; i < n; i++) {
+      const size_t j = (newest + N - i) % N;
+      sum_squares += (values_[j] - mean) * (values_[j] - mean);
+    }
+    return sqrt(sum_squares / (n - 1)) / mean;
+  }
+};
+
+
+}  // namespace dropbot {
+
+#endif  // #ifndef ___DROPBOT__STEADY_STATE__H___